@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+	import brotli
+except ImportError:  # optional: responses fall back to gzip
+	brotli = None
+
+
+# Content types worth compressing; images, archives and the like already are
+COMPRESSIBLE_TYPES = (
+	"text/",
+	"application/json",
+	"application/javascript",
+	"application/xml",
+	"image/svg+xml",
+)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+	"""Best encoding the client accepts: br, then gzip, else None."""
+	accepted = set()
+	for part in accept_encoding.split(","):
+		name, _, params = part.strip().partition(";")
+		if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+			continue
+		accepted.add(name.strip().lower())
+	if brotli is not None and "br" in accepted:
+		return "br"
+	if "gzip" in accepted:
+		return "gzip"
+	return None
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+	"""One-shot compression; `level` defaults to the maximum (for build-time assets)."""
+	if encoding == "br":
+		return brotli.compress(data, quality=11 if level is None else level)
+	return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+
+
+def is_compressible(content_type: str) -> bool:
+	return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class _StreamEncoder:
+	def __init__(self, encoding: str, level: int):
+		if encoding == "br":
+			self._br = brotli.Compressor(quality=level)
+			self._gz = None
+		else:
+			self._br = None
+			# wbits 16+ writes a gzip header and trailer
+			self._gz = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+	def chunk(self, data: bytes) -> bytes:
+		if self._br is not None:
+			return self._br.process(data) + self._br.flush()
+		return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+	def finish(self) -> bytes:
+		if self._br is not None:
+			return self._br.finish()
+		return self._gz.flush()
+
+
+class CompressionMiddleware:
+	"""Brotli/gzip response compression above a size threshold.
+
+	Responses that already carry a Content-Encoding (precompressed static
+	assets) or whose type is not compressible pass through untouched.
+	"""
+
+	def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+		self.app = app
+		self.minimum_size = minimum_size
+		self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+		if encoding is None:
+			await self.app(scope, receive, send)
+			return
+		await _Responder(self.app, encoding, self.levels[encoding], self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+	def __init__(self, app: ASGIApp, encoding: str, level: int, minimum_size: int):
+		self.app = app
+		self.encoding = encoding
+		self.level = level
+		self.minimum_size = minimum_size
+		self.send: Send = None
+		self.start: Optional[Message] = None
+		# None until the first body message decides: True compress, False pass through
+		self.active: Optional[bool] = None
+		self.encoder: Optional[_StreamEncoder] = None
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		self.send = send
+		await self.app(scope, receive, self.send_compressed)
+
+	async def send_compressed(self, message: Message) -> None:
+		if message["type"] == "http.response.start":
+			self.start = message
+			return
+		if message["type"] != "http.response.body":
+			await self.send(message)
+			return
+
+		body = message.get("body", b"")
+		more_body = message.get("more_body", False)
+
+		if self.active is None:
+			headers = Headers(raw=self.start["headers"])
+			self.active = (
+				"content-encoding" not in headers
+				and is_compressible(headers.get("content-type", ""))
+				and (more_body or len(body) >= self.minimum_size)
+			)
+			if not self.active:
+				await self.send(self.start)
+				await self.send(message)
+				return
+
+			headers = MutableHeaders(raw=self.start["headers"])
+			headers["Content-Encoding"] = self.encoding
+			headers.add_vary_header("Accept-Encoding")
+			if not more_body:
+				body = compress(body, self.encoding, self.level)
+				headers["Content-Length"] = str(len(body))
+				await self.send(self.start)
+				await self.send({"type": "http.response.body", "body": body})
+				return
+			# Streaming response: the final length is unknown
+			del headers["Content-Length"]
+			self.encoder = _StreamEncoder(self.encoding, self.level)
+			await self.send(self.start)
+			await self.send({"type": "http.response.body", "body": self.encoder.chunk(body), "more_body": True})
+			return
+
+		if not self.active:
+			await self.send(message)
+			return
+		data = self.encoder.chunk(body) if more_body else self.encoder.chunk(body) + self.encoder.finish()
+		await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
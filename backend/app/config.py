@@ -15,12 +15,19 @@ class Settings(BaseSettings):
 	llm_provider: str = Field(default="openrouter", description="Provider key: ollama | openrouter | openai | anthropic | gemini | mistral | groq | lmstudio")
 
 	# Search Provider Selection
-	search_provider: str = Field(default="searxng", description="Search provider: searxng | duckduckgo")
+	search_provider: str = Field(default="searxng", description="Search provider: searxng | duckduckgo | local | aggregate")
 
 	# Ollama Services
 	ollama_base_url: str = Field(default="http://localhost:11434")
+	ollama_base_urls: str = Field(default="", description="Comma-separated pool of Ollama servers; overrides ollama_base_url when set")
 	ollama_thinking_model: str = Field(default="deepseek-r1:1.5b")
 	ollama_task_model: str = Field(default="llama3.1:8b")
+	ollama_keep_alive: str = Field(default="30m", description="How long Ollama keeps a model loaded after a call (e.g. 5m, 1h, -1 for forever)")
+	ollama_max_tokens: int = Field(default=4096, description="Upper bound for num_predict")
+	ollama_max_context: int = Field(default=32768, description="Upper bound for the num_ctx derived from prompt size")
+	ollama_preload: bool = Field(default=True, description="Load the thinking model at startup and when Ollama is selected")
+	ollama_release_idle_models: bool = Field(default=False, description="Unload the thinking model while the task model writes the report (and vice versa)")
+	ollama_reuse_context: bool = Field(default=True, description="Continue the report from the planning context when both phases use the same model")
 
 	# OpenRouter Services  
 	openrouter_api_key: str = Field(default="", description="OpenRouter API key")
@@ -68,17 +75,117 @@ class Settings(BaseSettings):
 	lmstudio_thinking_model: str = Field(default="deepseek-r1:1.5b", description="Local reasoning model name")
 	lmstudio_task_model: str = Field(default="llama3.1:8b", description="Local task model name")
 	lmstudio_max_tokens: int = Field(default=2048, description="Max tokens for LMStudio completions")
+	lmstudio_base_urls: str = Field(default="", description="Comma-separated pool of LMStudio servers; overrides lmstudio_base_url when set")
+
+	# Structured output for the clarifying and planning phases
+	structured_output_enabled: bool = Field(default=True, description="Constrain clarifying questions and search plans to their JSON schema with the provider's native structured output")
+	structured_output_repair: bool = Field(default=True, description="Ask the model once to repair a response that still cannot be parsed")
+
+	# Local endpoint pools
+	endpoint_health_interval_seconds: float = Field(default=15.0, description="Seconds between health checks of pooled local endpoints")
 
 	# SearxNG
 	searxng_base_url: str = Field(default="http://192.168.1.142:55001")
 	searxng_engine: str = Field(default="general")
 	searxng_language: str = Field(default="en-US")
 	searxng_results: int = Field(default=8)
+	searxng_base_urls: str = Field(default="", description="Comma-separated pool of SearxNG instances; overrides searxng_base_url when set")
+	searxng_timeout_seconds: float = Field(default=45.0, description="Deadline for one search query, including failover to other instances")
+	searxng_attempt_timeout_seconds: float = Field(default=15.0, description="Longest a single instance may take before the query fails over")
+	searxng_max_concurrency: int = Field(default=4, description="Concurrent queries allowed per SearxNG instance")
 
 	# DuckDuckGo
 	duckduckgo_region: str = Field(default="us-en", description="DuckDuckGo region/language code (e.g., us-en, uk-en, de-de)")
 	duckduckgo_results: int = Field(default=8, description="Number of search results to return")
 
+	# Aggregated search (search_provider=aggregate)
+	search_aggregate_providers: str = Field(default="searxng,duckduckgo", description="Comma-separated search backends queried concurrently and fused")
+	search_aggregate_grace_ms: int = Field(default=750, description="How long to wait for other backends after the first one answers")
+	search_aggregate_timeout_seconds: float = Field(default=45.0, description="Deadline for the first backend to answer")
+	search_aggregate_results: int = Field(default=10, description="Number of fused results to return")
+
+	# Embedding reranker: reorders each query's hits by similarity to the topic before the report
+	rerank_enabled: bool = Field(default=False, description="Rerank search hits with embeddings before writing the report")
+	embedding_provider: str = Field(default="ollama", description="Embedding endpoint: ollama (/api/embed) | openai (any OpenAI-compatible /embeddings)")
+	embedding_base_url: str = Field(default="", description="Embedding server; defaults to ollama_base_url or openai_base_url")
+	embedding_model: str = Field(default="nomic-embed-text")
+	embedding_api_key: str = Field(default="", description="API key for an OpenAI-compatible endpoint; defaults to openai_api_key")
+	embedding_batch_size: int = Field(default=64, description="Texts per embedding request")
+	embedding_cache_dir: str = Field(default="data/embeddings", description="On-disk float16 embedding cache, one directory per model")
+
+	# Local document corpus (search_provider=local, or "local" in search_aggregate_providers)
+	local_corpus_dir: str = Field(default="", description="Directory of .txt/.md/.html (and .pdf with pypdf installed) files to search")
+	local_corpus_index_path: str = Field(default="data/corpus.sqlite3", description="On-disk inverted index of the corpus")
+	local_corpus_results: int = Field(default=8, description="Maximum hits per query")
+	local_corpus_rescan_seconds: int = Field(default=300, description="Rescan the directory for changed files at most this often")
+	local_corpus_mmap_mb: int = Field(default=1024, description="Bytes of the index file read through a memory map, in MB")
+	local_corpus_max_file_mb: float = Field(default=50.0, description="Larger files are not indexed")
+	local_corpus_max_chars: int = Field(default=2_000_000, description="Text indexed per document")
+
+	# Local full-text index of every search hit (SQLite FTS5, BM25 ranking)
+	hit_index_enabled: bool = Field(default=True, description="Index search hits locally and answer queries from the index when possible")
+	hit_index_path: str = Field(default="data/hits.sqlite3", description="SQLite database of the hit index")
+	hit_index_max_age_hours: float = Field(default=72.0, description="Only hits seen within this window can answer a query")
+	hit_index_min_hits: int = Field(default=5, description="A query goes to the web unless the index has at least this many fresh matches")
+	hit_index_results: int = Field(default=10, description="Hits returned for a query answered from the index")
+	hit_index_retention_days: int = Field(default=90, description="Hits not seen for this long are deleted on startup")
+
+	# Reuse of completed research for similar new requests
+	research_reuse_enabled: bool = Field(default=True, description="Offer the plan (and fresh searches) of a similar completed task to new requests")
+	research_reuse_dir: str = Field(default="data/research_cache", description="Completed tasks kept for reuse, one JSON file each")
+	research_reuse_similarity: float = Field(default=0.8, description="Word overlap (Jaccard, 0-1) of topic and clarifications needed to reuse a task; 1.0 = exact matches only")
+	research_reuse_max_age_hours: float = Field(default=168.0, description="Only tasks completed within this window are offered for reuse")
+	research_reuse_search_ttl_hours: float = Field(default=24.0, description="Search results of a reused task are used again for this long; later only its plan is")
+	research_reuse_max_entries: int = Field(default=500, description="Completed tasks kept; the oldest are dropped")
+
+	# Planned queries are parsed from the streaming planner output and shown as they appear
+	plan_prefetch_searches: bool = Field(default=True, description="Start searching each planned query as soon as the planner has written it, before the plan is confirmed")
+
+	# Pipelined reports: each query's findings are drafted as soon as its search finishes, so
+	# only a merge of the drafts remains after the last search (one extra LLM call per query)
+	report_pipeline_enabled: bool = Field(default=False, description="Draft per-query findings while the remaining searches run")
+	report_pipeline_model: str = Field(default="think", description="Model that writes the drafts: think | complete")
+
+	# Report refresh (POST /research/{task_id}/refresh)
+	refresh_compare_hits: int = Field(default=5, description="Top hits per query compared against the previous run (the report is written from these)")
+	refresh_min_new_sources: int = Field(default=1, description="New sources needed before the report is updated; fewer leave it untouched")
+
+	# Model catalog (cached model lists for the settings UI and model-name resolution)
+	catalog_ttl_seconds: int = Field(default=300, description="Serve cached model lists for this long before refreshing in the background")
+	catalog_max_stale_seconds: int = Field(default=3600, description="Refetch synchronously once a cached list is older than this")
+
+	# HTTP
+	compression_minimum_size: int = Field(default=1024, description="Compress (brotli or gzip) API responses of at least this many bytes")
+
+	# Research tasks
+	task_deadline_seconds: float = Field(default=900.0, description="Time budget of a research task, excluding time spent waiting for the user")
+
+	# Report exports (GET /research/{task_id}/export), cached by report content
+	export_cache_dir: str = Field(default="data/exports", description="Directory for rendered export artifacts")
+	export_cache_max_files: int = Field(default=500, description="Oldest artifacts are removed beyond this many files")
+	export_pdf_font: str = Field(default="", description="TrueType font for PDF exports; a DejaVu/Arial install is detected when empty")
+	export_pdf_font_bold: str = Field(default="", description="Bold TrueType font for PDF exports (defaults to export_pdf_font)")
+	export_pdf_font_mono: str = Field(default="", description="Monospace TrueType font for code in PDF exports (defaults to export_pdf_font)")
+
+	# Debug capture of full prompts and raw LLM responses (GET /research/{task_id}/debug)
+	debug_capture: str = Field(default="on", description="Capture debug payloads: off | on | sampled")
+	debug_sample_rate: float = Field(default=0.1, description="Fraction of tasks captured when debug_capture=sampled")
+	debug_max_tasks: int = Field(default=200, description="Debug payloads are kept for this many most recent tasks")
+
+	# Identical concurrent search/LLM requests share one upstream call
+	coalesce_requests: bool = Field(default=True, description="Coalesce identical in-flight search and LLM requests")
+
+	# Task checkpoints (resume interrupted research after a restart)
+	checkpoint_enabled: bool = Field(default=True, description="Persist each completed research phase and resume interrupted tasks on startup")
+	checkpoint_dir: str = Field(default="data/checkpoints", description="Directory for task checkpoint files")
+	checkpoint_retention_hours: int = Field(default=168, description="Checkpoints older than this are deleted on startup")
+
+	# Logging
+	log_level: str = Field(default="INFO", description="Base level for the openresearch loggers")
+	log_phase_levels: str = Field(default="", description="Per-phase level overrides, e.g. 'search=WARNING,report=DEBUG' (phases: task, clarify, plan, search, report)")
+	log_format: str = Field(default="text", description="Log output format: text | json")
+	log_debug_payloads: bool = Field(default=False, description="Log full prompts and LLM responses (requires DEBUG level for the phase)")
+
 	model_config = SettingsConfigDict(
 		env_file=".env",
 		case_sensitive=False,
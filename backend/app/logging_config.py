@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict
+
+from .config import settings
+
+
+ROOT_LOGGER = "openresearch"
+PHASES = ("task", "clarify", "plan", "search", "report")
+
+# Task id of the research task the current thread is working on. Worker threads
+# start with a fresh context, so each thread entry point binds its own task.
+task_id_var: ContextVar[str] = ContextVar("task_id", default="-")
+
+# Attributes present on every LogRecord; anything else came in through `extra`.
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "task_id"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def bind_task(task_id: str) -> None:
+	"""Attach `task_id` to every record logged from the current context."""
+	task_id_var.set(task_id)
+
+
+def get_logger(phase: str) -> logging.Logger:
+	"""Logger for a research phase (task | clarify | plan | search | report)."""
+	return logging.getLogger(f"{ROOT_LOGGER}.research.{phase}")
+
+
+def debug_payloads_enabled(logger: logging.Logger) -> bool:
+	"""Full prompts/responses are only logged when explicitly requested."""
+	return settings.log_debug_payloads and logger.isEnabledFor(logging.DEBUG)
+
+
+class _TaskContextFilter(logging.Filter):
+	def filter(self, record: logging.LogRecord) -> bool:
+		if not hasattr(record, "task_id"):
+			record.task_id = task_id_var.get()
+		return True
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, object]:
+	return {k: v for k, v in vars(record).items() if k not in _RESERVED_ATTRS and not k.startswith("_")}
+
+
+class StructuredFormatter(logging.Formatter):
+	"""Render records as `key=value` text or one JSON object per line."""
+
+	def __init__(self, fmt: str = "text"):
+		super().__init__()
+		self.json = fmt.lower() == "json"
+
+	def format(self, record: logging.LogRecord) -> str:
+		ts = datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds")
+		fields = _extra_fields(record)
+		message = record.getMessage()
+		if self.json:
+			payload = {
+				"ts": ts,
+				"level": record.levelname,
+				"logger": record.name,
+				"task_id": getattr(record, "task_id", "-"),
+				"message": message,
+			}
+			payload.update(fields)
+			if record.exc_info:
+				payload["exc_info"] = self.formatException(record.exc_info)
+			return json.dumps(payload, default=str, ensure_ascii=False)
+
+		inline = []
+		blocks = []
+		for key, value in fields.items():
+			if isinstance(value, str) and "\n" in value:
+				blocks.append(f"  --- {key} ---\n{value}")
+			else:
+				inline.append(f"{key}={json.dumps(value, default=str, ensure_ascii=False)}")
+		line = f"{ts} {record.levelname:<7} {record.name} task_id={getattr(record, 'task_id', '-')} {message}"
+		if inline:
+			line += " " + " ".join(inline)
+		if blocks:
+			line += "\n" + "\n".join(blocks)
+		if record.exc_info:
+			line += "\n" + self.formatException(record.exc_info)
+		return line
+
+
+def _parse_phase_levels(spec: str) -> Dict[str, str]:
+	# "search=WARNING,report=DEBUG" -> {"search": "WARNING", "report": "DEBUG"}
+	levels: Dict[str, str] = {}
+	for item in (spec or "").split(","):
+		if "=" not in item:
+			continue
+		phase, level = item.split("=", 1)
+		phase, level = phase.strip().lower(), level.strip().upper()
+		if phase and level:
+			levels[phase] = level
+	return levels
+
+
+def setup_logging() -> None:
+	"""Route openresearch logs through a queue so workers never block on I/O.
+
+	Safe to call repeatedly; later calls only re-apply the configured levels.
+	"""
+	global _listener
+	root = logging.getLogger(ROOT_LOGGER)
+	root.setLevel(settings.log_level.upper())
+	for phase in PHASES:
+		get_logger(phase).setLevel(logging.NOTSET)
+	for phase, level in _parse_phase_levels(settings.log_phase_levels).items():
+		get_logger(phase).setLevel(level)
+
+	if _listener is not None:
+		return
+
+	log_queue: queue.SimpleQueue = queue.SimpleQueue()
+	queue_handler = logging.handlers.QueueHandler(log_queue)
+	queue_handler.addFilter(_TaskContextFilter())
+	root.addHandler(queue_handler)
+	root.propagate = False
+
+	stream_handler = logging.StreamHandler(sys.stderr)
+	stream_handler.setFormatter(StructuredFormatter(settings.log_format))
+	_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+	_listener.start()
+	atexit.register(_listener.stop)
@@ -1,17 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 import os
 from pathlib import Path
 
+from .compression import CompressionMiddleware
 from .config import settings
+from .logging_config import setup_logging
 from .routers.research import router as research_router
 from .routers.settings import router as settings_router
+from .routers.metrics import router as metrics_router
+from .services.registry import llm_providers, search_providers
+from .services.research_service import resume_tasks
+from .static_assets import StaticAssets
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the local model so the first research task doesn't pay the cold load
+    if settings.llm_provider.lower() == "ollama" and settings.ollama_preload:
+        llm_providers.get("ollama").preload_in_background()
+    # Start indexing the local document corpus before the first query needs it
+    selected = {settings.search_provider.lower()}
+    if "aggregate" in selected:
+        selected.update(p.strip().lower() for p in settings.search_aggregate_providers.split(","))
+    if "local" in selected:
+        search_providers.get("local")
+    # Pick up research tasks a previous run was in the middle of
+    resume_tasks()
+    yield
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="OpenResearch API", version="0.1.0")
+    setup_logging()
+    app = FastAPI(title="OpenResearch API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
     # CORS
     app.add_middleware(
@@ -21,15 +45,18 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Compress API responses; static assets below are precompressed
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
 
     # Routers
     app.include_router(research_router, prefix="/api")
     app.include_router(settings_router, prefix="/api")
+    app.include_router(metrics_router)
 
     # Static files for frontend
     frontend_path = Path(__file__).parent.parent.parent / "frontend"
     if frontend_path.exists():
-        app.mount("/static", StaticFiles(directory=str(frontend_path)), name="static")
+        app.mount("/static", StaticAssets(frontend_path), name="static")
         
         @app.get("/")
         async def root():
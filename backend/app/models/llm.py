@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class LLMUsage(BaseModel):
+	"""Normalized accounting for a single LLM call, whatever the provider."""
+	provider: str
+	model: str
+	phase: Optional[str] = None
+	input_tokens: int = 0
+	# Part of input_tokens served from the provider's prompt cache
+	cached_input_tokens: int = 0
+	output_tokens: int = 0
+	time_to_first_token_ms: Optional[float] = None
+	generation_ms: float = 0.0
+	total_ms: float = 0.0
+	# Reported by local providers (Ollama) only
+	load_ms: Optional[float] = None
+	prompt_eval_ms: Optional[float] = None
+	# Result shared from an identical call already in flight for another task
+	coalesced: bool = False
+
+	@property
+	def tokens_per_second(self) -> Optional[float]:
+		if not self.output_tokens or self.generation_ms <= 0:
+			return None
+		return self.output_tokens / (self.generation_ms / 1000.0)
+
+
+class LLMResult(BaseModel):
+	text: str
+	usage: LLMUsage
+	# Provider conversation state that can be passed back to continue (Ollama `context`)
+	context: Optional[List[int]] = None
+
+
+class UsageTotals(BaseModel):
+	calls: int = 0
+	input_tokens: int = 0
+	cached_input_tokens: int = 0
+	output_tokens: int = 0
+	generation_ms: float = 0.0
+	total_ms: float = 0.0
+
+	def add(self, usage: LLMUsage) -> None:
+		self.calls += 1
+		self.input_tokens += usage.input_tokens
+		self.cached_input_tokens += usage.cached_input_tokens
+		self.output_tokens += usage.output_tokens
+		self.generation_ms += usage.generation_ms
+		self.total_ms += usage.total_ms
+
+
+class TaskUsage(BaseModel):
+	"""Token usage of a research task, summed overall, per phase and per provider/model."""
+	total: UsageTotals = Field(default_factory=UsageTotals)
+	by_phase: Dict[str, UsageTotals] = Field(default_factory=dict)
+	by_model: Dict[str, UsageTotals] = Field(default_factory=dict)
+	calls: List[LLMUsage] = Field(default_factory=list)
+
+	def add(self, usage: LLMUsage) -> None:
+		self.total.add(usage)
+		self.by_phase.setdefault(usage.phase or "unknown", UsageTotals()).add(usage)
+		self.by_model.setdefault(f"{usage.provider}/{usage.model}", UsageTotals()).add(usage)
+		self.calls.append(usage)
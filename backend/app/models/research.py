@@ -2,12 +2,16 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
+
+from .llm import TaskUsage
 
 
 class ResearchRequest(BaseModel):
 	topic: str
 	depth: str = Field(default="standard", description="standard|deep|brief")
+	deadline_seconds: Optional[float] = Field(default=None, gt=0, description="Time budget for the task (defaults to the task_deadline_seconds setting)")
+	reuse: bool = Field(default=True, description="Start from the plan and searches of a similar completed task when one exists")
 
 
 class SearchQuery(BaseModel):
@@ -42,29 +46,82 @@ class SearchHit(BaseModel):
 	snippet: Optional[str] = None
 
 
+_SEARCH_HITS = TypeAdapter(List[SearchHit])
+
+
+def parse_search_hits(items: List[dict]) -> List[SearchHit]:
+	"""Build many hits in a single pydantic-core call, much cheaper than one model at a time."""
+	return _SEARCH_HITS.validate_python(items)
+
+
 class SearchStepResult(BaseModel):
 	query: str
 	hits: List[SearchHit]
 
 
+class ResearchReuse(BaseModel):
+	"""The completed task a new task took its plan (and fresh searches) from."""
+	task_id: str
+	topic: str
+	similarity: float
+	completed_at: datetime
+
+
+class CachedResearch(BaseModel):
+	"""What a completed task leaves behind for similar future requests."""
+	task_id: str
+	topic: str
+	depth: str
+	clarifying_answers: List[str] = Field(default_factory=list)
+	completed_at: datetime
+	plan: SearchPlan
+	steps: List[SearchStepResult]
+
+
+class ResearchRefresh(BaseModel):
+	"""Outcome of the latest re-run of a finished task's searches."""
+	refreshed_at: datetime
+	new_sources: int = 0
+	dropped_sources: int = 0
+	changed_queries: List[str] = Field(default_factory=list)
+	# Empty when nothing material changed and the report was kept as is
+	updated_sections: List[str] = Field(default_factory=list)
+
+
 class ResearchProgress(BaseModel):
     task_id: str
     started_at: datetime
     status: str
     message: Optional[str] = None
+    # Original request, kept so later phases (and resumed tasks) use the requested options
+    topic: Optional[str] = None
+    depth: str = Field(default="standard")
+    clarifying_answers: Optional[List[str]] = None
+    allow_reuse: bool = Field(default=True)
+    deadline_seconds: Optional[float] = None
+    reused_from: Optional[ResearchReuse] = None
     clarifying_questions: Optional[ClarifyingQuestions] = None
     awaiting_clarification: bool = Field(default=False)
     plan: Optional[SearchPlan] = None
     steps: List[SearchStepResult] = Field(default_factory=list)
     report_markdown: Optional[str] = None
+    last_refresh: Optional[ResearchRefresh] = None
     awaiting_confirmation: bool = Field(default=False)
-    # Debug information
-    debug_clarifying_prompt: Optional[str] = None
-    debug_clarifying_response: Optional[str] = None
-    debug_plan_prompt: Optional[str] = None
-    debug_plan_response: Optional[str] = None
-    debug_report_prompt: Optional[str] = None
-    debug_report_response: Optional[str] = None
+    usage: TaskUsage = Field(default_factory=TaskUsage)
+    # Prompts and raw responses are served separately by GET /research/{task_id}/debug
+    debug_available: bool = Field(default=False)
+
+
+class ResearchDebug(BaseModel):
+    """Full prompts and raw LLM responses of a task (only if it was captured)."""
+    task_id: str
+    captured: bool
+    clarifying_prompt: Optional[str] = None
+    clarifying_response: Optional[str] = None
+    plan_prompt: Optional[str] = None
+    plan_response: Optional[str] = None
+    report_prompt: Optional[str] = None
+    report_response: Optional[str] = None
 
 
 class ResearchResponse(BaseModel):
@@ -1,11 +1,12 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 
 class SettingsResponse(BaseModel):
     llm_provider: str
     search_provider: str
     ollama_base_url: str
+    ollama_base_urls: str
     ollama_thinking_model: str
     ollama_task_model: str
     openrouter_api_key: str
@@ -39,20 +40,26 @@ class SettingsResponse(BaseModel):
     groq_task_model: str
     groq_max_tokens: int
     lmstudio_base_url: str
+    lmstudio_base_urls: str
     lmstudio_thinking_model: str
     lmstudio_task_model: str
     lmstudio_max_tokens: int
     searxng_base_url: str
+    searxng_base_urls: str
     searxng_language: str
     searxng_results: int
     duckduckgo_region: str
     duckduckgo_results: int
+    local_corpus_dir: str
+    local_corpus_results: int
+    search_aggregate_providers: str
 
 
 class SettingsUpdate(BaseModel):
     llm_provider: str = None
     search_provider: str = None
     ollama_base_url: str = None
+    ollama_base_urls: str = None
     ollama_thinking_model: str = None
     ollama_task_model: str = None
     openrouter_api_key: str = None
@@ -85,15 +92,45 @@ class SettingsUpdate(BaseModel):
     groq_task_model: str = None
     groq_max_tokens: int = None
     lmstudio_base_url: str = None
+    lmstudio_base_urls: str = None
     lmstudio_thinking_model: str = None
     lmstudio_task_model: str = None
     lmstudio_max_tokens: int = None
     searxng_base_url: str = None
+    searxng_base_urls: str = None
     searxng_language: str = None
     searxng_results: int = None
     duckduckgo_region: str = None
     duckduckgo_results: int = None
+    local_corpus_dir: str = None
+    local_corpus_results: int = None
+    search_aggregate_providers: str = None
 
 
 class OllamaModelsResponse(BaseModel):
-    models: List[str]
\ No newline at end of file
+    models: List[str]
+
+
+class EndpointStatus(BaseModel):
+    url: str
+    healthy: bool
+    outstanding: int
+    consecutive_failures: int
+    loaded_models: List[str] = []
+    last_error: Optional[str] = None
+
+
+class SearchInstanceStatus(BaseModel):
+    url: str
+    healthy: bool
+    in_flight: int
+    latency_ms: Optional[float] = None
+    error_rate: float
+    consecutive_failures: int
+    weight: float
+    last_error: Optional[str] = None
+
+
+class EndpointPoolsResponse(BaseModel):
+    pools: Dict[str, List[EndpointStatus]]
+    search: Dict[str, List[SearchInstanceStatus]] = {}
@@ -1,26 +1,73 @@
-from fastapi import APIRouter, HTTPException
+import hashlib
+from typing import Optional
 
-from ..models.research import ResearchRequest, ResearchResponse, QueryConfirmation, ClarificationResponse
-from ..services.research_service import start_research, get_progress, confirm_queries, submit_clarification
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+
+from ..models.research import ResearchRequest, ResearchResponse, ResearchDebug, QueryConfirmation, ClarificationResponse
+from ..services.research_service import start_research, get_progress, get_debug, confirm_queries, submit_clarification, cancel_research, refresh_research
+from ..services.export_service import EXPORT_FORMATS, export_report, slugify
 
 
 router = APIRouter(prefix="/research", tags=["research"])
 
 
+def _progress_response(task_id: str, progress, request: Optional[Request] = None) -> Response:
+	# Task snapshots are validated when they are built: skip FastAPI's
+	# re-validation of the response model and let pydantic-core write the JSON
+	body = ResearchResponse.model_construct(task_id=task_id, status=progress.status, progress=progress).model_dump_json()
+	# Polls of an unchanged task are answered with a 304 (the browser revalidates
+	# on its own because of no-cache) instead of resending the whole report
+	etag = '"%s"' % hashlib.blake2b(body.encode("utf-8"), digest_size=12).hexdigest()
+	headers = {"ETag": etag, "Cache-Control": "no-cache"}
+	if request is not None and request.headers.get("if-none-match") == etag:
+		return Response(status_code=304, headers=headers)
+	return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.post("/start", response_model=ResearchResponse)
 def start(req: ResearchRequest):
 	task_id = start_research(req)
 	progress = get_progress(task_id)
 	assert progress is not None
-	return ResearchResponse(task_id=task_id, status=progress.status, progress=progress)
+	return _progress_response(task_id, progress)
 
 
 @router.get("/{task_id}", response_model=ResearchResponse)
-def progress(task_id: str):
+def progress(task_id: str, request: Request):
 	p = get_progress(task_id)
 	if not p:
 		raise HTTPException(status_code=404, detail="Task not found")
-	return ResearchResponse(task_id=task_id, status=p.status, progress=p)
+	return _progress_response(task_id, p, request)
+
+
+@router.get("/{task_id}/debug", response_model=ResearchDebug)
+def debug(task_id: str):
+	d = get_debug(task_id)
+	if not d:
+		raise HTTPException(status_code=404, detail="Task not found")
+	return d
+
+
+@router.get("/{task_id}/export")
+def export(task_id: str, request: Request, format: str = Query("md", description="md | html | pdf")):
+	if format not in EXPORT_FORMATS:
+		raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+	p = get_progress(task_id)
+	if not p:
+		raise HTTPException(status_code=404, detail="Task not found")
+	if not p.report_markdown:
+		raise HTTPException(status_code=409, detail="Report not ready")
+	try:
+		path, etag = export_report(p.topic or "", p.report_markdown, format)
+	except Exception as e:
+		raise HTTPException(status_code=500, detail=f"Failed to render {format} export: {e}") from e
+	# The URL names a task, not a report version: revalidate, then reuse
+	headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+	if request.headers.get("if-none-match") == etag:
+		return Response(status_code=304, headers=headers)
+	media_type, extension = EXPORT_FORMATS[format]
+	return FileResponse(path, media_type=media_type, filename=f"{slugify(p.topic or '')}.{extension}", headers=headers)
 
 
 @router.post("/{task_id}/confirm")
@@ -38,3 +85,20 @@ def submit_clarifications(task_id: str, clarification: ClarificationResponse):
 		raise HTTPException(status_code=404, detail="Task not found or not awaiting clarification")
 	return {"message": "Clarifications received, creating enhanced search plan"}
 
+
+@router.post("/{task_id}/refresh")
+def refresh(task_id: str):
+	if get_progress(task_id) is None:
+		raise HTTPException(status_code=404, detail="Task not found")
+	if not refresh_research(task_id):
+		raise HTTPException(status_code=409, detail="Only a finished report can be refreshed")
+	return {"message": "Refreshing searches"}
+
+
+@router.post("/{task_id}/cancel")
+def cancel(task_id: str):
+	success = cancel_research(task_id)
+	if not success:
+		raise HTTPException(status_code=404, detail="Task not found or already finished")
+	return {"message": "Research cancelled"}
+
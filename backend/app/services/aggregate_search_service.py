@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from ..config import settings
+from ..logging_config import get_logger
+from ..models.research import SearchHit
+from .cancellation import deadline_in
+from .metrics import metrics
+from .registry import search_providers
+from .search_common import url_key
+
+
+_log = get_logger("search")
+
+# Standard reciprocal rank fusion constant: damps the advantage of the very top ranks
+_RRF_K = 60
+
+# Shared by all tasks; a backend that misses the grace window finishes here and is ignored
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search")
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[SearchHit]], limit: Optional[int] = None) -> List[SearchHit]:
+	"""Merge ranked hit lists: each hit scores 1 / (k + rank) per list it appears in."""
+	scores: Dict[str, float] = {}
+	best: Dict[str, SearchHit] = {}
+	for hits in rankings.values():
+		for rank, hit in enumerate(hits, 1):
+			key = url_key(hit)
+			scores[key] = scores.get(key, 0.0) + 1.0 / (_RRF_K + rank)
+			# Keep the first copy seen, unless a later one has the snippet it lacks
+			if key not in best or (not best[key].snippet and hit.snippet):
+				best[key] = hit
+	ordered = sorted(scores, key=lambda k: scores[k], reverse=True)
+	return [best[k] for k in ordered[:limit]]
+
+
+class AggregateSearchService:
+	"""Queries several search backends at once and fuses their rankings.
+
+	Returns once the first backend has answered plus a short grace window, so
+	the slowest backend never sets the latency of a query.
+	"""
+
+	def __init__(self, base_url: str | None = None):
+		self.base_url = base_url
+
+	@staticmethod
+	def backends() -> List[str]:
+		return [b.strip() for b in settings.search_aggregate_providers.split(",") if b.strip() and b.strip() != "aggregate"]
+
+	def _search_one(self, name: str, query: str, language: str | None, num_results: int | None) -> List[SearchHit]:
+		started = time.monotonic()
+		hits = search_providers.get(name).search(query, language=language, num_results=num_results)
+		metrics.observe("openresearch_search_backend_seconds", time.monotonic() - started, help="Search backend latency within aggregated searches", backend=name)
+		return hits
+
+	def search(self, query: str, language: str | None = None, num_results: int | None = None) -> List[SearchHit]:
+		pending: Dict[Future, str] = {}
+		for name in self.backends():
+			# Each backend thread gets a copy of the caller's context so logs keep the task id
+			ctx = contextvars.copy_context()
+			pending[_EXECUTOR.submit(ctx.run, self._search_one, name, query, language, num_results)] = name
+		if not pending:
+			raise ValueError("No search backends configured for aggregated search")
+
+		deadline = deadline_in(settings.search_aggregate_timeout_seconds)
+		first_answer: Optional[float] = None
+		rankings: Dict[str, List[SearchHit]] = {}
+		errors: Dict[str, Exception] = {}
+		while pending:
+			limit = deadline if first_answer is None else min(deadline, first_answer + settings.search_aggregate_grace_ms / 1000.0)
+			remaining = limit - time.monotonic()
+			if remaining <= 0:
+				break
+			done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+			for future in done:
+				name = pending.pop(future)
+				try:
+					hits = future.result()
+				except Exception as e:
+					errors[name] = e
+					_log.warning("Search backend failed", extra={"backend": name, "error": str(e)})
+					continue
+				rankings[name] = hits
+				if hits and first_answer is None:
+					first_answer = time.monotonic()
+
+		if pending:
+			late = sorted(pending.values())
+			metrics.inc("openresearch_search_backend_late_total", len(late), help="Backends that missed the aggregation grace window")
+			_log.info("Search backends missed the grace window", extra={"backends": late})
+		if not rankings:
+			if errors:
+				raise next(iter(errors.values()))
+			raise TimeoutError(f"No search backend answered within {settings.search_aggregate_timeout_seconds:g}s")
+		return reciprocal_rank_fusion(rankings, limit=num_results or settings.search_aggregate_results)
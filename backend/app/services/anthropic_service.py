@@ -4,6 +4,9 @@ import requests
 from typing import Optional
 
 from ..config import settings
+from ..models.llm import LLMResult
+from .cancellation import call_timeout
+from .llm_common import StreamTimer, iter_sse_json
 
 
 class AnthropicService:
@@ -19,7 +22,7 @@ class AnthropicService:
         self.task_model = task_model or settings.anthropic_task_model
         self.max_tokens = max_tokens or settings.anthropic_max_tokens
 
-    def _generate(self, prompt: str, model: str) -> str:
+    def _generate(self, prompt: str, model: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
         if not self.api_key:
             raise ValueError("Anthropic API key is required")
         url = f"{self.base_url}/v1/messages"
@@ -33,21 +36,49 @@ class AnthropicService:
             "max_tokens": self.max_tokens,
             "messages": [
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            "stream": True,
         }
-        resp = requests.post(url, json=payload, headers=headers, timeout=120)
-        resp.raise_for_status()
-        data = resp.json()
-        # Messages API returns content as a list of parts
-        parts = data.get("content", [])
-        text = "".join(p.get("text", "") for p in parts if p.get("type") in (None, "text"))
-        return text.strip()
+        if system:
+            # Mark the fixed instructions as a cacheable prefix
+            payload["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        if schema:
+            # Structured output is a forced tool call; its streamed arguments are the JSON
+            payload["tools"] = [{"name": schema["name"], "description": "Return the result", "input_schema": schema["schema"]}]
+            payload["tool_choice"] = {"type": "tool", "name": schema["name"]}
+        timer = StreamTimer()
+        parts = []
+        input_tokens = output_tokens = cached_tokens = 0
+        with requests.post(url, json=payload, headers=headers, timeout=call_timeout(120), stream=True) as resp:
+            resp.raise_for_status()
+            # Messages API streams typed events; usage arrives in message_start and message_delta
+            for event in iter_sse_json(resp):
+                kind = event.get("type")
+                if kind == "message_start":
+                    usage = event.get("message", {}).get("usage", {})
+                    # input_tokens excludes tokens read from or written to the prompt cache
+                    cached_tokens = usage.get("cache_read_input_tokens") or 0
+                    input_tokens = usage.get("input_tokens", 0) + cached_tokens + (usage.get("cache_creation_input_tokens") or 0)
+                    output_tokens = usage.get("output_tokens", 0)
+                elif kind == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if delta.get("type") in (None, "text_delta") and delta.get("text"):
+                        timer.token(delta["text"])
+                        parts.append(delta["text"])
+                    elif delta.get("type") == "input_json_delta" and delta.get("partial_json"):
+                        timer.token(delta["partial_json"])
+                        parts.append(delta["partial_json"])
+                elif kind == "message_delta":
+                    output_tokens = event.get("usage", {}).get("output_tokens", output_tokens)
+                elif kind == "error":
+                    raise Exception(f"Anthropic API error: {event.get('error', {}).get('message', event)}")
+        return LLMResult(
+            text="".join(parts).strip(),
+            usage=timer.usage("anthropic", model, input_tokens, output_tokens, cached_tokens),
+        )
 
-    def think(self, prompt: str) -> str:
-        return self._generate(prompt, self.thinking_model)
+    def think(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._generate(prompt, self.thinking_model, system, schema)
 
-    def complete(self, prompt: str) -> str:
-        return self._generate(prompt, self.task_model)
-
-
-anthropic = AnthropicService()
+    def complete(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._generate(prompt, self.task_model, system, schema)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class TaskCancelled(Exception):
+	"""The research task was cancelled; its remaining work is no longer wanted."""
+
+
+class DeadlineExceeded(TaskCancelled):
+	"""The research task ran out of its time budget."""
+
+
+class TaskScope:
+	"""Cancellation flag and time budget shared by all work done for one task.
+
+	The budget only runs while the task is being worked on: time spent waiting
+	for the user to answer questions or confirm queries is not charged.
+	"""
+
+	def __init__(self, budget_seconds: float):
+		self.budget_seconds = budget_seconds
+		self.deadline: Optional[float] = None
+		self._cancelled = threading.Event()
+		self._lock = threading.Lock()
+		self._responses: set = set()
+
+	@property
+	def cancelled(self) -> bool:
+		return self._cancelled.is_set()
+
+	def remaining(self) -> Optional[float]:
+		return None if self.deadline is None else self.deadline - time.monotonic()
+
+	def check(self) -> None:
+		if self.cancelled:
+			raise TaskCancelled("Task was cancelled")
+		remaining = self.remaining()
+		if remaining is not None and remaining <= 0:
+			raise DeadlineExceeded(f"Task exceeded its {self.budget_seconds:g}s deadline")
+
+	def cancel(self) -> None:
+		self._cancelled.set()
+		# Closing in-flight responses unblocks their readers and makes the
+		# server drop the generation, instead of streaming it to nobody
+		with self._lock:
+			responses = list(self._responses)
+		for resp in responses:
+			try:
+				resp.close()
+			except Exception:
+				pass
+
+	def start(self) -> None:
+		"""Start charging time to the budget (a worker picked the task up)."""
+		with self._lock:
+			if self.deadline is None:
+				self.deadline = time.monotonic() + self.budget_seconds
+
+	def pause(self) -> None:
+		"""Stop charging time (the task now waits for the user)."""
+		with self._lock:
+			if self.deadline is not None:
+				self.budget_seconds = max(0.0, self.deadline - time.monotonic())
+				self.deadline = None
+
+	@contextmanager
+	def watch(self, resp) -> Iterator[None]:
+		with self._lock:
+			self._responses.add(resp)
+		try:
+			yield
+		finally:
+			with self._lock:
+				self._responses.discard(resp)
+
+
+# Scope of the task the current thread is working on (None outside research tasks)
+_scope_var: ContextVar[Optional[TaskScope]] = ContextVar("task_scope", default=None)
+
+
+def bind_scope(scope: TaskScope) -> None:
+	_scope_var.set(scope)
+
+
+def current_scope() -> Optional[TaskScope]:
+	return _scope_var.get()
+
+
+def check_cancelled() -> None:
+	"""Raise TaskCancelled if the current task was cancelled or is out of time."""
+	scope = _scope_var.get()
+	if scope is not None:
+		scope.check()
+
+
+def call_timeout(default: float) -> float:
+	"""Timeout for a downstream call: the provider default, capped by the task's remaining time."""
+	scope = _scope_var.get()
+	if scope is None:
+		return default
+	scope.check()
+	remaining = scope.remaining()
+	return default if remaining is None else max(0.1, min(default, remaining))
+
+
+def deadline_in(default: float) -> float:
+	"""Monotonic deadline `default` seconds from now, pulled in to the task's deadline."""
+	return time.monotonic() + call_timeout(default)
+
+
+@contextmanager
+def watch_response(resp) -> Iterator[None]:
+	"""Abort `resp` if the current task is cancelled while it is being read."""
+	scope = _scope_var.get()
+	if scope is None:
+		yield
+		return
+	try:
+		with scope.watch(resp):
+			yield
+	except TaskCancelled:
+		raise
+	except Exception:
+		# A read failing because cancel() closed the response is a cancellation, not an error
+		scope.check()
+		raise
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ..config import settings
+from ..logging_config import get_logger
+from ..models.research import ResearchProgress
+
+
+_log = get_logger("task")
+
+
+class CheckpointStore:
+	"""Durable per-task snapshots of `ResearchProgress`, one JSON file per task.
+
+	Files are replaced atomically, so a crash mid-write leaves the previous
+	checkpoint intact.
+	"""
+
+	def __init__(self, directory: Optional[str] = None):
+		self._directory = directory
+		self._lock = threading.Lock()
+
+	@property
+	def enabled(self) -> bool:
+		return settings.checkpoint_enabled
+
+	@property
+	def directory(self) -> Path:
+		return Path(self._directory or settings.checkpoint_dir)
+
+	def _path(self, task_id: str) -> Path:
+		return self.directory / f"{task_id}.json"
+
+	def save(self, task_id: str, snapshot: Callable[[], Optional[str]]) -> None:
+		"""Write the JSON returned by `snapshot()`.
+
+		Taking the snapshot under the store lock keeps concurrent writers from
+		replacing a newer checkpoint with an older one.
+		"""
+		if not self.enabled:
+			return
+		with self._lock:
+			data = snapshot()
+			if data is None:
+				return
+			path = self._path(task_id)
+			try:
+				path.parent.mkdir(parents=True, exist_ok=True)
+				tmp = path.with_suffix(".tmp")
+				tmp.write_text(data, encoding="utf-8")
+				os.replace(tmp, path)
+			except OSError as e:
+				_log.warning("Checkpoint write failed", extra={"task_id": task_id, "error": str(e)})
+
+	def load_all(self) -> List[ResearchProgress]:
+		"""Checkpoints within the retention window; older ones are deleted."""
+		if not self.enabled or not self.directory.is_dir():
+			return []
+		cutoff = time.time() - settings.checkpoint_retention_hours * 3600
+		tasks = []
+		for path in self.directory.glob("*.json"):
+			try:
+				if path.stat().st_mtime < cutoff:
+					path.unlink()
+					continue
+				tasks.append(ResearchProgress.model_validate_json(path.read_text(encoding="utf-8")))
+			except (OSError, ValueError) as e:
+				_log.warning("Skipping unreadable checkpoint", extra={"path": str(path), "error": str(e)})
+		return tasks
+
+	def delete(self, task_id: str) -> None:
+		try:
+			self._path(task_id).unlink()
+		except FileNotFoundError:
+			pass
+
+
+checkpoints = CheckpointStore()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..config import settings
+from ..models.research import ResearchDebug
+
+
+class DebugStore:
+	"""Full prompts and raw LLM responses per task, kept compressed in memory.
+
+	Whether a task is captured is decided once when it starts (debug_capture:
+	off | on | sampled). Only the most recent `debug_max_tasks` tasks are kept.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		# task_id -> field name -> zlib-compressed UTF-8 text; None when not captured
+		self._tasks: "OrderedDict[str, Optional[Dict[str, bytes]]]" = OrderedDict()
+
+	@staticmethod
+	def _wanted() -> bool:
+		mode = settings.debug_capture.lower()
+		if mode == "on":
+			return True
+		if mode == "sampled":
+			return random.random() < settings.debug_sample_rate
+		return False
+
+	def begin(self, task_id: str) -> bool:
+		"""Decide whether to capture a new task; returns the decision."""
+		captured = self._wanted()
+		with self._lock:
+			self._tasks[task_id] = {} if captured else None
+			while len(self._tasks) > settings.debug_max_tasks:
+				self._tasks.popitem(last=False)
+		return captured
+
+	def enabled(self, task_id: str) -> bool:
+		with self._lock:
+			return self._tasks.get(task_id) is not None
+
+	def record(self, task_id: str, phase: str, prompt: str, response: str) -> None:
+		# Most tasks are not captured: don't pay for compressing their prompts
+		if not self.enabled(task_id):
+			return
+		compressed = {
+			f"{phase}_prompt": zlib.compress(prompt.encode("utf-8")),
+			f"{phase}_response": zlib.compress(response.encode("utf-8")),
+		}
+		with self._lock:
+			payloads = self._tasks.get(task_id)
+			if payloads is not None:
+				payloads.update(compressed)
+
+	def get(self, task_id: str) -> ResearchDebug:
+		with self._lock:
+			payloads = self._tasks.get(task_id)
+			payloads = dict(payloads) if payloads is not None else None
+		if payloads is None:
+			return ResearchDebug(task_id=task_id, captured=False)
+		fields = {name: zlib.decompress(data).decode("utf-8") for name, data in payloads.items()}
+		return ResearchDebug(task_id=task_id, captured=True, **fields)
+
+
+debug_store = DebugStore()
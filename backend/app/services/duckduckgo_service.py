@@ -1,11 +1,30 @@
 from __future__ import annotations
 
 from typing import List
+from urllib.parse import parse_qs, urlsplit
 import requests
 from bs4 import BeautifulSoup
 
 from ..config import settings
-from ..models.research import SearchHit
+from ..models.research import SearchHit, parse_search_hits
+from .cancellation import call_timeout
+
+
+def result_url(href: str, display: str) -> str:
+	"""Absolute URL of a result: the target of DuckDuckGo's redirect link, else the display URL."""
+	if href:
+		parts = urlsplit(href if "://" in href else "https:" + href if href.startswith("//") else href)
+		if parts.path.startswith("/l/"):
+			target = parse_qs(parts.query).get("uddg")
+			if target and target[0].startswith(("http://", "https://")):
+				return target[0]
+		elif parts.scheme in ("http", "https"):
+			return href
+	display = display.strip().strip('.')
+	if not display:
+		return ""
+	# Display URLs come without a scheme ("www.example.com/a/b")
+	return display if "://" in display else f"https://{display}"
 
 
 class DuckDuckGoService:
@@ -26,7 +45,7 @@ class DuckDuckGoService:
 		}
 
 		url = f"{self.base_url}/html"
-		resp = requests.get(url, params=params, headers=headers, timeout=30)
+		resp = requests.get(url, params=params, headers=headers, timeout=call_timeout(30))
 		resp.raise_for_status()
 
 		# Parse HTML results
@@ -40,6 +59,7 @@ class DuckDuckGoService:
 
 		for result in result_elements[:max_results]:
 			title_elem = result.select_one('.result__title')
+			link_elem = result.select_one('.result__a')
 			url_elem = result.select_one('.result__url')
 			snippet_elem = result.select_one('.result__snippet')
 
@@ -48,25 +68,14 @@ class DuckDuckGoService:
 				url = ""
 				snippet = ""
 
-				if url_elem:
-					url = url_elem.get_text(strip=True)
-					# Clean up the URL (remove leading/trailing dots, etc.)
-					url = url.strip('.')
+				href = link_elem.get("href", "") if link_elem else ""
+				url = result_url(href, url_elem.get_text(strip=True) if url_elem else "")
 
 				if snippet_elem:
 					snippet = snippet_elem.get_text(strip=True)
 
 				# Skip if we don't have at least a title
 				if title:
-					results.append(
-						SearchHit(
-							title=title,
-							url=url,
-							snippet=snippet,
-						)
-					)
+					results.append({"title": title, "url": url, "snippet": snippet})
 
-		return results
-
-
-duckduckgo = DuckDuckGoService()
\ No newline at end of file
+		return parse_search_hits(results)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+from ..config import settings
+from ..logging_config import get_logger
+from ..models.research import SearchStepResult
+from .cancellation import call_timeout
+from .metrics import metrics
+
+
+_log = get_logger("report")
+
+# Bytes of sha256 kept per cached text
+_KEY_BYTES = 16
+
+
+def text_key(model: str, text: str) -> bytes:
+	return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()[:_KEY_BYTES]
+
+
+class EmbeddingCache:
+	"""Append-only on-disk embedding cache for one model.
+
+	`vectors.f16` holds one float16 row per text and `keys.bin` the matching
+	16-byte text hashes, in the same order. Rows from earlier runs are
+	memory-mapped rather than read; rows added since live in memory too. A
+	row is written before its key, so after a crash a trailing vector without
+	a key is simply ignored.
+	"""
+
+	def __init__(self, directory: Path):
+		self.directory = directory
+		self._lock = threading.Lock()
+		# text key -> (chunk, row); chunk 0 is the memory-mapped file when it exists
+		self._rows: Dict[bytes, Tuple[int, int]] = {}
+		self._chunks: List[np.ndarray] = []
+		self.dim: Optional[int] = None
+		self._load()
+
+	def _load(self) -> None:
+		meta = self.directory / "meta.json"
+		keys = self.directory / "keys.bin"
+		vectors = self.directory / "vectors.f16"
+		if not meta.exists() or not keys.exists() or not vectors.exists():
+			return
+		self.dim = json.loads(meta.read_text())["dim"]
+		key_bytes = keys.read_bytes()
+		count = min(len(key_bytes) // _KEY_BYTES, vectors.stat().st_size // (2 * self.dim))
+		if count == 0:
+			return
+		self._chunks.append(np.memmap(vectors, dtype=np.float16, mode="r", shape=(count, self.dim)))
+		self._rows = {key_bytes[i * _KEY_BYTES:(i + 1) * _KEY_BYTES]: (0, i) for i in range(count)}
+
+	def get(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+		with self._lock:
+			found = {}
+			for k in keys:
+				where = self._rows.get(k)
+				if where is not None:
+					found[k] = self._chunks[where[0]][where[1]]
+			return found
+
+	def put(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+		if not len(keys):
+			return
+		rows = vectors.astype(np.float16)
+		with self._lock:
+			if self.dim is None:
+				self.dim = rows.shape[1]
+				self.directory.mkdir(parents=True, exist_ok=True)
+				(self.directory / "meta.json").write_text(json.dumps({"dim": self.dim}))
+			elif rows.shape[1] != self.dim:
+				_log.warning("Embedding size changed; not caching", extra={"cached_dim": self.dim, "dim": rows.shape[1]})
+				return
+			fresh = [i for i, k in enumerate(keys) if k not in self._rows]
+			if not fresh:
+				return
+			rows = rows[fresh]
+			with open(self.directory / "vectors.f16", "ab") as f:
+				f.write(rows.tobytes())
+			with open(self.directory / "keys.bin", "ab") as f:
+				f.write(b"".join(keys[i] for i in fresh))
+			self._chunks.append(rows)
+			chunk = len(self._chunks) - 1
+			for row, i in enumerate(fresh):
+				self._rows[keys[i]] = (chunk, row)
+
+
+class EmbeddingService:
+	"""Embeds texts through Ollama (`/api/embed`) or an OpenAI-compatible
+	`/embeddings` endpoint, reusing cached vectors for texts seen before."""
+
+	def __init__(self):
+		self.provider = settings.embedding_provider.lower()
+		self.model = settings.embedding_model
+		if self.provider == "ollama":
+			self.base_url = (settings.embedding_base_url or settings.ollama_base_url).rstrip("/")
+		else:
+			self.base_url = (settings.embedding_base_url or settings.openai_base_url).rstrip("/")
+		self.config = _config()
+		slug = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{self.provider}-{self.model}")
+		self.cache = EmbeddingCache(Path(settings.embedding_cache_dir) / slug)
+
+	def _request(self, texts: List[str]) -> List[List[float]]:
+		if self.provider == "ollama":
+			resp = requests.post(f"{self.base_url}/api/embed", json={"model": self.model, "input": texts}, timeout=call_timeout(120))
+			resp.raise_for_status()
+			return resp.json()["embeddings"]
+		headers = {}
+		api_key = settings.embedding_api_key or settings.openai_api_key
+		if api_key:
+			headers["Authorization"] = f"Bearer {api_key}"
+		resp = requests.post(f"{self.base_url}/embeddings", json={"model": self.model, "input": texts}, headers=headers, timeout=call_timeout(120))
+		resp.raise_for_status()
+		data = sorted(resp.json()["data"], key=lambda d: d.get("index", 0))
+		return [d["embedding"] for d in data]
+
+	def embed(self, texts: Sequence[str]) -> np.ndarray:
+		"""float32 matrix with one row per text."""
+		keys = [text_key(self.model, t) for t in texts]
+		cached = self.cache.get(keys)
+		missing = list(dict.fromkeys(k for k in keys if k not in cached))
+		metrics.inc("openresearch_embedding_cache_total", len(keys) - len(missing), help="Texts embedded by cache result", result="hit")
+		metrics.inc("openresearch_embedding_cache_total", len(missing), help="Texts embedded by cache result", result="miss")
+		if missing:
+			by_key = {k: t for k, t in zip(keys, texts)}
+			batch = settings.embedding_batch_size
+			for start in range(0, len(missing), batch):
+				chunk = missing[start:start + batch]
+				vectors = np.asarray(self._request([by_key[k] for k in chunk]), dtype=np.float32)
+				self.cache.put(chunk, vectors)
+				cached.update(zip(chunk, vectors))
+		return np.stack([np.asarray(cached[k], dtype=np.float32) for k in keys])
+
+
+def cosine_scores(query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+	"""Cosine similarity of one vector against each row of a matrix."""
+	norms = np.linalg.norm(candidates, axis=1) * np.linalg.norm(query)
+	return (candidates @ query) / np.maximum(norms, 1e-12)
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def _config() -> tuple:
+	return settings.embedding_provider.lower(), settings.embedding_model, settings.embedding_base_url
+
+
+def get_embedding_service() -> EmbeddingService:
+	"""Shared service, rebuilt when the embedding settings change."""
+	global _service
+	with _service_lock:
+		if _service is None or _service.config != _config():
+			_service = EmbeddingService()
+		return _service
+
+
+def rerank_steps(topic: str, clarifying_answers: Sequence[str], steps: List[SearchStepResult]) -> List[SearchStepResult]:
+	"""Reorder each step's hits by similarity to the topic and the user's clarifications.
+
+	The report prompt keeps the first few hits of every step, so this decides
+	which sources the report is written from.
+	"""
+	hits = [(i, j, h) for i, step in enumerate(steps) for j, h in enumerate(step.hits)]
+	if not hits:
+		return steps
+	intent = "\n".join([topic, *[a for a in clarifying_answers if a]])
+	texts = [intent] + [f"{h.title}\n{h.snippet or ''}" for _, _, h in hits]
+	vectors = get_embedding_service().embed(texts)
+	scores = cosine_scores(vectors[0], vectors[1:])
+
+	per_step: Dict[int, List[tuple]] = {}
+	for (i, j, h), score in zip(hits, scores):
+		per_step.setdefault(i, []).append((-float(score), j, h))
+	reranked = []
+	for i, step in enumerate(steps):
+		ordered = [h for _, _, h in sorted(per_step.get(i, []), key=lambda t: (t[0], t[1]))]
+		reranked.append(step.model_copy(update={"hits": ordered}))
+	return reranked
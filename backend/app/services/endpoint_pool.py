@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Set, TypeVar
+
+import requests
+
+from ..config import settings
+from ..logging_config import get_logger
+
+
+_log = get_logger("task")
+
+T = TypeVar("T")
+
+# Consecutive request failures after which an endpoint is drained until it passes a health check
+_MAX_CONSECUTIVE_FAILURES = 2
+
+
+def parse_urls(urls: str, fallback: str) -> List[str]:
+	"""Split a comma-separated URL list, falling back to a single URL."""
+	parsed = [u.strip().rstrip("/") for u in (urls or "").split(",") if u.strip()]
+	return parsed or [fallback.rstrip("/")]
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+	"""Errors that say something about the server rather than about the request."""
+	if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+		return True
+	if isinstance(exc, requests.HTTPError) and exc.response is not None:
+		return exc.response.status_code >= 500
+	return False
+
+
+class Endpoint:
+	def __init__(self, url: str):
+		self.url = url
+		self.healthy = True
+		self.outstanding = 0
+		self.failures = 0
+		self.loaded_models: Set[str] = set()
+		self.last_error: Optional[str] = None
+		self.last_checked: Optional[float] = None
+
+	def status(self) -> dict:
+		return {
+			"url": self.url,
+			"healthy": self.healthy,
+			"outstanding": self.outstanding,
+			"consecutive_failures": self.failures,
+			"loaded_models": sorted(self.loaded_models),
+			"last_error": self.last_error,
+		}
+
+
+class EndpointPool:
+	"""Routes requests across interchangeable inference servers.
+
+	Picks the healthy endpoint with the fewest outstanding requests, preferring
+	endpoints that already have the requested model loaded. Endpoints that fail
+	repeatedly are drained until the background health check sees them recover.
+	`probe(url)` returns the models currently loaded on a server (or raises).
+	"""
+
+	def __init__(self, name: str, urls: List[str], probe: Callable[[str], Set[str]]):
+		self.name = name
+		self.endpoints = [Endpoint(u) for u in urls]
+		self._probe = probe
+		self._lock = threading.Lock()
+		self._rr = itertools.count()
+		self._stopped = threading.Event()
+		self._checker: Optional[threading.Thread] = None
+
+	@property
+	def urls(self) -> List[str]:
+		return [e.url for e in self.endpoints]
+
+	def _ensure_checker(self) -> None:
+		# A single server has nothing to fail over to, so it is never probed
+		if self._checker is not None or len(self.endpoints) < 2:
+			return
+		self._checker = threading.Thread(target=self._check_loop, name=f"{self.name}-health", daemon=True)
+		self._checker.start()
+
+	def _check_loop(self) -> None:
+		while not self._stopped.is_set():
+			self.check_health()
+			self._stopped.wait(settings.endpoint_health_interval_seconds)
+
+	def check_health(self) -> None:
+		for endpoint in self.endpoints:
+			try:
+				loaded = self._probe(endpoint.url)
+			except Exception as e:
+				with self._lock:
+					if endpoint.healthy:
+						_log.warning("Endpoint drained", extra={"pool": self.name, "url": endpoint.url, "error": str(e)})
+					endpoint.healthy = False
+					endpoint.last_error = str(e)
+					endpoint.last_checked = time.time()
+				continue
+			with self._lock:
+				if not endpoint.healthy:
+					_log.info("Endpoint recovered", extra={"pool": self.name, "url": endpoint.url})
+				endpoint.healthy = True
+				endpoint.failures = 0
+				endpoint.loaded_models = set(loaded)
+				endpoint.last_checked = time.time()
+
+	def _choose(self, model: Optional[str]) -> Endpoint:
+		candidates = [e for e in self.endpoints if e.healthy]
+		if not candidates:
+			# Everything is drained: try whichever failed least rather than refusing outright
+			candidates = sorted(self.endpoints, key=lambda e: e.failures)[:1]
+		if model:
+			warm = [e for e in candidates if model in e.loaded_models]
+			if warm:
+				candidates = warm
+		least = min(e.outstanding for e in candidates)
+		tied = [e for e in candidates if e.outstanding == least]
+		return tied[next(self._rr) % len(tied)]
+
+	@contextmanager
+	def acquire(self, model: Optional[str] = None) -> Iterator[str]:
+		"""Reserve an endpoint for one request and yield its base URL."""
+		self._ensure_checker()
+		with self._lock:
+			endpoint = self._choose(model)
+			endpoint.outstanding += 1
+		try:
+			yield endpoint.url
+		except BaseException as e:
+			with self._lock:
+				endpoint.outstanding -= 1
+				if is_endpoint_failure(e):
+					endpoint.failures += 1
+					endpoint.last_error = str(e)
+					if endpoint.failures >= _MAX_CONSECUTIVE_FAILURES and len(self.endpoints) > 1:
+						endpoint.healthy = False
+						_log.warning("Endpoint drained", extra={"pool": self.name, "url": endpoint.url, "error": str(e)})
+			raise
+		else:
+			with self._lock:
+				endpoint.outstanding -= 1
+				endpoint.failures = 0
+				if model:
+					endpoint.loaded_models.add(model)
+
+	def call(self, model: Optional[str], fn: Callable[[str], T]) -> T:
+		"""Run `fn(base_url)` on a pooled endpoint.
+
+		Connection errors are retried on another endpoint, so `fn` must be safe
+		to run again from scratch; any other error is raised as-is.
+		"""
+		for attempt in range(len(self.endpoints)):
+			try:
+				with self.acquire(model) as base_url:
+					return fn(base_url)
+			except requests.ConnectionError:
+				if attempt == len(self.endpoints) - 1:
+					raise
+		raise RuntimeError("unreachable")
+
+	def status(self) -> List[dict]:
+		with self._lock:
+			return [e.status() for e in self.endpoints]
+
+	def close(self) -> None:
+		self._stopped.set()
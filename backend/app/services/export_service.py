@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import hashlib
+import html
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import markdown
+from fpdf import FPDF, TextStyle
+
+from ..config import settings
+from ..logging_config import get_logger
+from .metrics import metrics
+from .singleflight import SingleFlight
+
+
+_log = get_logger("report")
+
+# format -> (media type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+	"md": ("text/markdown; charset=utf-8", "md"),
+	"html": ("text/html; charset=utf-8", "html"),
+	"pdf": ("application/pdf", "pdf"),
+}
+
+# Bump when rendering changes so previously cached artifacts are not reused
+_RENDER_VERSION = 2
+
+_MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "sane_lists"]
+
+# (regular, bold, monospace) TrueType fonts tried for PDFs, in order
+_FONT_CANDIDATES = [
+	("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"),
+	("/usr/share/fonts/TTF/DejaVuSans.ttf", "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf", "/usr/share/fonts/TTF/DejaVuSansMono.ttf"),
+	("C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialbd.ttf", "C:/Windows/Fonts/consola.ttf"),
+	("/System/Library/Fonts/Supplemental/Arial.ttf", "/System/Library/Fonts/Supplemental/Arial Bold.ttf", "/System/Library/Fonts/Supplemental/Courier New.ttf"),
+]
+
+_HTML_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>{title}</title>
+  <style>
+    body {{ font-family: system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial,sans-serif; background:#0b1020; color:#e7ecff; margin:24px; }}
+    .markdown h1,.markdown h2,.markdown h3 {{ color:#dfe6ff; }}
+    .markdown h1 {{ font-size:28px; border-bottom:2px solid #3a4680; padding-bottom:8px; }}
+    .markdown h2 {{ font-size:24px; border-bottom:1px solid #2a3660; padding-bottom:6px; }}
+    .markdown p {{ line-height:1.6; }}
+    .markdown a {{ color:#8bb3ff; text-decoration:none; }}
+    .markdown a:hover {{ text-decoration:underline; }}
+    .markdown code {{ background:#0f1430; border:1px solid #2a3660; padding:2px 6px; border-radius:4px; }}
+    .markdown pre {{ background:#0f1430; border:1px solid #2a3660; border-radius:6px; padding:16px; overflow:auto; }}
+    .markdown table {{ width:100%; border-collapse:collapse; background:#141b34; border:1px solid #202a4a; border-radius:6px; overflow:hidden; }}
+    .markdown th,.markdown td {{ padding:12px 16px; border-bottom:1px solid #202a4a; }}
+    .markdown th {{ background:#1b2450; }}
+    .markdown blockquote {{ border-left:4px solid #4f6df5; padding:12px 16px; background:#141b34; border-radius:4px; }}
+  </style>
+</head>
+<body>
+  <article class="markdown">{body}</article>
+</body>
+</html>
+"""
+
+# Tags python-markdown emits for report markdown (minus <img>); anything else is raw HTML
+_PDF_TAGS = frozenset({
+	"p", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6", "a", "em", "strong", "b", "i", "code", "pre",
+	"ul", "ol", "li", "blockquote", "table", "thead", "tbody", "tr", "th", "td",
+})
+_TAG = re.compile(r"<!--.*?-->|</?([a-zA-Z][a-zA-Z0-9]*)\b[^>]*>", re.S)
+_IMG_ALT = re.compile(r"""\balt\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""")
+
+# Typographic characters the PDF core fonts (latin-1 only) cannot encode
+_LATIN1_FALLBACKS = str.maketrans({
+	"\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"',
+	"\u2013": "-", "\u2014": "--", "\u2026": "...", "\u2022": "*", "\u00a0": " ",
+})
+
+
+def slugify(text: str) -> str:
+	"""Download file name stem, matching the frontend's slugify()."""
+	slug = re.sub(r"[^a-z0-9\s-]", "", (text or "").lower())
+	slug = re.sub(r"-+", "-", re.sub(r"\s+", "-", slug))[:60]
+	return slug or "deep-research-report"
+
+
+def markdown_to_html(text: str) -> str:
+	return markdown.markdown(text, extensions=_MARKDOWN_EXTENSIONS)
+
+
+def render_html(topic: str, report_markdown: str) -> str:
+	return _HTML_TEMPLATE.format(title=html.escape(topic or "OpenResearch Report"), body=markdown_to_html(report_markdown))
+
+
+def _pdf_fonts() -> Optional[Tuple[str, str, str]]:
+	if settings.export_pdf_font:
+		regular = settings.export_pdf_font
+		return regular, settings.export_pdf_font_bold or regular, settings.export_pdf_font_mono or regular
+	for candidate in _FONT_CANDIDATES:
+		if os.path.exists(candidate[0]):
+			return tuple(path if os.path.exists(path) else candidate[0] for path in candidate)
+	return None
+
+
+def _pdf_safe_html(body: str) -> str:
+	"""Drop raw HTML and turn images into their alt text.
+
+	fpdf loads every <img src> while rendering, and report markdown comes from
+	the LLM and from web pages: it must not make the server fetch URLs or read
+	local files.
+	"""
+	def replace(match: re.Match) -> str:
+		tag = (match.group(1) or "").lower()
+		if tag in _PDF_TAGS:
+			return match.group(0)
+		if tag == "img":
+			alt = _IMG_ALT.search(match.group(0))
+			return alt.group(1).strip("\"'") if alt else ""
+		return ""
+
+	return _TAG.sub(replace, body)
+
+
+def render_pdf(topic: str, report_markdown: str) -> bytes:
+	"""Text-based PDF (selectable, searchable) rendered from the report markdown."""
+	body = _pdf_safe_html(markdown_to_html(report_markdown))
+	pdf = FPDF(format="A4")
+	pdf.set_title(topic or "OpenResearch Report")
+	pdf.set_creator("OpenResearch")
+	pdf.set_margins(15, 15, 15)
+	fonts = _pdf_fonts()
+	if fonts is not None:
+		regular, bold, mono = fonts
+		# Italic faces are rarely installed next to the regular ones: reuse upright
+		for style, path in (("", regular), ("B", bold), ("I", regular), ("BI", bold)):
+			pdf.add_font("report", style, path)
+		pdf.add_font("reportmono", "", mono)
+		family, mono_family = "report", "reportmono"
+	else:
+		# No Unicode font available: fall back to the built-in latin-1 fonts
+		body = body.translate(_LATIN1_FALLBACKS).encode("latin-1", "replace").decode("latin-1")
+		family, mono_family = "helvetica", "courier"
+	pdf.add_page()
+	pdf.set_font(family, size=11)
+	pdf.write_html(
+		body,
+		font_family=family,
+		tag_styles={"code": TextStyle(font_family=mono_family), "pre": TextStyle(font_family=mono_family)},
+	)
+	return bytes(pdf.output())
+
+
+class ExportCache:
+	"""Rendered exports on disk, keyed by a hash of the report content.
+
+	The same report exported twice (or by two users at once) is rendered
+	once; the oldest artifacts are removed beyond `export_cache_max_files`.
+	"""
+
+	def __init__(self, directory: Optional[str] = None):
+		self._directory = directory
+		self._lock = threading.Lock()
+		self._flights = SingleFlight("export")
+
+	@property
+	def directory(self) -> Path:
+		return Path(self._directory or settings.export_cache_dir)
+
+	@staticmethod
+	def key(topic: str, report_markdown: str) -> str:
+		content = f"{_RENDER_VERSION}\0{topic}\0{report_markdown}".encode("utf-8")
+		return hashlib.sha256(content).hexdigest()[:32]
+
+	def get(self, key: str, fmt: str, render: Callable[[], bytes]) -> Path:
+		"""Path of the cached artifact, rendering it first when missing."""
+		path = self.directory / f"{key}.{EXPORT_FORMATS[fmt][1]}"
+		if path.exists():
+			metrics.inc("openresearch_exports_total", help="Report exports by format and cache result", format=fmt, cache="hit")
+			try:
+				# Recently used artifacts survive eviction
+				os.utime(path)
+			except OSError:
+				pass
+			return path
+		return self._flights.do(f"{key}.{fmt}", lambda: self._render(path, fmt, render))[0]
+
+	def _render(self, path: Path, fmt: str, render: Callable[[], bytes]) -> Path:
+		if path.exists():
+			return path
+		metrics.inc("openresearch_exports_total", help="Report exports by format and cache result", format=fmt, cache="miss")
+		started = time.perf_counter()
+		data = render()
+		metrics.observe("openresearch_export_render_seconds", time.perf_counter() - started, help="Time to render a report export", format=fmt)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = path.with_suffix(path.suffix + ".tmp")
+		tmp.write_bytes(data)
+		os.replace(tmp, path)
+		self._evict()
+		return path
+
+	def _evict(self) -> None:
+		with self._lock:
+			try:
+				files = sorted(
+					(p for p in self.directory.iterdir() if p.suffix != ".tmp"),
+					key=lambda p: p.stat().st_mtime,
+				)
+				for p in files[: max(0, len(files) - settings.export_cache_max_files)]:
+					p.unlink(missing_ok=True)
+			except OSError as e:
+				_log.warning("Export cache cleanup failed", extra={"error": str(e)})
+
+
+exports = ExportCache()
+
+
+def export_report(topic: str, report_markdown: str, fmt: str) -> Tuple[Path, str]:
+	"""Render (or reuse) an export; returns the artifact path and its ETag."""
+	renderers = {
+		"md": lambda: report_markdown.encode("utf-8"),
+		"html": lambda: render_html(topic, report_markdown).encode("utf-8"),
+		"pdf": lambda: render_pdf(topic, report_markdown),
+	}
+	key = ExportCache.key(topic, report_markdown)
+	return exports.get(key, fmt, renderers[fmt]), f'"{key}-{fmt}"'
@@ -4,6 +4,9 @@ import requests
 from typing import Optional
 
 from ..config import settings
+from ..models.llm import LLMResult
+from .cancellation import call_timeout
+from .llm_common import StreamTimer, iter_sse_json
 
 
 class GeminiService:
@@ -19,30 +22,45 @@ class GeminiService:
         self.task_model = task_model or settings.gemini_task_model
         self.max_tokens = max_tokens or settings.gemini_max_tokens
 
-    def _generate(self, prompt: str, model: str) -> str:
+    def _generate(self, prompt: str, model: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
         if not self.api_key:
             raise ValueError("Gemini API key is required")
-        url = f"{self.base_url}/v1beta/models/{model}:generateContent?key={self.api_key}"
+        url = f"{self.base_url}/v1beta/models/{model}:streamGenerateContent?alt=sse&key={self.api_key}"
         headers = {"Content-Type": "application/json"}
         payload = {
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {"maxOutputTokens": self.max_tokens}
         }
-        resp = requests.post(url, json=payload, headers=headers, timeout=120)
-        resp.raise_for_status()
-        data = resp.json()
-        candidates = data.get("candidates", [])
-        if not candidates:
-            return ""
-        parts = candidates[0].get("content", {}).get("parts", [])
-        text = "".join(p.get("text", "") for p in parts)
-        return text.strip()
+        if schema:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = schema["schema"]
+        if system:
+            # Gemini caches repeated prefixes implicitly; keep the fixed instructions first
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+        timer = StreamTimer()
+        texts = []
+        usage = {}
+        with requests.post(url, json=payload, headers=headers, timeout=call_timeout(120), stream=True) as resp:
+            resp.raise_for_status()
+            for chunk in iter_sse_json(resp):
+                # usageMetadata is cumulative, the last chunk holds the totals
+                if chunk.get("usageMetadata"):
+                    usage = chunk["usageMetadata"]
+                candidates = chunk.get("candidates", [])
+                if not candidates:
+                    continue
+                parts = candidates[0].get("content", {}).get("parts", [])
+                text = "".join(p.get("text", "") for p in parts)
+                if text:
+                    timer.token(text)
+                    texts.append(text)
+        return LLMResult(
+            text="".join(texts).strip(),
+            usage=timer.usage("gemini", model, usage.get("promptTokenCount"), usage.get("candidatesTokenCount"), usage.get("cachedContentTokenCount")),
+        )
 
-    def think(self, prompt: str) -> str:
-        return self._generate(prompt, self.thinking_model)
+    def think(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._generate(prompt, self.thinking_model, system, schema)
 
-    def complete(self, prompt: str) -> str:
-        return self._generate(prompt, self.task_model)
-
-
-gemini = GeminiService()
+    def complete(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._generate(prompt, self.task_model, system, schema)
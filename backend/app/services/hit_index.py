@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from ..config import settings
+from ..logging_config import get_logger
+from ..models.research import SearchHit, parse_search_hits
+from .metrics import metrics
+from .search_common import match_expression, url_key
+
+
+_log = get_logger("search")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+	id INTEGER PRIMARY KEY,
+	url_key TEXT NOT NULL UNIQUE,
+	url TEXT NOT NULL,
+	title TEXT NOT NULL,
+	snippet TEXT,
+	content TEXT,
+	fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages(fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+	title, snippet, content,
+	content='pages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+	INSERT INTO pages_fts(rowid, title, snippet, content) VALUES (new.id, new.title, new.snippet, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+	INSERT INTO pages_fts(pages_fts, rowid, title, snippet, content) VALUES ('delete', old.id, old.title, old.snippet, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+	INSERT INTO pages_fts(pages_fts, rowid, title, snippet, content) VALUES ('delete', old.id, old.title, old.snippet, old.content);
+	INSERT INTO pages_fts(rowid, title, snippet, content) VALUES (new.id, new.title, new.snippet, new.content);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO pages (url_key, url, title, snippet, content, fetched_at) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(url_key) DO UPDATE SET
+	url = excluded.url,
+	title = excluded.title,
+	snippet = COALESCE(excluded.snippet, pages.snippet),
+	content = COALESCE(excluded.content, pages.content),
+	fetched_at = excluded.fetched_at
+"""
+
+# Title matches weigh more than snippet matches, which weigh more than page text
+_LOOKUP = """
+SELECT pages.url, pages.title, COALESCE(pages.snippet, substr(pages.content, 1, 400))
+FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid
+WHERE pages_fts MATCH ? AND pages.fetched_at >= ?
+ORDER BY bm25(pages_fts, 10.0, 3.0, 1.0)
+LIMIT ?
+"""
+
+
+class HitIndex:
+	"""Every search hit seen, in a local SQLite FTS5 index ranked by BM25.
+
+	Pages are keyed by canonical URL and carry the time they were last seen,
+	so a query can be answered locally when enough fresh matches exist. A
+	`content` column holds fetched page text when a caller has it.
+	"""
+
+	def __init__(self, path: Optional[str] = None):
+		self._path = path
+		self._lock = threading.Lock()
+		self._conn: Optional[sqlite3.Connection] = None
+		self._failed = False
+
+	@property
+	def enabled(self) -> bool:
+		return settings.hit_index_enabled and not self._failed
+
+	def _connect(self) -> Optional[sqlite3.Connection]:
+		# Called with the lock held
+		if self._conn is not None or self._failed:
+			return self._conn
+		path = Path(self._path or settings.hit_index_path)
+		try:
+			path.parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(str(path), check_same_thread=False)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.executescript(_SCHEMA)
+			cutoff = time.time() - settings.hit_index_retention_days * 86400
+			with conn:
+				conn.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,))
+		except sqlite3.Error as e:
+			# e.g. an SQLite build without FTS5: search keeps working without the index
+			_log.warning("Hit index unavailable", extra={"path": str(path), "error": str(e)})
+			self._failed = True
+			return None
+		self._conn = conn
+		return conn
+
+	def add(self, hits: Iterable[SearchHit], content: Optional[dict] = None, fetched_at: Optional[float] = None) -> None:
+		"""Insert or refresh hits; `content` optionally maps a hit URL to its page text."""
+		if not self.enabled:
+			return
+		now = time.time() if fetched_at is None else fetched_at
+		content = content or {}
+		rows = []
+		skipped = 0
+		for hit in hits:
+			# Web pages only: local documents are searched where they live
+			if hit.url.startswith(("http://", "https://")):
+				rows.append((url_key(hit), hit.url, hit.title, hit.snippet, content.get(hit.url), now))
+			else:
+				skipped += 1
+		if skipped:
+			metrics.inc("openresearch_hit_index_skipped_total", skipped, help="Hits not indexed because their URL is not an http(s) URL")
+			_log.debug("Hits without an http(s) URL not indexed", extra={"skipped": skipped})
+		if not rows:
+			return
+		with self._lock:
+			conn = self._connect()
+			if conn is None:
+				return
+			try:
+				with conn:
+					conn.executemany(_UPSERT, rows)
+			except sqlite3.Error as e:
+				_log.warning("Hit index write failed", extra={"error": str(e)})
+
+	def search(self, query: str, limit: int, max_age_seconds: float) -> List[SearchHit]:
+		"""Best local matches for `query` seen within `max_age_seconds`."""
+		expression = match_expression(query)
+		if not self.enabled or expression is None:
+			return []
+		with self._lock:
+			conn = self._connect()
+			if conn is None:
+				return []
+			try:
+				rows = conn.execute(_LOOKUP, (expression, time.time() - max_age_seconds, limit)).fetchall()
+			except sqlite3.Error as e:
+				_log.warning("Hit index lookup failed", extra={"error": str(e)})
+				return []
+		return parse_search_hits([{"title": title, "url": url, "snippet": snippet} for url, title, snippet in rows])
+
+	def lookup(self, query: str) -> List[SearchHit]:
+		"""Hits answering `query` locally, or [] when there are not enough fresh matches."""
+		if not self.enabled:
+			return []
+		hits = self.search(query, settings.hit_index_results, settings.hit_index_max_age_hours * 3600)
+		found = len(hits) >= settings.hit_index_min_hits
+		metrics.inc("openresearch_hit_index_lookups_total", help="Search queries answered from the local hit index (hit) or sent to the web (miss)", result="hit" if found else "miss")
+		return hits if found else []
+
+
+hit_index = HitIndex()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, Tuple
+
+import requests
+from pydantic import BaseModel
+
+from ..models.llm import LLMUsage
+from .cancellation import check_cancelled, watch_response
+
+
+# Receives the text deltas of LLM calls streamed by the current thread (see stream_to)
+_text_observer: ContextVar[Optional[Callable[[str], None]]] = ContextVar("llm_text_observer", default=None)
+
+
+@contextmanager
+def stream_to(observer: Callable[[str], None]) -> Iterator[None]:
+	"""Pass each streamed text delta of LLM calls made inside the block to `observer`."""
+	token = _text_observer.set(observer)
+	try:
+		yield
+	finally:
+		_text_observer.reset(token)
+
+
+class StreamTimer:
+	"""Measures time to first token and generation time of a streamed call,
+	and forwards the streamed text to the current observer, if any."""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.first_token: Optional[float] = None
+		self.finished: Optional[float] = None
+
+	def token(self, text: str = "") -> None:
+		if self.first_token is None:
+			self.first_token = time.perf_counter()
+		observer = _text_observer.get()
+		if observer is not None and text:
+			observer(text)
+
+	def usage(self, provider: str, model: str, input_tokens: Optional[int], output_tokens: Optional[int], cached_input_tokens: Optional[int] = None) -> LLMUsage:
+		self.finished = self.finished or time.perf_counter()
+		first = self.first_token or self.finished
+		return LLMUsage(
+			provider=provider,
+			model=model,
+			input_tokens=int(input_tokens or 0),
+			cached_input_tokens=int(cached_input_tokens or 0),
+			output_tokens=int(output_tokens or 0),
+			time_to_first_token_ms=(first - self.started) * 1000.0 if self.first_token else None,
+			generation_ms=(self.finished - first) * 1000.0,
+			total_ms=(self.finished - self.started) * 1000.0,
+		)
+
+
+def iter_sse_json(resp: requests.Response) -> Iterator[dict]:
+	"""Yield the decoded JSON payload of each `data:` line of a server-sent-events stream.
+
+	Stops with TaskCancelled as soon as the current task is cancelled.
+	"""
+	# text/event-stream usually comes without a charset and requests would guess latin-1
+	resp.encoding = "utf-8"
+	with watch_response(resp):
+		for line in resp.iter_lines(decode_unicode=True):
+			check_cancelled()
+			if not line or not line.startswith("data:"):
+				continue
+			data = line[5:].strip()
+			if data == "[DONE]":
+				return
+			try:
+				yield json.loads(data)
+			except ValueError:
+				continue
+
+
+def iter_ndjson(resp: requests.Response) -> Iterator[dict]:
+	"""Yield one JSON object per line (Ollama streaming format)."""
+	resp.encoding = "utf-8"
+	with watch_response(resp):
+		for line in resp.iter_lines(decode_unicode=True):
+			check_cancelled()
+			if not line:
+				continue
+			try:
+				yield json.loads(line)
+			except ValueError:
+				continue
+
+
+def chat_messages(prompt: str, system: Optional[str] = None) -> list[dict]:
+	"""Chat messages with the fixed system prefix first, so prefix caching can reuse it."""
+	messages = []
+	if system:
+		messages.append({"role": "system", "content": system})
+	messages.append({"role": "user", "content": prompt})
+	return messages
+
+
+def openai_cached_tokens(usage: dict) -> int:
+	"""Prompt-cache hits reported in an OpenAI-compatible usage block."""
+	details = usage.get("prompt_tokens_details") or {}
+	return int(details.get("cached_tokens") or 0)
+
+
+def collect_openai_stream(resp: requests.Response, timer: StreamTimer) -> Tuple[str, dict]:
+	"""Read an OpenAI-compatible chat completion stream into (text, usage)."""
+	parts: list[str] = []
+	usage: dict = {}
+	for chunk in iter_sse_json(resp):
+		if chunk.get("error"):
+			err = chunk["error"]
+			raise Exception(f"API error: {err.get('message', err) if isinstance(err, dict) else err}")
+		if chunk.get("usage"):
+			usage = chunk["usage"]
+		for choice in chunk.get("choices") or []:
+			content = (choice.get("delta") or {}).get("content")
+			if content:
+				timer.token(content)
+				parts.append(content)
+	return "".join(parts), usage
+
+
+def _schema_node(node: dict, defs: dict) -> dict:
+	if "$ref" in node:
+		return _schema_node(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+	if "anyOf" in node:
+		# Optional[X] is anyOf [X, null]: X, left out of "required"
+		options = [o for o in node["anyOf"] if o.get("type") != "null"]
+		out = _schema_node(options[0], defs) if len(options) == 1 else {"anyOf": [_schema_node(o, defs) for o in options]}
+	else:
+		out = {k: node[k] for k in ("type", "enum") if k in node}
+		if node.get("type") == "object":
+			out["properties"] = {name: _schema_node(prop, defs) for name, prop in node.get("properties", {}).items()}
+			out["required"] = list(node.get("required", []))
+		elif node.get("type") == "array":
+			out["items"] = _schema_node(node.get("items", {}), defs)
+	if node.get("description"):
+		out["description"] = node["description"]
+	return out
+
+
+def output_schema(model: type[BaseModel]) -> dict:
+	"""{"name", "schema"} for structured output shaped like `model`.
+
+	The schema sticks to the subset every provider accepts (Gemini's is the
+	smallest): no $refs, titles or defaults.
+	"""
+	schema = model.model_json_schema()
+	name = "".join("_" + c.lower() if c.isupper() else c for c in model.__name__).lstrip("_")
+	return {"name": name, "schema": _schema_node(schema, schema.get("$defs", {}))}
+
+
+def openai_response_format(schema: dict) -> dict:
+	"""`response_format` of an OpenAI-compatible chat completion request."""
+	return {"type": "json_schema", "json_schema": {"name": schema["name"], "schema": schema["schema"]}}
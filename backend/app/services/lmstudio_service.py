@@ -1,115 +1,91 @@
-import time
 import requests
-from typing import List
+from typing import List, Optional
 
 from ..config import settings
+from ..models.llm import LLMResult
+from .endpoint_pool import EndpointPool, parse_urls
+from .cancellation import call_timeout
+from .llm_common import StreamTimer, chat_messages, collect_openai_stream, openai_cached_tokens, openai_response_format
+from .model_catalog import model_catalog
+
+
+def _loaded_models(base_url: str) -> set[str]:
+    """Models currently loaded on an LMStudio server (health probe for the endpoint pool)."""
+    # LMStudio's native REST API reports load state; the OpenAI-compatible one does not
+    root = base_url[:-3] if base_url.endswith("/v1") else base_url
+    try:
+        resp = requests.get(f"{root}/api/v0/models", timeout=5)
+        resp.raise_for_status()
+        return {m["id"] for m in resp.json().get("data", []) if m.get("state") == "loaded" and m.get("id")}
+    except requests.HTTPError:
+        resp = requests.get(f"{base_url}/models", timeout=5)
+        resp.raise_for_status()
+        return set()
+
 
 class LMStudioService:
     """Service wrapper for a local LMStudio OpenAI-compatible API."""
     def __init__(self):
-        self._base_url = settings.lmstudio_base_url.rstrip('/')
+        urls = parse_urls(settings.lmstudio_base_urls, settings.lmstudio_base_url)
+        self.pool = EndpointPool("lmstudio", urls, probe=_loaded_models)
+        self.base_url = urls[0]
         self.thinking_model = settings.lmstudio_thinking_model
         self.task_model = settings.lmstudio_task_model
         self.max_tokens = settings.lmstudio_max_tokens
-        self._model_cache: dict[str, object] = {"ts": 0.0, "models": []}
-
-    @property
-    def base_url(self) -> str:
-        return self._base_url
-
-    @base_url.setter
-    def base_url(self, value: str) -> None:
-        self._base_url = (value or "").rstrip("/")
-        # Reset cache when base URL changes
-        self._model_cache = {"ts": 0.0, "models": []}
-
-    def list_models(self, force_refresh: bool = False) -> List[str]:
-        """Return LMStudio's available model identifiers."""
-        now = time.time()
-        cached = self._model_cache
-        if (not force_refresh) and cached["models"] and now - cached["ts"] < 60:
-            return cached["models"]  # type: ignore[index]
 
-        try:
-            resp = requests.get(f"{self.base_url}/models", timeout=10)
+    def fetch_models(self) -> List[str]:
+        """Return LMStudio's available model identifiers (cached by the model catalog)."""
+        with self.pool.acquire() as base_url:
+            resp = requests.get(f"{base_url}/models", timeout=10)
             resp.raise_for_status()
-            data = resp.json()
-            models: List[str] = []
-            if isinstance(data, dict):
-                if isinstance(data.get("data"), list):
-                    for item in data["data"]:
-                        if isinstance(item, dict) and item.get("id"):
-                            models.append(str(item["id"]))
-                elif isinstance(data.get("models"), list):
-                    for item in data["models"]:
-                        if isinstance(item, dict) and item.get("name"):
-                            models.append(str(item["name"]))
-                        elif isinstance(item, str):
-                            models.append(item)
-            elif isinstance(data, list):
-                models = [str(item) for item in data]
-            self._model_cache = {"ts": now, "models": models}
-            return models
-        except Exception:
-            # Keep previous cache (if any) and fall back to empty list
-            return cached.get("models", [])  # type: ignore[return-value]
-
-    @staticmethod
-    def _normalize(name: str) -> str:
-        return "".join(ch.lower() for ch in name if ch.isalnum())
-
-    def _resolve_model_name(self, requested: str) -> str:
-        if not requested:
-            return requested
-        available = self.list_models()
-        if not available:
-            return requested
-
-        requested_norm = self._normalize(requested)
-        # Prefer exact match
-        for candidate in available:
-            if candidate == requested:
-                return candidate
-        # Case-insensitive exact
-        for candidate in available:
-            if candidate.lower() == requested.lower():
-                return candidate
-        # Normalized (strip symbols/spaces)
-        for candidate in available:
-            if self._normalize(candidate) == requested_norm:
-                return candidate
-        # Substring containment (normalized)
-        for candidate in available:
-            if requested_norm in self._normalize(candidate):
-                return candidate
-        return requested
+        data = resp.json()
+        models: List[str] = []
+        if isinstance(data, dict):
+            if isinstance(data.get("data"), list):
+                for item in data["data"]:
+                    if isinstance(item, dict) and item.get("id"):
+                        models.append(str(item["id"]))
+            elif isinstance(data.get("models"), list):
+                for item in data["models"]:
+                    if isinstance(item, dict) and item.get("name"):
+                        models.append(str(item["name"]))
+                    elif isinstance(item, str):
+                        models.append(item)
+        elif isinstance(data, list):
+            models = [str(item) for item in data]
+        return models
 
-    def _chat(self, model: str, prompt: str) -> str:
-        resolved_model = self._resolve_model_name(model)
-        url = f"{self.base_url}/chat/completions"
+    def _chat(self, model: str, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        resolved_model = model_catalog.resolve("lmstudio", model)
         payload = {
             "model": resolved_model,
-            "messages": [
-                {"role": "system", "content": "You are a helpful research assistant."},
-                {"role": "user", "content": prompt},
-            ],
+            # A stable system prefix lets llama.cpp reuse its KV cache across calls
+            "messages": chat_messages(prompt, system or "You are a helpful research assistant."),
             "temperature": 0.7,
             "max_tokens": self.max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
         }
-        resp = requests.post(url, json=payload, timeout=600)
-        resp.raise_for_status()
-        data = resp.json()
-        # OpenAI style: data["choices"][0]["message"]["content"]
-        try:
-            return data["choices"][0]["message"]["content"].strip()
-        except Exception:
-            return str(data)
+        if schema:
+            payload["response_format"] = openai_response_format(schema)
+        timer = StreamTimer()
+
+        def run(base_url: str):
+            with requests.post(f"{base_url}/chat/completions", json=payload, timeout=call_timeout(600), stream=True) as resp:
+                resp.raise_for_status()
+                return collect_openai_stream(resp, timer)
 
-    def think(self, prompt: str) -> str:
-        return self._chat(self.thinking_model, prompt)
+        text, usage = self.pool.call(resolved_model, run)
+        return LLMResult(
+            text=text.strip(),
+            usage=timer.usage("lmstudio", resolved_model, usage.get("prompt_tokens"), usage.get("completion_tokens"), openai_cached_tokens(usage)),
+        )
 
-    def complete(self, prompt: str) -> str:
-        return self._chat(self.task_model, prompt)
+    def think(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._chat(self.thinking_model, prompt, system, schema)
 
+    def complete(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._chat(self.task_model, prompt, system, schema)
 
-lmstudio_client = LMStudioService()
+    def close(self) -> None:
+        self.pool.close()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from ..config import settings
+from ..logging_config import get_logger
+from ..models.research import SearchHit, parse_search_hits
+from .cancellation import call_timeout
+from .metrics import metrics
+from .search_common import match_expression
+
+try:
+	import pypdf
+except ImportError:  # optional: PDFs are skipped without it
+	pypdf = None
+
+
+_log = get_logger("search")
+
+TEXT_SUFFIXES = {".txt", ".text", ".md", ".markdown", ".rst"}
+HTML_SUFFIXES = {".html", ".htm"}
+
+# Files are (re)indexed in transactions of this many documents
+_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+	id INTEGER PRIMARY KEY,
+	path TEXT NOT NULL UNIQUE,
+	mtime REAL NOT NULL,
+	size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+	title, body, tokenize='porter unicode61'
+);
+"""
+
+# Title matches weigh more than body matches
+_SEARCH = """
+SELECT files.path, docs.title, snippet(docs, 1, '', '', '…', 40)
+FROM docs JOIN files ON files.id = docs.rowid
+WHERE docs MATCH ?
+ORDER BY bm25(docs, 5.0, 1.0)
+LIMIT ?
+"""
+
+
+def _read_text(path: Path) -> str:
+	return path.read_text(encoding="utf-8", errors="replace")
+
+
+def extract(path: Path) -> Optional[Tuple[str, str]]:
+	"""(title, text) of a supported file, or None when it cannot be read."""
+	suffix = path.suffix.lower()
+	if suffix in TEXT_SUFFIXES:
+		text = _read_text(path)
+		title = next((line.lstrip("#").strip() for line in text.splitlines() if line.strip()), "")
+	elif suffix in HTML_SUFFIXES:
+		soup = BeautifulSoup(_read_text(path), "html.parser")
+		title = soup.title.get_text(strip=True) if soup.title else ""
+		for tag in soup(["script", "style"]):
+			tag.decompose()
+		text = soup.get_text(" ", strip=True)
+	elif suffix == ".pdf" and pypdf is not None:
+		reader = pypdf.PdfReader(str(path))
+		text = "\n".join(page.extract_text() or "" for page in reader.pages)
+		title = (reader.metadata.title if reader.metadata else None) or ""
+	else:
+		return None
+	text = text[: settings.local_corpus_max_chars]
+	return (title[:200] or path.stem), text
+
+
+def supported(name: str) -> bool:
+	suffix = os.path.splitext(name)[1].lower()
+	return suffix in TEXT_SUFFIXES or suffix in HTML_SUFFIXES or (suffix == ".pdf" and pypdf is not None)
+
+
+class LocalCorpusIndex:
+	"""Inverted index (SQLite FTS5) over the documents of one directory.
+
+	The index file is read through a memory map (`PRAGMA mmap_size`), so a
+	cold query touches the pages it needs straight from the OS page cache
+	instead of copying them through read() calls. `sync()` reindexes only
+	files whose size or mtime changed and drops deleted ones.
+	"""
+
+	def __init__(self, directory: str, index_path: str):
+		self.directory = Path(directory).expanduser().resolve() if directory else None
+		self.index_path = Path(index_path)
+		self._read_lock = threading.Lock()
+		self._sync_lock = threading.Lock()
+		self._reader: Optional[sqlite3.Connection] = None
+		self.synced_at = 0.0
+		self.syncing = False
+		# Set once the first sync of this process has finished (or failed)
+		self.first_sync = threading.Event()
+
+	def _open(self) -> sqlite3.Connection:
+		self.index_path.parent.mkdir(parents=True, exist_ok=True)
+		conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		conn.execute(f"PRAGMA mmap_size={int(settings.local_corpus_mmap_mb) * 1024 * 1024}")
+		conn.executescript(_SCHEMA)
+		return conn
+
+	def _walk(self) -> Iterator[Tuple[str, float, int]]:
+		for root, dirs, files in os.walk(self.directory):
+			dirs[:] = [d for d in dirs if not d.startswith(".")]
+			for name in files:
+				if name.startswith(".") or not supported(name):
+					continue
+				path = os.path.join(root, name)
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				if st.st_size <= settings.local_corpus_max_file_mb * 1024 * 1024:
+					yield path, st.st_mtime, st.st_size
+
+	def sync(self) -> Dict[str, int]:
+		"""Bring the index up to date with the directory; returns change counts."""
+		counts = {"added": 0, "updated": 0, "removed": 0, "failed": 0}
+		if self.directory is None or not self.directory.is_dir():
+			return counts
+		with self._sync_lock:
+			started = time.perf_counter()
+			conn = self._open()
+			try:
+				known = {path: (file_id, mtime, size) for file_id, path, mtime, size in conn.execute("SELECT id, path, mtime, size FROM files")}
+				pending = []
+				for path, mtime, size in self._walk():
+					entry = known.pop(path, None)
+					if entry is None or entry[1] != mtime or entry[2] != size:
+						pending.append((path, mtime, size, entry[0] if entry else None))
+					if len(pending) >= _BATCH:
+						self._apply(conn, pending, counts)
+						pending = []
+				self._apply(conn, pending, counts)
+				# Whatever was not seen on disk is gone
+				stale = [(file_id,) for file_id, _, _ in known.values()]
+				with conn:
+					conn.executemany("DELETE FROM docs WHERE rowid = ?", stale)
+					conn.executemany("DELETE FROM files WHERE id = ?", stale)
+				counts["removed"] = len(stale)
+			finally:
+				conn.close()
+			self.synced_at = time.time()
+		metrics.observe("openresearch_local_corpus_sync_seconds", time.perf_counter() - started, help="Time to bring the local corpus index up to date")
+		_log.info("Local corpus synced", extra={"directory": str(self.directory), **counts, "seconds": round(time.perf_counter() - started, 2)})
+		return counts
+
+	def _apply(self, conn: sqlite3.Connection, pending: list, counts: Dict[str, int]) -> None:
+		docs = []
+		for path, mtime, size, file_id in pending:
+			try:
+				doc = extract(Path(path))
+			except Exception as e:
+				_log.debug("Skipping unreadable file", extra={"path": path, "error": str(e)})
+				counts["failed"] += 1
+				continue
+			if doc is not None:
+				docs.append((path, mtime, size, file_id, doc))
+		with conn:
+			for path, mtime, size, file_id, (title, text) in docs:
+				if file_id is None:
+					file_id = conn.execute("INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)", (path, mtime, size)).lastrowid
+					counts["added"] += 1
+				else:
+					conn.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?", (mtime, size, file_id))
+					conn.execute("DELETE FROM docs WHERE rowid = ?", (file_id,))
+					counts["updated"] += 1
+				conn.execute("INSERT INTO docs (rowid, title, body) VALUES (?, ?, ?)", (file_id, title, text))
+
+	def sync_in_background(self) -> None:
+		if self.syncing:
+			return
+		self.syncing = True
+
+		def run() -> None:
+			try:
+				self.sync()
+			except Exception as e:
+				_log.warning("Local corpus sync failed", extra={"directory": str(self.directory), "error": str(e)})
+			finally:
+				self.syncing = False
+				self.first_sync.set()
+
+		threading.Thread(target=run, daemon=True, name="local-corpus-sync").start()
+
+	def search(self, query: str, limit: int) -> List[SearchHit]:
+		expression = match_expression(query, require_all=False)
+		if expression is None or not self.index_path.exists():
+			return []
+		with self._read_lock:
+			if self._reader is None:
+				self._reader = self._open()
+			rows = self._reader.execute(_SEARCH, (expression, limit)).fetchall()
+		return parse_search_hits([
+			{"title": title, "url": Path(path).as_uri(), "snippet": re.sub(r"\s+", " ", snippet).strip()}
+			for path, title, snippet in rows
+		])
+
+
+class LocalCorpusService:
+	"""Search provider over the documents in `local_corpus_dir`.
+
+	The index is brought up to date in the background when the service is
+	created and again after `local_corpus_rescan_seconds`, so queries do not
+	wait for a directory scan; they see whatever is indexed so far. Only an
+	index built from scratch is waited for (briefly) before the first query.
+	"""
+
+	# Hits are local already: the web hit index neither caches nor answers them
+	local = True
+
+	def __init__(self):
+		self.index = LocalCorpusIndex(settings.local_corpus_dir, settings.local_corpus_index_path)
+		self._new_index = not self.index.index_path.exists()
+		if self.index.directory is None:
+			_log.warning("Local search selected but LOCAL_CORPUS_DIR is not set")
+		else:
+			self.index.sync_in_background()
+
+	def search(self, query: str, language: str | None = None, num_results: int | None = None) -> List[SearchHit]:
+		if self._new_index and self.index.directory is not None:
+			self.index.first_sync.wait(call_timeout(30))
+		if time.time() - self.index.synced_at > settings.local_corpus_rescan_seconds:
+			self.index.sync_in_background()
+		started = time.perf_counter()
+		hits = self.index.search(query, num_results or settings.local_corpus_results)
+		metrics.observe("openresearch_local_corpus_query_seconds", time.perf_counter() - started, help="Local corpus query latency")
+		return hits
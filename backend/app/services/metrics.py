@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Tuple
+
+from ..models.llm import LLMUsage
+
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(key: _LabelKey) -> str:
+	if not key:
+		return ""
+	escaped = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in key)
+	return "{" + escaped + "}"
+
+
+class MetricsRegistry:
+	"""Process-wide counters and summaries, rendered in Prometheus text format."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+		self._summaries: Dict[str, Dict[_LabelKey, Tuple[int, float]]] = {}
+		self._help: Dict[str, str] = {}
+
+	@staticmethod
+	def _key(labels: Dict[str, object]) -> _LabelKey:
+		return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+	def inc(self, name: str, value: float = 1.0, help: str = "", **labels) -> None:
+		key = self._key(labels)
+		with self._lock:
+			series = self._counters.setdefault(name, {})
+			series[key] = series.get(key, 0.0) + value
+			if help:
+				self._help.setdefault(name, help)
+
+	def observe(self, name: str, value: float, help: str = "", **labels) -> None:
+		key = self._key(labels)
+		with self._lock:
+			series = self._summaries.setdefault(name, {})
+			count, total = series.get(key, (0, 0.0))
+			series[key] = (count + 1, total + value)
+			if help:
+				self._help.setdefault(name, help)
+
+	def render_prometheus(self) -> str:
+		lines = []
+		with self._lock:
+			for name, series in sorted(self._counters.items()):
+				if name in self._help:
+					lines.append(f"# HELP {name} {self._help[name]}")
+				lines.append(f"# TYPE {name} counter")
+				for key, value in series.items():
+					lines.append(f"{name}{_format_labels(key)} {value:g}")
+			for name, series in sorted(self._summaries.items()):
+				if name in self._help:
+					lines.append(f"# HELP {name} {self._help[name]}")
+				lines.append(f"# TYPE {name} summary")
+				for key, (count, total) in series.items():
+					lines.append(f"{name}_count{_format_labels(key)} {count}")
+					lines.append(f"{name}_sum{_format_labels(key)} {total:g}")
+		return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def record_llm_usage(usage: LLMUsage) -> None:
+	if usage.coalesced:
+		# Already counted for the call that actually went upstream
+		return
+	labels = {"provider": usage.provider, "model": usage.model, "phase": usage.phase or "unknown"}
+	metrics.inc("openresearch_llm_calls_total", help="LLM calls", **labels)
+	metrics.inc("openresearch_llm_input_tokens_total", usage.input_tokens, help="Prompt tokens sent to LLMs", **labels)
+	metrics.inc("openresearch_llm_cached_input_tokens_total", usage.cached_input_tokens, help="Prompt tokens served from provider prompt caches", **labels)
+	metrics.inc("openresearch_llm_output_tokens_total", usage.output_tokens, help="Tokens generated by LLMs", **labels)
+	if usage.time_to_first_token_ms is not None:
+		metrics.observe("openresearch_llm_time_to_first_token_seconds", usage.time_to_first_token_ms / 1000.0, help="Latency until the first streamed token", **labels)
+	metrics.observe("openresearch_llm_generation_seconds", usage.generation_ms / 1000.0, help="Time from first to last token", **labels)
+	if usage.load_ms is not None:
+		metrics.observe("openresearch_llm_load_seconds", usage.load_ms / 1000.0, help="Model load time reported by the provider", **labels)
+	if usage.prompt_eval_ms is not None:
+		metrics.observe("openresearch_llm_prompt_eval_seconds", usage.prompt_eval_ms / 1000.0, help="Prompt evaluation time reported by the provider", **labels)
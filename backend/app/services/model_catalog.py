@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ..config import settings
+from ..logging_config import get_logger
+from .registry import llm_providers
+
+
+_log = get_logger("task")
+
+# Providers whose service implements fetch_models()
+CATALOG_PROVIDERS = ("ollama", "openrouter", "lmstudio", "openai", "groq", "mistral")
+
+
+def normalize_model_name(name: str) -> str:
+	return "".join(ch.lower() for ch in name if ch.isalnum())
+
+
+class _CatalogEntry:
+	"""Immutable model list plus the lookup tables derived from it."""
+
+	def __init__(self, models: List[str]):
+		self.models = list(models)
+		self.fetched_at = time.monotonic()
+		self.exact = frozenset(self.models)
+		self.by_lower: Dict[str, str] = {}
+		self.by_normalized: Dict[str, str] = {}
+		for model in self.models:
+			# First occurrence wins, matching the previous linear scans
+			self.by_lower.setdefault(model.lower(), model)
+			self.by_normalized.setdefault(normalize_model_name(model), model)
+		self._normalized = [(normalize_model_name(m), m) for m in self.models]
+		self._resolved: Dict[str, str] = {}
+
+	def resolve(self, requested: str) -> str:
+		if requested in self.exact:
+			return requested
+		hit = self.by_lower.get(requested.lower())
+		if hit is not None:
+			return hit
+		hit = self._resolved.get(requested)
+		if hit is not None:
+			return hit
+		requested_norm = normalize_model_name(requested)
+		hit = self.by_normalized.get(requested_norm)
+		if hit is None:
+			# Substring containment (normalized) is the only scan; memoized per name
+			hit = next((m for norm, m in self._normalized if requested_norm and requested_norm in norm), requested)
+		self._resolved[requested] = hit
+		return hit
+
+
+class ModelCatalog:
+	"""Per-provider model lists with stale-while-revalidate refresh.
+
+	Fresh entries are served directly. Entries older than the TTL are still
+	served while a single background thread refetches them; only a missing
+	entry (or one past the max staleness) is fetched on the caller's thread.
+	"""
+
+	def __init__(self):
+		self._entries: Dict[str, _CatalogEntry] = {}
+		self._refreshing: set[str] = set()
+		self._lock = threading.Lock()
+
+	def _fetch(self, provider: str) -> _CatalogEntry:
+		models = llm_providers.get(provider).fetch_models()
+		entry = _CatalogEntry(models)
+		with self._lock:
+			self._entries[provider] = entry
+		return entry
+
+	def _refresh_in_background(self, provider: str) -> None:
+		with self._lock:
+			if provider in self._refreshing:
+				return
+			self._refreshing.add(provider)
+
+		def run():
+			try:
+				self._fetch(provider)
+			except Exception as e:
+				_log.warning("Model catalog refresh failed", extra={"provider": provider, "error": str(e)})
+			finally:
+				with self._lock:
+					self._refreshing.discard(provider)
+
+		threading.Thread(target=run, name=f"catalog-refresh-{provider}", daemon=True).start()
+
+	def _entry(self, provider: str, force_refresh: bool = False) -> _CatalogEntry:
+		entry = self._entries.get(provider)
+		if entry is None or force_refresh:
+			return self._fetch(provider)
+		age = time.monotonic() - entry.fetched_at
+		if age > settings.catalog_max_stale_seconds:
+			try:
+				return self._fetch(provider)
+			except Exception:
+				return entry
+		if age > settings.catalog_ttl_seconds:
+			self._refresh_in_background(provider)
+		return entry
+
+	def list_models(self, provider: str, force_refresh: bool = False) -> List[str]:
+		"""Model identifiers for `provider`; raises only if nothing was ever fetched."""
+		return list(self._entry(provider, force_refresh).models)
+
+	def resolve(self, provider: str, requested: str) -> str:
+		"""Map a configured model name onto the provider's actual identifier."""
+		if not requested:
+			return requested
+		try:
+			entry = self._entry(provider)
+		except Exception:
+			return requested
+		if not entry.models:
+			return requested
+		return entry.resolve(requested)
+
+	def invalidate(self, provider: Optional[str] = None) -> None:
+		with self._lock:
+			if provider is None:
+				self._entries.clear()
+			else:
+				self._entries.pop(provider, None)
+
+
+model_catalog = ModelCatalog()
@@ -1,36 +1,155 @@
 from __future__ import annotations
 
+import threading
 import requests
-from typing import Optional
+from typing import Dict, List, Optional
 
 from ..config import settings
+from ..logging_config import get_logger
+from ..models.llm import LLMResult
+from .endpoint_pool import EndpointPool, parse_urls
+from .cancellation import call_timeout
+from .llm_common import StreamTimer, iter_ndjson
+
+
+_log = get_logger("task")
+
+_MIN_NUM_CTX = 2048
+
+
+def _loaded_models(base_url: str) -> set[str]:
+	# /api/ps lists the models currently held in memory by a server
+	resp = requests.get(f"{base_url}/api/ps", timeout=5)
+	resp.raise_for_status()
+	return {m["name"] for m in resp.json().get("models", []) if m.get("name")}
+
+
+def _ns_to_ms(value: Optional[int]) -> Optional[float]:
+	return value / 1_000_000 if value else None
 
 
 class OllamaService:
 	def __init__(self, base_url: Optional[str] = None, thinking_model: Optional[str] = None, task_model: Optional[str] = None):
-		self.base_url = (base_url or settings.ollama_base_url).rstrip("/")
+		urls = [base_url.rstrip("/")] if base_url else parse_urls(settings.ollama_base_urls, settings.ollama_base_url)
+		self.pool = EndpointPool("ollama", urls, probe=_loaded_models)
+		self.base_url = urls[0]
 		self.thinking_model = thinking_model or settings.ollama_thinking_model
 		self.task_model = task_model or settings.ollama_task_model
+		self.keep_alive = settings.ollama_keep_alive
+		self.max_tokens = settings.ollama_max_tokens
+		self.max_context = settings.ollama_max_context
+		# Ollama can continue a generation from the `context` it returned earlier
+		self.supports_context = settings.ollama_reuse_context
+		# num_ctx per model only ever grows: changing it forces Ollama to reload the model
+		self._num_ctx: Dict[str, int] = {}
+
+	def _options(self, model: str, prompt: str, context: Optional[List[int]]) -> dict:
+		# ~3 chars per token is a deliberately high estimate so prompts are not truncated
+		prompt_tokens = len(prompt) // 3 + len(context or []) + 1
+		needed = prompt_tokens + self.max_tokens
+		num_ctx = max(self._num_ctx.get(model, _MIN_NUM_CTX), _MIN_NUM_CTX)
+		while num_ctx < needed and num_ctx < self.max_context:
+			num_ctx *= 2
+		num_ctx = min(num_ctx, self.max_context)
+		self._num_ctx[model] = num_ctx
+		num_predict = max(256, min(self.max_tokens, num_ctx - prompt_tokens))
+		return {"num_ctx": num_ctx, "num_predict": num_predict}
 
-	def _generate(self, prompt: str, model: str, stream: bool = False) -> str:
-		url = f"{self.base_url}/api/generate"
+	def _generate(self, prompt: str, model: str, system: Optional[str] = None, context: Optional[List[int]] = None, schema: Optional[dict] = None) -> LLMResult:
+		if context and len(context) + len(prompt) // 3 + self.max_tokens > self.max_context:
+			# Continuing would overflow the context window; start fresh instead
+			context = None
 		payload = {
 			"model": model,
 			"prompt": prompt,
-			"stream": False if not stream else True,
+			"stream": True,
+			"keep_alive": self.keep_alive,
+			"options": self._options(model, (system or "") + prompt, context),
 		}
-		resp = requests.post(url, json=payload, timeout=120)
+		if system:
+			# Same system prefix on every call lets the runner reuse its KV cache
+			payload["system"] = system
+		if context:
+			payload["context"] = context
+		if schema:
+			# Constrains sampling to the JSON schema (Ollama 0.5+)
+			payload["format"] = schema["schema"]
+		timer = StreamTimer()
+		parts = []
+		final: dict = {}
+
+		def run(base_url: str) -> None:
+			parts.clear()
+			final.clear()
+			with requests.post(f"{base_url}/api/generate", json=payload, timeout=call_timeout(120), stream=True) as resp:
+				resp.raise_for_status()
+				# Ollama streams { 'response': '...' } lines; the last one has done=true and the counters
+				for chunk in iter_ndjson(resp):
+					if chunk.get("error"):
+						raise Exception(f"Ollama error: {chunk['error']}")
+					if chunk.get("response"):
+						timer.token(chunk["response"])
+						parts.append(chunk["response"])
+					if chunk.get("done"):
+						final.update(chunk)
+
+		self.pool.call(model, run)
+		usage = timer.usage("ollama", model, final.get("prompt_eval_count"), final.get("eval_count"))
+		# Prefer Ollama's own timings (nanoseconds) over wall-clock estimates
+		usage.load_ms = _ns_to_ms(final.get("load_duration"))
+		usage.prompt_eval_ms = _ns_to_ms(final.get("prompt_eval_duration"))
+		if final.get("eval_duration"):
+			usage.generation_ms = _ns_to_ms(final["eval_duration"])
+		return LLMResult(text="".join(parts).strip(), usage=usage, context=final.get("context"))
+
+	def think(self, prompt: str, system: Optional[str] = None, context: Optional[List[int]] = None, schema: Optional[dict] = None) -> LLMResult:
+		return self._generate(prompt, model=self.thinking_model, system=system, context=context, schema=schema)
+
+	def complete(self, prompt: str, system: Optional[str] = None, context: Optional[List[int]] = None, schema: Optional[dict] = None) -> LLMResult:
+		return self._generate(prompt, model=self.task_model, system=system, context=context, schema=schema)
+
+	def _load(self, base_url: str, model: str, keep_alive) -> None:
+		# A generate request without a prompt only loads (or with keep_alive=0 unloads) the model
+		resp = requests.post(f"{base_url}/api/generate", json={"model": model, "keep_alive": keep_alive}, timeout=300)
 		resp.raise_for_status()
-		data = resp.json()
-		# Ollama returns { 'response': '...' }
-		return data.get("response", "").strip()
 
-	def think(self, prompt: str) -> str:
-		return self._generate(prompt, model=self.thinking_model)
+	def preload(self, models: Optional[List[str]] = None) -> None:
+		"""Load models into memory on every server ahead of the first call (thinking model by default)."""
+		for model in models or [self.thinking_model]:
+			for base_url in self.pool.urls:
+				try:
+					self._load(base_url, model, self.keep_alive)
+					_log.info("Ollama model preloaded", extra={"model": model, "url": base_url})
+				except Exception as e:
+					_log.warning("Ollama preload failed", extra={"model": model, "url": base_url, "error": str(e)})
+
+	def warm(self, kind: str) -> None:
+		"""Prepare for the next phase in the background ("think" or "complete").
+
+		Loads the model the phase will use and, when configured, unloads the
+		other one so thinking and task models don't compete for VRAM.
+		"""
+		model, other = (self.task_model, self.thinking_model) if kind == "complete" else (self.thinking_model, self.task_model)
+
+		def run():
+			self.preload([model])
+			if settings.ollama_release_idle_models and other != model:
+				for base_url in self.pool.urls:
+					try:
+						self._load(base_url, other, 0)
+					except Exception as e:
+						_log.warning("Ollama unload failed", extra={"model": other, "url": base_url, "error": str(e)})
 
-	def complete(self, prompt: str) -> str:
-		return self._generate(prompt, model=self.task_model)
+		threading.Thread(target=run, name="ollama-warm", daemon=True).start()
 
+	def preload_in_background(self) -> None:
+		threading.Thread(target=self.preload, name="ollama-preload", daemon=True).start()
 
-ollama = OllamaService()
+	def fetch_models(self) -> list[str]:
+		with self.pool.acquire() as base_url:
+			resp = requests.get(f"{base_url}/api/tags", timeout=10)
+			resp.raise_for_status()
+		return [model["name"] for model in resp.json().get("models", [])]
 
+	def close(self) -> None:
+		self.pool.close()
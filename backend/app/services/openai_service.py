@@ -4,6 +4,9 @@ import requests
 from typing import Optional
 
 from ..config import settings
+from ..models.llm import LLMResult
+from .cancellation import call_timeout
+from .llm_common import StreamTimer, chat_messages, collect_openai_stream, openai_cached_tokens, openai_response_format
 
 
 class OpenAIService:
@@ -19,7 +22,7 @@ class OpenAIService:
         self.task_model = task_model or settings.openai_task_model
         self.max_tokens = max_tokens or settings.openai_max_tokens
 
-    def _generate(self, prompt: str, model: str) -> str:
+    def _generate(self, prompt: str, model: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         url = f"{self.base_url}/chat/completions"
@@ -29,20 +32,34 @@ class OpenAIService:
         }
         payload = {
             "model": model,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": chat_messages(prompt, system),
             "temperature": 0.7,
             "max_tokens": self.max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
         }
-        resp = requests.post(url, json=payload, headers=headers, timeout=120)
-        resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
-
-    def think(self, prompt: str) -> str:
-        return self._generate(prompt, self.thinking_model)
+        if schema:
+            payload["response_format"] = openai_response_format(schema)
+        timer = StreamTimer()
+        with requests.post(url, json=payload, headers=headers, timeout=call_timeout(120), stream=True) as resp:
+            resp.raise_for_status()
+            text, usage = collect_openai_stream(resp, timer)
+        return LLMResult(
+            text=text.strip(),
+            usage=timer.usage("openai", model, usage.get("prompt_tokens"), usage.get("completion_tokens"), openai_cached_tokens(usage)),
+        )
 
-    def complete(self, prompt: str) -> str:
-        return self._generate(prompt, self.task_model)
+    def think(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._generate(prompt, self.thinking_model, system, schema)
 
+    def complete(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
+        return self._generate(prompt, self.task_model, system, schema)
 
-openai_client = OpenAIService()
+    def fetch_models(self) -> list[str]:
+        """List model ids from the OpenAI-compatible /models endpoint."""
+        if not self.api_key:
+            return []
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        resp = requests.get(f"{self.base_url}/models", headers=headers, timeout=30)
+        resp.raise_for_status()
+        return [model["id"] for model in resp.json().get("data", []) if model.get("id")]
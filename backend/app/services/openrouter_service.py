@@ -4,6 +4,9 @@ import requests
 from typing import Optional
 
 from ..config import settings
+from ..models.llm import LLMResult
+from .cancellation import TaskCancelled, call_timeout
+from .llm_common import StreamTimer, chat_messages, collect_openai_stream, openai_cached_tokens, openai_response_format
 
 
 class OpenRouterService:
@@ -14,7 +17,7 @@ class OpenRouterService:
         self.task_model = task_model or settings.openrouter_task_model
         self.max_tokens = max_tokens or settings.openrouter_max_tokens
 
-    def _generate(self, prompt: str, model: str) -> str:
+    def _generate(self, prompt: str, model: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
         """Generate text using OpenRouter API (OpenAI-compatible)"""
         if not self.api_key:
             raise ValueError("OpenRouter API key is required")
@@ -29,45 +32,52 @@ class OpenRouterService:
         
         payload = {
             "model": model,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
+            "messages": chat_messages(prompt, system),
             "temperature": 0.7,
-            "max_tokens": self.max_tokens
+            "max_tokens": self.max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
         }
+        if schema:
+            payload["response_format"] = openai_response_format(schema)
         
-        resp = requests.post(url, json=payload, headers=headers, timeout=120)
-        resp.raise_for_status()
-        data = resp.json()
+        if system and model.startswith("anthropic/"):
+            # Anthropic models behind OpenRouter only cache explicitly marked blocks
+            payload["messages"][0]["content"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
         
-        if "error" in data:
-            raise Exception(f"OpenRouter API error: {data['error']['message']}")
+        timer = StreamTimer()
+        with requests.post(url, json=payload, headers=headers, timeout=call_timeout(120), stream=True) as resp:
+            resp.raise_for_status()
+            try:
+                text, usage = collect_openai_stream(resp, timer)
+            except TaskCancelled:
+                raise
+            except Exception as e:
+                raise Exception(f"OpenRouter {e}") from e
         
-        return data["choices"][0]["message"]["content"].strip()
+        return LLMResult(
+            text=text.strip(),
+            usage=timer.usage("openrouter", model, usage.get("prompt_tokens"), usage.get("completion_tokens"), openai_cached_tokens(usage)),
+        )
 
-    def think(self, prompt: str) -> str:
+    def think(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
         """Use thinking model for planning and reasoning"""
-        return self._generate(prompt, model=self.thinking_model)
+        return self._generate(prompt, model=self.thinking_model, system=system, schema=schema)
 
-    def complete(self, prompt: str) -> str:
+    def complete(self, prompt: str, system: Optional[str] = None, schema: Optional[dict] = None) -> LLMResult:
         """Use task model for completion and writing"""
-        return self._generate(prompt, model=self.task_model)
+        return self._generate(prompt, model=self.task_model, system=system, schema=schema)
 
-    def get_models(self) -> list[str]:
-        """Get available models from OpenRouter"""
+    def fetch_models(self) -> list[str]:
+        """Get available models from OpenRouter (cached by the model catalog)"""
         if not self.api_key:
             return []
         
-        try:
-            url = f"{self.base_url}/models"
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-            resp = requests.get(url, headers=headers, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            return [model["id"] for model in data.get("data", [])]
-        except Exception:
-            return []
-
-
-# Global instance
-openrouter = OpenRouterService()
\ No newline at end of file
+        url = f"{self.base_url}/models"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        resp = requests.get(url, headers=headers, timeout=30)
+        resp.raise_for_status()
+        data = resp.json()
+        return [model["id"] for model in data.get("data", [])]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from typing import List
+
+from ..models.research import SearchQuery
+
+
+class PlanStreamParser:
+	"""Pulls search queries out of a planner response while it is still streaming.
+
+	Text is fed as it arrives; every JSON object that closes and has a
+	"query" string is returned once, whatever surrounds it (prose, code
+	fences, an unfinished outer object). Text inside <think> blocks is
+	ignored: reasoning models draft queries there that they may not keep.
+	"""
+
+	def __init__(self, limit: int = 6):
+		self.limit = limit
+		self.queries: List[SearchQuery] = []
+		self._seen: set = set()
+		self._buffer: List[str] = []
+		self._starts: List[int] = []
+		self._pos = 0
+		self._in_string = False
+		self._escaped = False
+		self._in_think = False
+		self._tail = ""
+
+	def feed(self, text: str) -> List[SearchQuery]:
+		"""Consume a chunk of the response; returns the queries completed by it."""
+		found: List[SearchQuery] = []
+		for ch in text:
+			self._buffer.append(ch)
+			self._tail = (self._tail + ch)[-8:]
+			pos = self._pos
+			self._pos += 1
+			if self._in_think:
+				if self._tail.endswith("</think>"):
+					self._in_think = False
+				continue
+			if self._in_string:
+				if self._escaped:
+					self._escaped = False
+				elif ch == "\\":
+					self._escaped = True
+				elif ch == '"':
+					self._in_string = False
+				continue
+			if ch == '"':
+				self._in_string = True
+			elif ch == "{":
+				self._starts.append(pos)
+			elif ch == "}" and self._starts:
+				query = self._query_at(self._starts.pop(), pos)
+				if query is not None:
+					found.append(query)
+			elif ch == ">" and self._tail.endswith("<think>"):
+				self._in_think = True
+				self._starts.clear()
+		return found
+
+	def _query_at(self, start: int, end: int) -> SearchQuery | None:
+		if len(self.queries) >= self.limit:
+			return None
+		try:
+			obj = json.loads("".join(self._buffer[start:end + 1]))
+		except ValueError:
+			return None
+		if not isinstance(obj, dict) or not isinstance(obj.get("query"), str) or not obj["query"].strip():
+			return None
+		key = " ".join(obj["query"].lower().split())
+		if key in self._seen:
+			return None
+		self._seen.add(key)
+		rationale = obj.get("rationale")
+		query = SearchQuery(query=obj["query"].strip(), rationale=rationale if isinstance(rationale, str) else None)
+		self.queries.append(query)
+		return query
+
+
+def parse_plan_queries(text: str, limit: int = 6) -> List[SearchQuery]:
+	"""Every complete query object in `text`, e.g. from a truncated or malformed plan."""
+	parser = PlanStreamParser(limit)
+	parser.feed(text)
+	return parser.queries
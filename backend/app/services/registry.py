@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+
+
+class ProviderRegistry:
+	"""Providers registered by name and imported/constructed on first use.
+
+	Each provider is registered as a "module:attribute" path to a zero-argument
+	factory (usually the service class), so nothing is imported until the
+	provider is actually selected. `invalidate` drops a single instance so the
+	next `get` rebuilds it from the current settings.
+	"""
+
+	def __init__(self, kind: str, default: str):
+		self.kind = kind
+		self.default = default
+		self._factories: Dict[str, str] = {}
+		self._instances: Dict[str, Any] = {}
+		self._lock = threading.Lock()
+
+	def register(self, name: str, factory_path: str) -> None:
+		with self._lock:
+			self._factories[name.lower()] = factory_path
+			self._instances.pop(name.lower(), None)
+
+	def __contains__(self, name: str) -> bool:
+		return name.lower() in self._factories
+
+	def names(self) -> List[str]:
+		return list(self._factories)
+
+	def loaded(self) -> List[str]:
+		return list(self._instances)
+
+	def get(self, name: Optional[str] = None) -> Any:
+		key = (name or "").lower()
+		if key not in self._factories:
+			key = self.default
+		instance = self._instances.get(key)
+		if instance is not None:
+			return instance
+		with self._lock:
+			instance = self._instances.get(key)
+			if instance is None:
+				module_path, _, attr = self._factories[key].partition(":")
+				factory = getattr(importlib.import_module(module_path), attr)
+				instance = factory()
+				self._instances[key] = instance
+			return instance
+
+	def invalidate(self, name: str) -> None:
+		with self._lock:
+			instance = self._instances.pop(name.lower(), None)
+		# Stop background work (e.g. endpoint health checks) of the replaced client
+		if instance is not None and hasattr(instance, "close"):
+			instance.close()
+
+
+llm_providers = ProviderRegistry("llm", default="openrouter")
+llm_providers.register("ollama", f"{__package__}.ollama_service:OllamaService")
+llm_providers.register("openrouter", f"{__package__}.openrouter_service:OpenRouterService")
+llm_providers.register("openai", f"{__package__}.openai_service:OpenAIService")
+llm_providers.register("anthropic", f"{__package__}.anthropic_service:AnthropicService")
+llm_providers.register("gemini", f"{__package__}.gemini_service:GeminiService")
+llm_providers.register("mistral", f"{__package__}.mistral_service:MistralService")
+llm_providers.register("groq", f"{__package__}.groq_service:GroqService")
+llm_providers.register("lmstudio", f"{__package__}.lmstudio_service:LMStudioService")
+
+search_providers = ProviderRegistry("search", default="searxng")
+search_providers.register("searxng", f"{__package__}.searxng_service:SearxNGService")
+search_providers.register("duckduckgo", f"{__package__}.duckduckgo_service:DuckDuckGoService")
+search_providers.register("local", f"{__package__}.local_corpus_service:LocalCorpusService")
+search_providers.register("aggregate", f"{__package__}.aggregate_search_service:AggregateSearchService")
+
+
+def get_llm_service():
+	"""Get the LLM service selected in the settings (openrouter if unknown)."""
+	return llm_providers.get(settings.llm_provider)
+
+
+def get_search_service():
+	"""Get the search service selected in the settings (searxng if unknown)."""
+	return search_providers.get(settings.search_provider)
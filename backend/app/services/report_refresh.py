@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Tuple
+
+from ..models.research import SearchHit, SearchStepResult
+from .search_common import url_key
+
+
+_HEADING = re.compile(r"^##\s+(.+?)\s*#*\s*$")
+
+
+def diff_steps(old: List[SearchStepResult], new: List[SearchStepResult], top: int) -> Tuple[Dict[str, List[SearchHit]], List[str]]:
+	"""Sources that entered and left the top hits of each query.
+
+	Returns (new hits by query, URLs no longer among any query's top hits).
+	Only the first `top` hits count: the report is written from those.
+	"""
+	before = {s.query: {url_key(h): h for h in s.hits[:top]} for s in old}
+	seen_before = {k for hits in before.values() for k in hits}
+	seen_now = set()
+	added: Dict[str, List[SearchHit]] = {}
+	for step in new:
+		previous = before.get(step.query, {})
+		for hit in step.hits[:top]:
+			key = url_key(hit)
+			seen_now.add(key)
+			# A source that merely moved to another query is not new material
+			if key not in previous and key not in seen_before:
+				added.setdefault(step.query, []).append(hit)
+	dropped = [h.url for hits in before.values() for k, h in hits.items() if k not in seen_now]
+	return added, list(dict.fromkeys(dropped))
+
+
+def split_sections(markdown: str) -> Tuple[str, List[Tuple[str, str]]]:
+	"""(text before the first `##` heading, [(heading, section text including the heading)])."""
+	preamble: List[str] = []
+	sections: List[Tuple[str, List[str]]] = []
+	fenced = False
+	for line in markdown.splitlines(keepends=True):
+		if line.lstrip().startswith("```"):
+			fenced = not fenced
+		match = None if fenced else _HEADING.match(line.rstrip("\n"))
+		if match:
+			sections.append((match.group(1), [line]))
+		elif sections:
+			sections[-1][1].append(line)
+		else:
+			preamble.append(line)
+	return "".join(preamble), [(heading, "".join(lines)) for heading, lines in sections]
+
+
+def _norm(heading: str) -> str:
+	return " ".join(re.findall(r"\w+", heading.lower()))
+
+
+def merge_sections(report: str, updates: str) -> Tuple[str, List[str]]:
+	"""Replace the report's sections with same-titled ones from `updates`.
+
+	Sections without a counterpart are inserted before the Sources section
+	(or appended). Returns the merged report and the headings that changed.
+	"""
+	preamble, sections = split_sections(report)
+	_, replacements = split_sections(updates)
+	changed: List[str] = []
+	index = {_norm(heading): i for i, (heading, _) in enumerate(sections)}
+	extra: List[Tuple[str, str]] = []
+	for heading, text in replacements:
+		text = text.rstrip() + "\n\n"
+		i = index.get(_norm(heading))
+		if i is None:
+			extra.append((heading, text))
+		elif sections[i][1].strip() != text.strip():
+			sections[i] = (sections[i][0], text)
+		else:
+			continue
+		changed.append(heading)
+	if extra:
+		at = next((i for i, (heading, _) in enumerate(sections) if _norm(heading) in ("sources", "references")), len(sections))
+		sections[at:at] = extra
+	return (preamble + "".join(text for _, text in sections)).rstrip() + "\n", changed
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from ..config import settings
+from ..logging_config import get_logger
+from ..models.research import CachedResearch, ResearchProgress
+from .search_common import terms_of
+
+
+_log = get_logger("plan")
+
+
+def normalize_query(query: str) -> str:
+	return " ".join(query.lower().split())
+
+
+def fingerprint(topic: str, depth: str, clarifying_answers: Sequence[str]) -> str:
+	"""Exact-match key: same words in the same order, ignoring case, spacing and punctuation."""
+	parts = [" ".join(terms_of(topic)), depth.lower(), *(" ".join(terms_of(a)) for a in clarifying_answers if a)]
+	return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _terms(topic: str, clarifying_answers: Sequence[str]) -> FrozenSet[str]:
+	return frozenset(terms_of(" ".join([topic, *clarifying_answers])))
+
+
+class ResearchCache:
+	"""Completed research (request, plan and search results), one JSON file per task.
+
+	New requests are matched against it by fingerprint first and then by word
+	overlap (Jaccard similarity of topic plus clarifications, same depth).
+	"""
+
+	def __init__(self, directory: Optional[str] = None):
+		self._directory = directory
+		self._lock = threading.Lock()
+		self._entries: Optional[Dict[str, CachedResearch]] = None
+		# task_id -> (fingerprint, terms), precomputed for matching
+		self._keys: Dict[str, Tuple[str, FrozenSet[str]]] = {}
+
+	@property
+	def enabled(self) -> bool:
+		return settings.research_reuse_enabled
+
+	@property
+	def directory(self) -> Path:
+		return Path(self._directory or settings.research_reuse_dir)
+
+	def _index(self, entry: CachedResearch) -> None:
+		self._entries[entry.task_id] = entry
+		self._keys[entry.task_id] = (
+			fingerprint(entry.topic, entry.depth, entry.clarifying_answers),
+			_terms(entry.topic, entry.clarifying_answers),
+		)
+
+	def _load(self) -> Dict[str, CachedResearch]:
+		# Called with the lock held
+		if self._entries is not None:
+			return self._entries
+		self._entries = {}
+		if self.directory.is_dir():
+			for path in self.directory.glob("*.json"):
+				try:
+					self._index(CachedResearch.model_validate_json(path.read_text(encoding="utf-8")))
+				except (OSError, ValidationError) as e:
+					_log.warning("Unreadable research cache entry", extra={"path": str(path), "error": str(e)})
+		return self._entries
+
+	def add(self, progress: ResearchProgress) -> None:
+		"""Remember a completed task."""
+		if not self.enabled or not progress.plan or not progress.steps:
+			return
+		entry = CachedResearch(
+			task_id=progress.task_id,
+			topic=progress.topic or progress.plan.topic,
+			depth=progress.depth,
+			clarifying_answers=progress.clarifying_answers or [],
+			completed_at=datetime.utcnow(),
+			plan=progress.plan,
+			steps=progress.steps,
+		)
+		with self._lock:
+			entries = self._load()
+			try:
+				self.directory.mkdir(parents=True, exist_ok=True)
+				path = self.directory / f"{entry.task_id}.json"
+				tmp = path.with_suffix(".tmp")
+				tmp.write_text(entry.model_dump_json(), encoding="utf-8")
+				os.replace(tmp, path)
+			except OSError as e:
+				_log.warning("Research cache write failed", extra={"error": str(e)})
+				return
+			self._index(entry)
+			for old in sorted(entries.values(), key=lambda e: e.completed_at)[: max(0, len(entries) - settings.research_reuse_max_entries)]:
+				self._forget(old.task_id)
+
+	def _forget(self, task_id: str) -> None:
+		self._entries.pop(task_id, None)
+		self._keys.pop(task_id, None)
+		try:
+			(self.directory / f"{task_id}.json").unlink()
+		except OSError:
+			pass
+
+	def get(self, task_id: str) -> Optional[CachedResearch]:
+		with self._lock:
+			return self._load().get(task_id)
+
+	def match(self, topic: str, depth: str, clarifying_answers: Sequence[str]) -> Optional[Tuple[CachedResearch, float]]:
+		"""Most similar completed task within the reuse window, with its similarity (1.0 = exact)."""
+		if not self.enabled:
+			return None
+		key = fingerprint(topic, depth, clarifying_answers)
+		terms = _terms(topic, clarifying_answers)
+		cutoff = datetime.utcnow() - timedelta(hours=settings.research_reuse_max_age_hours)
+		best: Optional[Tuple[CachedResearch, float]] = None
+		with self._lock:
+			entries = self._load()
+			for task_id, (entry_key, entry_terms) in self._keys.items():
+				entry = entries[task_id]
+				if entry.completed_at < cutoff or entry.depth != depth:
+					continue
+				if entry_key == key:
+					similarity = 1.0
+				elif terms and entry_terms:
+					similarity = len(terms & entry_terms) / len(terms | entry_terms)
+				else:
+					continue
+				if similarity >= settings.research_reuse_similarity and (best is None or (similarity, entry.completed_at) > (best[1], best[0].completed_at)):
+					best = (entry, similarity)
+		return best
+
+	def reusable_searches(self, task_id: str) -> Dict[str, List]:
+		"""Hits of a cached task by normalized query, if its searches are still fresh."""
+		entry = self.get(task_id)
+		if entry is None or datetime.utcnow() - entry.completed_at > timedelta(hours=settings.research_reuse_search_ttl_hours):
+			return {}
+		return {normalize_query(step.query): step.hits for step in entry.steps}
+
+
+research_cache = ResearchCache()
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import contextvars
+import json
 import threading
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict
+from typing import Callable, Dict, Iterator, TypeVar
+
+import requests
 
 from ..models.research import (
 	ResearchRequest,
@@ -11,91 +18,297 @@ from ..models.research import (
 	SearchPlan,
 	SearchQuery,
 	SearchStepResult,
+	SearchHit,
+	ResearchDebug,
 	QueryConfirmation,
 	ClarifyingQuestions,
 	ClarifyingQuestion,
 	ClarificationResponse,
+	ResearchReuse,
+	ResearchRefresh,
 )
-from .ollama_service import ollama
-from .openrouter_service import openrouter
-from .openai_service import openai_client
-from .anthropic_service import anthropic
-from .gemini_service import gemini
-from .mistral_service import mistral
-from .groq_service import groq
-from .lmstudio_service import lmstudio_client
-from .searxng_service import searx
-from .duckduckgo_service import duckduckgo
+from ..models.llm import LLMResult
+from .registry import get_llm_service, get_search_service
+from .metrics import metrics, record_llm_usage
+from .checkpoint_store import checkpoints
+from .debug_store import debug_store
+from .hit_index import hit_index
+from .research_cache import normalize_query, research_cache
+from .report_refresh import diff_steps, merge_sections
+from .plan_stream import PlanStreamParser, parse_plan_queries
+from .llm_common import output_schema, stream_to
+from .singleflight import llm_flights, request_key, search_flights
+from .cancellation import DeadlineExceeded, TaskCancelled, TaskScope, bind_scope, check_cancelled
 from ..config import settings
+from ..logging_config import bind_task, debug_payloads_enabled, get_logger
 
 
-def _get_llm_service():
-	"""Get the appropriate LLM service based on configuration"""
-	provider = (settings.llm_provider or "").lower()
-	if provider == "openrouter":
-		return openrouter
-	if provider == "ollama":
-		return ollama
-	if provider == "openai":
-		return openai_client
-	if provider == "anthropic":
-		return anthropic
-	if provider == "gemini":
-		return gemini
-	if provider == "mistral":
-		return mistral
-	if provider == "groq":
-		return groq
-	if provider == "lmstudio":
-		return lmstudio_client
-	# default fallback
-	return openrouter
-
-
-def _get_search_service():
-	"""Get the appropriate search service based on configuration"""
-	provider = (settings.search_provider or "").lower()
-	if provider == "duckduckgo":
-		return duckduckgo
-	# default fallback to searxng
-	return searx
-
-
-def _make_clarifying_prompt(topic: str, depth: str) -> str:
-	return (
-		f"You are a research assistant helping to clarify a research topic before conducting web searches.\n\n"
-		f"Research Topic: {topic}\n"
-		f"Research Depth: {depth}\n\n"
-		"Your task is to ask 1-3 clarifying questions that are RELEVANT to this specific topic. "
-		"Think critically about what dimensions of this topic actually matter:\n"
-		"- Ask about time frame/scope ONLY if it's actually relevant to understanding this topic\n"
-		"- Ask about geography ONLY if location matters for this topic\n"
-		"- Ask about audience/use case ONLY if different stakeholders would have different needs\n"
-		"- Ask about specific aspects/angles that would help narrow the focus\n"
-		"- Ask about technical depth ONLY for technical topics\n\n"
-		"Do NOT ask irrelevant questions. If a question wouldn't actually help clarify this specific topic, skip it.\n"
-		"If the topic is already very specific and clear, you can provide an empty questions array.\n\n"
-		"You can create two types of questions:\n"
-		"1. TEXT QUESTIONS: For open-ended responses where users can type their answer\n"
-		"2. MULTIPLE CHOICE: For questions with predefined options users can select from\n\n"
-		"Return ONLY valid JSON in this exact format:\n"
-		'{\n'
-		'  "questions": [\n'
-		'    {"question": "Your question here?", "type": "text or multiple_choice", "options": ["option1", "option2"] if multiple_choice else null, "context": "Brief explanation of why this matters"}\n'
-		'  ],\n'
-		'  "topic": "research topic"\n'
-		'}\n\n'
-		"No additional text, explanations, or formatting outside the JSON."
-	)
+_task_log = get_logger("task")
+_clarify_log = get_logger("clarify")
+_plan_log = get_logger("plan")
+_search_log = get_logger("search")
+_report_log = get_logger("report")
+
+# Searches of planned queries started while the plan is still streaming (plan_prefetch_searches)
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+# task_id -> normalized query -> Future of (hits, source)
+_PREFETCHES: Dict[str, Dict[str, Future]] = {}
+
+# Per-query drafts of pipelined reports (report_pipeline_enabled), shared by all tasks
+_DRAFT_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="draft")
+
+
+def _llm_call(llm_service, kind: str, prompt: str, system: str, context: list[int] | None = None, schema: dict | None = None) -> LLMResult:
+	"""`think()` or `complete()`, sharing one upstream call among identical concurrent requests.
+
+	With `schema` (see llm_common.output_schema) the provider's native
+	structured output mode constrains the response to that JSON shape.
+	"""
+	model = getattr(llm_service, "thinking_model" if kind == "think" else "task_model", None)
+	key = request_key(type(llm_service).__name__, model, kind, system, prompt, context, schema["name"] if schema else None)
+	call = getattr(llm_service, kind)
+	kwargs = {}
+	if context:
+		kwargs["context"] = context
+	if schema:
+		kwargs["schema"] = schema
+	result, shared = llm_flights.do(key, lambda: call(prompt, system=system, **kwargs))
+	if shared:
+		# Every task records usage on its own copy
+		result = result.model_copy(deep=True)
+		result.usage.coalesced = True
+	return result
+
+
+# (provider, model) pairs that rejected a structured output request
+_UNSTRUCTURED: set = set()
+
+
+def _structured_llm_call(llm_service, kind: str, prompt: str, system: str, model: type) -> LLMResult:
+	"""LLM call whose response should be JSON shaped like the pydantic `model`."""
+	target = (type(llm_service).__name__, getattr(llm_service, "thinking_model" if kind == "think" else "task_model", None))
+	if not settings.structured_output_enabled or target in _UNSTRUCTURED:
+		return _llm_call(llm_service, kind, prompt, system)
+	try:
+		return _llm_call(llm_service, kind, prompt, system, schema=output_schema(model))
+	except requests.HTTPError as e:
+		# Endpoints or models without structured output reject the request outright
+		if e.response is None or e.response.status_code not in (400, 422):
+			raise
+		_task_log.warning("Structured output rejected; using plain output for this model", extra={"provider": target[0], "model": target[1], "status": e.response.status_code})
+		_UNSTRUCTURED.add(target)
+		return _llm_call(llm_service, kind, prompt, system)
+
 
+_Parsed = TypeVar("_Parsed")
+
+_REPAIR_INSTRUCTIONS = (
+	"You repair malformed model output. Rewrite the response you are given as a single JSON object that matches "
+	"the JSON schema you are given, keeping the response's content. Return ONLY the JSON, with no other text."
+)
+
+
+def _parse_or_repair(task_id: str, phase: str, text: str, model: type, load: Callable[[str], _Parsed | None]) -> _Parsed | None:
+	"""`load(text)`, or else `load` of one LLM repair of `text`; None when both fail."""
+	parsed = load(text)
+	if parsed is None and settings.structured_output_repair and text.strip():
+		_task_log.warning("Unparseable LLM output; attempting a repair", extra={"phase": phase, "response_chars": len(text)})
+		repair_user = f"**JSON Schema**:\n{json.dumps(output_schema(model)['schema'])}\n\n**Response**:\n{text}"
+		try:
+			result = _structured_llm_call(get_llm_service(), "complete", repair_user, _REPAIR_INSTRUCTIONS, model)
+			parsed = load(_record_llm_call(task_id, phase, result))
+		except TaskCancelled:
+			raise
+		except Exception as e:
+			_task_log.warning("Repair call failed", extra={"phase": phase, "error": str(e)})
+		outcome = "failed" if parsed is None else "repaired"
+	else:
+		outcome = "failed" if parsed is None else "parsed"
+	metrics.inc("openresearch_structured_output_total", help="Structured LLM responses by outcome: parsed, repaired by a second call, or failed", phase=phase, result=outcome)
+	return parsed
+
+
+def _search(search_service, query: str, fresh: bool = False) -> tuple[list[SearchHit], str]:
+	"""Hits for `query` and where they came from ("index", "web" or "local").
+
+	For web search providers the local hit index answers when it has enough
+	fresh matches (unless `fresh` asks for the provider's current results);
+	otherwise one upstream request is shared among identical concurrent
+	queries and its hits are added to the index.
+	"""
+	use_index = not getattr(search_service, "local", False)
+	if use_index and not fresh:
+		cached = hit_index.lookup(query)
+		if cached:
+			return cached, "index"
+
+	def fetch() -> list[SearchHit]:
+		hits = search_service.search(query)
+		if use_index:
+			hit_index.add(hits)
+		return hits
+
+	key = request_key(type(search_service).__name__, " ".join(query.lower().split()))
+	hits, _ = search_flights.do(key, fetch)
+	return list(hits), "web" if use_index else "local"
+
+
+def _rerank(task: ResearchProgress, steps: list[SearchStepResult]) -> list[SearchStepResult]:
+	"""Steps with hits reordered by embedding similarity; unchanged if embedding fails."""
+	started = time.perf_counter()
+	try:
+		# Imported here: numpy and the embedding client are only needed when reranking is enabled
+		from .embedding_service import rerank_steps
+		reranked = rerank_steps(task.topic or task.plan.topic, task.clarifying_answers or [], steps)
+	except TaskCancelled:
+		raise
+	except Exception as e:
+		_report_log.warning("Reranking failed; keeping search order", extra={"error": str(e)})
+		return steps
+	_report_log.info("Reranked search hits", extra={"hits": sum(len(s.hits) for s in steps), "ms": round((time.perf_counter() - started) * 1000, 1)})
+	return reranked
 
-_TASKS: Dict[str, ResearchProgress] = {}
+
+def _record_llm_call(task_id: str, phase: str, result: LLMResult) -> str:
+	"""Attribute an LLM call's usage to the task phase and return its text."""
+	# A result that arrives after cancellation is discarded
+	check_cancelled()
+	usage = result.usage
+	usage.phase = phase
+	with _edit(task_id) as progress:
+		totals = progress.usage.model_copy(deep=True)
+		totals.add(usage)
+		progress.usage = totals
+	record_llm_usage(usage)
+	get_logger(phase).info("LLM call finished", extra={
+		"provider": usage.provider,
+		"model": usage.model,
+		"input_tokens": usage.input_tokens,
+		"output_tokens": usage.output_tokens,
+		"ttft_ms": round(usage.time_to_first_token_ms, 1) if usage.time_to_first_token_ms is not None else None,
+		"generation_ms": round(usage.generation_ms, 1),
+		"cached_input_tokens": usage.cached_input_tokens,
+	})
+	return result.text
+
+
+# Prompts are split into a fixed instructions prefix (sent as the system prompt,
+# identical across tasks so providers can reuse its cached prefill) and a short
+# variable suffix carrying the topic and source material.
+_CLARIFYING_INSTRUCTIONS = (
+	"You are a research assistant helping to clarify a research topic before conducting web searches.\n\n"
+	"Your task is to ask 1-3 clarifying questions that are RELEVANT to the specific topic you are given. "
+	"Think critically about what dimensions of this topic actually matter:\n"
+	"- Ask about time frame/scope ONLY if it's actually relevant to understanding this topic\n"
+	"- Ask about geography ONLY if location matters for this topic\n"
+	"- Ask about audience/use case ONLY if different stakeholders would have different needs\n"
+	"- Ask about specific aspects/angles that would help narrow the focus\n"
+	"- Ask about technical depth ONLY for technical topics\n\n"
+	"Do NOT ask irrelevant questions. If a question wouldn't actually help clarify this specific topic, skip it.\n"
+	"If the topic is already very specific and clear, you can provide an empty questions array.\n\n"
+	"You can create two types of questions:\n"
+	"1. TEXT QUESTIONS: For open-ended responses where users can type their answer\n"
+	"2. MULTIPLE CHOICE: For questions with predefined options users can select from\n\n"
+	"Return ONLY valid JSON in this exact format:\n"
+	'{\n'
+	'  "questions": [\n'
+	'    {"question": "Your question here?", "type": "text or multiple_choice", "options": ["option1", "option2"] if multiple_choice else null, "context": "Brief explanation of why this matters"}\n'
+	'  ],\n'
+	'  "topic": "research topic"\n'
+	'}\n\n'
+	"No additional text, explanations, or formatting outside the JSON."
+)
+
+
+def _make_clarifying_prompt(topic: str, depth: str) -> tuple[str, str]:
+	"""Return (system, user) prompts for the clarifying phase."""
+	return _CLARIFYING_INSTRUCTIONS, f"Research Topic: {topic}\nResearch Depth: {depth}"
+
+
+def _joined_prompt(system: str, user: str) -> str:
+	# Single-string form of a split prompt, for debug output
+	return f"{system}\n\n{user}"
+
+
+class _TaskState:
+	"""A task's working progress and the last snapshot published to readers.
+
+	Writers change `working` under the task's own lock and then publish a
+	shallow copy; pollers only ever read `published`, which is never modified,
+	so they neither take a lock nor see a half-applied update. Snapshots share
+	nested objects (steps, plan, usage), so writers replace those instead of
+	mutating them in place.
+	"""
+
+	__slots__ = ("lock", "working", "published")
+
+	def __init__(self, progress: ResearchProgress):
+		self.lock = threading.Lock()
+		self.working = progress
+		self.published = progress.model_copy()
+
+
+_TASKS: Dict[str, _TaskState] = {}
+# Guards task creation and the per-task side tables below, never task contents
 _LOCK = threading.Lock()
+# Cancellation flag and remaining time budget of each task
+_SCOPES: Dict[str, TaskScope] = {}
+# Provider conversation state of the planning call: task_id -> (model, context)
+_PLAN_CONTEXTS: Dict[str, tuple[str, list[int]]] = {}
+
+
+def _remember_plan_context(task_id: str, llm_service, result: LLMResult) -> None:
+	if getattr(llm_service, "supports_context", False) and result.context:
+		with _LOCK:
+			_PLAN_CONTEXTS[task_id] = (result.usage.model, result.context)
+
+
+def _release(task_id: str) -> None:
+	"""Drop the side-table state of a task that will not run another phase."""
+	with _LOCK:
+		_PLAN_CONTEXTS.pop(task_id, None)
+		prefetches = _PREFETCHES.pop(task_id, {})
+	# Searches nobody will read: skip those that have not started yet
+	for future in prefetches.values():
+		future.cancel()
+
+
+def _report_context(task_id: str, llm_service) -> list[int] | None:
+	with _LOCK:
+		model, context = _PLAN_CONTEXTS.pop(task_id, (None, None))
+	# Context tokens only mean something to the model that produced them
+	if context and getattr(llm_service, "supports_context", False) and model == llm_service.task_model:
+		return context
+	return None
+
+
+_REPORT_INSTRUCTIONS = (
+	"You are an expert research analyst. Create a professional, well-structured research report in Markdown format "
+	"on the research topic, at the depth level and from the source material you are given.\n\n"
+	"**Report Requirements**:\n"
+	"- Use proper Markdown formatting with clear headers (# ## ###)\n"
+	"- Create tables for comparative data or statistics when appropriate\n"
+	"- Include bullet points for key findings and recommendations\n"
+	"- Write objectively and cite sources with [text](URL) links\n"
+	"- Organize logically: Introduction → Main Sections → Key Findings → Conclusion\n"
+	"- End with a '## Sources' section listing all referenced materials\n"
+	"- Use **bold** for emphasis and `code formatting` for technical terms\n"
+	"- Include relevant quotes from sources when they add value\n\n"
+	"Focus on accuracy, clarity, and actionable insights. Synthesize information rather than just summarizing each source."
+)
 
 
-def _make_report_prompt(topic: str, steps: list[SearchStepResult], depth: str) -> str:
+def _make_report_prompt(topic: str, steps: list[SearchStepResult], depth: str, drafts: list[str | None] | None = None) -> tuple[str, str]:
+	"""Return (system, user) prompts for the report phase.
+
+	With `drafts` (pipelined mode) a query's drafted findings stand in for its
+	raw results; queries without a draft fall back to their results.
+	"""
 	bullets = []
-	for s in steps:
+	for i, s in enumerate(steps):
+		if drafts and drafts[i]:
+			bullets.append(f"**Query**: {s.query}\n**Findings**:\n{drafts[i]}")
+			continue
 		bullets.append(f"**Query**: {s.query}\n**Top Results**:\n" + "\n".join([f"  • {h.title}\n    Source: {h.url}\n    Summary: {h.snippet or 'No summary available'}" for h in s.hits[:5]]))
 	sources_block = "\n\n".join(bullets)
 	
@@ -107,25 +320,76 @@ def _make_report_prompt(topic: str, steps: list[SearchStepResult], depth: str) -
 	
 	instruction = depth_instructions.get(depth, depth_instructions["standard"])
 	
-	return (
-		f"You are an expert research analyst. Create a professional, well-structured research report in Markdown format.\n\n"
+	return _REPORT_INSTRUCTIONS, (
 		f"**Research Topic**: {topic}\n"
 		f"**Depth Level**: {depth} - {instruction}\n\n"
-		f"**Source Material**:\n{sources_block}\n\n"
-		"**Report Requirements**:\n"
-		"- Use proper Markdown formatting with clear headers (# ## ###)\n"
-		"- Create tables for comparative data or statistics when appropriate\n"
-		"- Include bullet points for key findings and recommendations\n"
-		"- Write objectively and cite sources with [text](URL) links\n"
-		"- Organize logically: Introduction → Main Sections → Key Findings → Conclusion\n"
-		"- End with a '## Sources' section listing all referenced materials\n"
-		"- Use **bold** for emphasis and `code formatting` for technical terms\n"
-		"- Include relevant quotes from sources when they add value\n\n"
-		"Focus on accuracy, clarity, and actionable insights. Synthesize information rather than just summarizing each source."
+		f"**Source Material**:\n{sources_block}"
+	)
+
+
+_DRAFT_INSTRUCTIONS = (
+	"You are a research assistant taking notes for a report on the research topic. From the search results you are "
+	"given, extract the facts, figures, developments and opinions relevant to the topic as concise Markdown bullet "
+	"points, each citing its source with a [text](URL) link. Skip irrelevant results. Return only the bullet points."
+)
+
+
+def _make_draft_prompt(topic: str, step: SearchStepResult) -> tuple[str, str]:
+	"""Return (system, user) prompts for the findings of one query (pipelined reports)."""
+	results = "\n".join([f"  • {h.title}\n    Source: {h.url}\n    Summary: {h.snippet or 'No summary available'}" for h in step.hits[:5]])
+	return _DRAFT_INSTRUCTIONS, (
+		f"**Research Topic**: {topic}\n"
+		f"**Query**: {step.query}\n"
+		f"**Results**:\n{results}"
+	)
+
+
+_REFRESH_INSTRUCTIONS = (
+	"You are an expert research analyst keeping a Markdown research report up to date. You are given the current "
+	"report and source material that has appeared since it was written.\n\n"
+	"**Requirements**:\n"
+	"- Return ONLY the '## ' sections that the new material changes, each complete and starting with its exact "
+	"original heading; leave every other section out\n"
+	"- Add a new '## ' section only for a genuinely new aspect of the topic\n"
+	"- Keep the style, depth and structure of the current report\n"
+	"- Cite new sources with [text](URL) links and return the '## Sources' section with them added\n"
+	"- Remove claims that relied only on sources listed as no longer found\n"
+	"- If nothing in the report needs to change, return nothing"
+)
+
+
+def _make_refresh_prompt(topic: str, report: str, added: dict[str, list[SearchHit]], dropped: list[str]) -> tuple[str, str]:
+	"""Return (system, user) prompts for updating a report with new sources."""
+	bullets = []
+	for query, hits in added.items():
+		bullets.append(f"**Query**: {query}\n**New Results**:\n" + "\n".join([f"  • {h.title}\n    Source: {h.url}\n    Summary: {h.snippet or 'No summary available'}" for h in hits]))
+	user = (
+		f"**Research Topic**: {topic}\n\n"
+		f"**Current Report**:\n{report}\n\n"
+		f"**New Source Material**:\n" + "\n\n".join(bullets)
 	)
+	if dropped:
+		user += "\n\n**No Longer Found**:\n" + "\n".join(f"- {url}" for url in dropped)
+	return _REFRESH_INSTRUCTIONS, user
+
+
+_PLAN_INSTRUCTIONS = (
+	"You are a research planning expert. Create a strategic web search plan for comprehensive research on the given topic.\n\n"
+	"Requirements:\n"
+	"- Generate diverse, specific search queries that will uncover different angles and aspects\n"
+	"- Each query should target different information sources (news, academic, industry, technical, etc.)\n"
+	"- Include both current/recent information and foundational knowledge\n"
+	"- Avoid redundant or overly similar queries\n"
+	"- Focus on authoritative and reliable sources\n"
+	"- Incorporate the user's clarifications to make searches more targeted\n\n"
+	"Return ONLY valid JSON in this exact format:\n"
+	'{"topic": "research topic", "queries": [{"query": "specific search terms", "rationale": "why this search is important"}]}\n\n'
+	"No additional text, explanations, or formatting."
+)
 
 
-def _fixed_make_plan_prompt(topic: str, depth: str, clarifying_answers: list[str] = None) -> str:
+def _fixed_make_plan_prompt(topic: str, depth: str, clarifying_answers: list[str] = None) -> tuple[str, str]:
+	"""Return (system, user) prompts for the planning phase."""
 	depth_guidance = {
 		"surface": "Focus on basic overview and fundamental concepts. 3-4 queries covering general information.",
 		"standard": "Cover key aspects, recent developments, and practical applications. 4-5 queries for comprehensive coverage.",
@@ -136,25 +400,76 @@ def _fixed_make_plan_prompt(topic: str, depth: str, clarifying_answers: list[str
 	
 	clarification_context = ""
 	if clarifying_answers:
-		clarification_context = f"\n\nUser provided these clarifications:\n" + "\n".join(f"- {answer}" for answer in clarifying_answers) + "\n"
+		clarification_context = f"\n\nUser provided these clarifications:\n" + "\n".join(f"- {answer}" for answer in clarifying_answers)
 	
-	return (
-		f"You are a research planning expert. Create a strategic web search plan for comprehensive research on the given topic.\n\n"
+	return _PLAN_INSTRUCTIONS, (
 		f"Topic: {topic}\n"
-		f"Research Depth: {depth} - {guidance}{clarification_context}\n\n"
-		"Requirements:\n"
-		"- Generate diverse, specific search queries that will uncover different angles and aspects\n"
-		"- Each query should target different information sources (news, academic, industry, technical, etc.)\n"
-		"- Include both current/recent information and foundational knowledge\n"
-		"- Avoid redundant or overly similar queries\n"
-		"- Focus on authoritative and reliable sources\n"
-		"- Incorporate the user's clarifications to make searches more targeted\n\n"
-		"Return ONLY valid JSON in this exact format:\n"
-		'{"topic": "research topic", "queries": [{"query": "specific search terms", "rationale": "why this search is important"}]}\n\n'
-		"No additional text, explanations, or formatting."
+		f"Research Depth: {depth} - {guidance}{clarification_context}"
 	)
 
 
+@contextmanager
+def _edit(task_id: str) -> Iterator[ResearchProgress]:
+	"""Change a task's progress and publish the result as a new snapshot."""
+	state = _TASKS[task_id]
+	with state.lock:
+		yield state.working
+		state.published = state.working.model_copy()
+
+
+def _checkpoint(task_id: str) -> None:
+	"""Persist the task's current state so it survives a restart."""
+	def snapshot() -> str | None:
+		progress = get_progress(task_id)
+		return progress.model_dump_json() if progress else None
+
+	checkpoints.save(task_id, snapshot)
+
+
+def _fail(task_id: str, message: str) -> None:
+	with _edit(task_id) as progress:
+		progress.status = "error"
+		progress.message = message
+	_release(task_id)
+	_checkpoint(task_id)
+
+
+def _budget(progress: ResearchProgress | None) -> float:
+	"""Time budget of a task: the one it was started with, else the default."""
+	return (progress.deadline_seconds if progress else None) or settings.task_deadline_seconds
+
+
+def _enter_task(task_id: str) -> TaskScope:
+	"""Bind the current thread to a task's log context, cancellation flag and deadline."""
+	bind_task(task_id)
+	budget = _budget(get_progress(task_id))
+	with _LOCK:
+		scope = _SCOPES.setdefault(task_id, TaskScope(budget))
+	bind_scope(scope)
+	scope.start()
+	return scope
+
+
+def _ensure_not_cancelled(progress: ResearchProgress) -> None:
+	# Called while editing a task, right before a phase publishes its result
+	if progress.status == "cancelled":
+		raise TaskCancelled("Task was cancelled")
+
+
+def _stopped(task_id: str, exc: TaskCancelled) -> None:
+	if isinstance(exc, DeadlineExceeded):
+		_task_log.warning("Research task timed out", extra={"error": str(exc)})
+		_fail(task_id, f"Timed out: {exc}")
+		return
+	_task_log.info("Research task cancelled")
+	with _edit(task_id) as progress:
+		# The worker may have moved the task on before it noticed the cancellation
+		progress.status = "cancelled"
+		progress.message = "Cancelled"
+	_release(task_id)
+	_checkpoint(task_id)
+
+
 def start_research(req: ResearchRequest) -> str:
 	task_id = str(uuid.uuid4())
 	progress = ResearchProgress(
@@ -162,18 +477,18 @@ def start_research(req: ResearchRequest) -> str:
 		started_at=datetime.utcnow(),
 		status="starting",
 		message="Generating search plan",
+		topic=req.topic,
+		depth=req.depth,
+		allow_reuse=req.reuse,
+		deadline_seconds=req.deadline_seconds,
+		debug_available=debug_store.begin(task_id),
 	)
 	with _LOCK:
-		_TASKS[task_id] = progress
-	
-	# Terminal debug output
-	print(f"\n{'='*80}")
-	print(f"🚀 RESEARCH TASK STARTED - Task: {task_id}")
-	print(f"{'='*80}")
-	print(f"📋 Topic: {req.topic}")
-	print(f"🎯 Depth: {req.depth}")
-	print(f"🕒 Started: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
-	print(f"{'='*80}\n")
+		_TASKS[task_id] = _TaskState(progress)
+		_SCOPES[task_id] = TaskScope(_budget(progress))
+	_checkpoint(task_id)
+
+	_task_log.info("Research task started", extra={"task_id": task_id, "topic": req.topic, "depth": req.depth})
 
 	thread = threading.Thread(target=_run_research, args=(task_id, req), daemon=True)
 	thread.start()
@@ -181,22 +496,53 @@ def start_research(req: ResearchRequest) -> str:
 
 
 def get_progress(task_id: str) -> ResearchProgress | None:
+	"""Latest published snapshot of a task; never blocks on writers."""
+	state = _TASKS.get(task_id)
+	return state.published if state else None
+
+
+def get_debug(task_id: str) -> ResearchDebug | None:
+	"""Captured prompts and raw responses of a task, decompressed on request."""
+	if task_id not in _TASKS:
+		return None
+	return debug_store.get(task_id)
+
+
+def cancel_research(task_id: str) -> bool:
+	"""Stop a task: in-flight LLM streams are closed and no further phases run."""
+	if task_id not in _TASKS:
+		return False
+	with _edit(task_id) as task:
+		if task.status in ("done", "error", "cancelled"):
+			return False
+		task.status = "cancelled"
+		task.message = "Cancelled"
+		task.awaiting_clarification = False
+		task.awaiting_confirmation = False
 	with _LOCK:
-		return _TASKS.get(task_id)
+		scope = _SCOPES.get(task_id)
+	_release(task_id)
+	if scope is not None:
+		scope.cancel()
+	_checkpoint(task_id)
+	_task_log.info("Research task cancellation requested", extra={"task_id": task_id})
+	return True
 
 
 def confirm_queries(task_id: str, confirmation: QueryConfirmation) -> bool:
-	with _LOCK:
-		task = _TASKS.get(task_id)
-		if not task or not task.awaiting_confirmation:
+	if task_id not in _TASKS:
+		return False
+	with _edit(task_id) as task:
+		if not task.awaiting_confirmation:
 			return False
 		
 		# Update the plan with confirmed queries
 		if task.plan:
-			task.plan.queries = confirmation.approved_queries
+			task.plan = task.plan.model_copy(update={"queries": confirmation.approved_queries})
 		task.awaiting_confirmation = False
 		task.status = "searching"
 		task.message = "Executing web searches"
+	_checkpoint(task_id)
 	
 	# Continue with the search phase in a new thread
 	thread = threading.Thread(target=_continue_research, args=(task_id,), daemon=True)
@@ -204,15 +550,37 @@ def confirm_queries(task_id: str, confirmation: QueryConfirmation) -> bool:
 	return True
 
 
-def submit_clarification(task_id: str, clarification: ClarificationResponse) -> bool:
+def refresh_research(task_id: str) -> bool:
+	"""Re-run a finished task's searches and update its report if they changed."""
+	if task_id not in _TASKS:
+		return False
+	with _edit(task_id) as task:
+		if task.status != "done" or not task.plan or not task.report_markdown:
+			return False
+		task.status = "refreshing"
+		task.message = "Re-running search queries"
 	with _LOCK:
-		task = _TASKS.get(task_id)
-		if not task or not task.awaiting_clarification:
+		# A refresh gets its own time budget
+		_SCOPES[task_id] = TaskScope(_budget(task))
+	_checkpoint(task_id)
+
+	thread = threading.Thread(target=_refresh_research, args=(task_id,), daemon=True)
+	thread.start()
+	return True
+
+
+def submit_clarification(task_id: str, clarification: ClarificationResponse) -> bool:
+	if task_id not in _TASKS:
+		return False
+	with _edit(task_id) as task:
+		if not task.awaiting_clarification:
 			return False
 		
 		task.awaiting_clarification = False
+		task.clarifying_answers = clarification.answers
 		task.status = "planning"
 		task.message = "Creating enhanced search plan with your input"
+	_checkpoint(task_id)
 	
 	# Continue with planning phase using clarifications
 	thread = threading.Thread(target=_continue_planning, args=(task_id, clarification.answers), daemon=True)
@@ -221,265 +589,464 @@ def submit_clarification(task_id: str, clarification: ClarificationResponse) ->
 
 
 def _continue_research(task_id: str):
-	"""Continue research after query confirmation"""
+	"""Continue research after query confirmation (or resume it after a restart)"""
+	scope = _enter_task(task_id)
 	try:
-		task = None
-		with _LOCK:
-			task = _TASKS.get(task_id)
-		
+		task = get_progress(task_id)
 		if not task or not task.plan:
 			return
 		
-		# Search
-		steps: list[SearchStepResult] = []
-		print(f"\n{'='*80}")
-		print(f"🔍 EXECUTING SEARCH QUERIES - Task: {task_id}")
-		print(f"{'='*80}")
-		
-		for i, q in enumerate(task.plan.queries, 1):
-			print(f"🔎 Query {i}/{len(task.plan.queries)}: {q.query}")
-			if q.rationale:
-				print(f"   💡 Rationale: {q.rationale}")
-			
-			search_service = _get_search_service()
-			hits = search_service.search(q.query)
-			print(f"   ✅ Found {len(hits)} results")
+		# Let local providers load the report model while the searches run
+		llm_service = get_llm_service()
+		pipelined = settings.report_pipeline_enabled
+		if hasattr(llm_service, "warm"):
+			llm_service.warm(_draft_kind() if pipelined else "complete")
+
+		# Searches of the task this one was planned from, while still fresh
+		reusable = research_cache.reusable_searches(task.reused_from.task_id) if task.reused_from else {}
+		# Searches started while the plan was streaming; edited or added queries are searched now
+		prefetched = _take_prefetches(task_id)
+
+		# Search, skipping queries whose results were checkpointed before a restart
+		steps: list[SearchStepResult] = list(task.steps)
+		# Pipelined: each query's findings are drafted while the next searches run
+		drafts: list[Future] = [_start_draft(task_id, task, step) for step in steps] if pipelined else []
+		total = len(task.plan.queries)
+		for i, q in enumerate(task.plan.queries[len(steps):], len(steps) + 1):
+			check_cancelled()
+			hits = reusable.get(normalize_query(q.query))
+			future = prefetched.get(normalize_query(q.query))
+			if hits is not None:
+				source = "reused"
+			elif future is not None and _prefetch_ok(future):
+				hits, source = future.result()
+				source = f"prefetch/{source}"
+			else:
+				search_service = get_search_service()
+				hits, source = _search(search_service, q.query)
+			_search_log.info("Search query finished", extra={"index": i, "total": total, "query": q.query, "hits": len(hits), "source": source})
 			
 			steps.append(SearchStepResult(query=q.query, hits=hits))
-			with _LOCK:
-				_TASKS[task_id].steps = steps.copy()
-		
-		print(f"{'='*80}\n")
+			if pipelined:
+				drafts.append(_start_draft(task_id, task, steps[-1]))
+			with _edit(task_id) as progress:
+				progress.steps = steps.copy()
+			_checkpoint(task_id)
 
 		# Report
-		with _LOCK:
-			_TASKS[task_id].status = "reporting"
-			_TASKS[task_id].message = "Compiling report"
+		with _edit(task_id) as progress:
+			progress.status = "reporting"
+			progress.message = "Compiling report"
 
-		# Get topic and depth from the original request (we need to store this in the task)
 		topic = task.plan.topic
-		report_prompt = _make_report_prompt(topic, steps, "standard")  # Default depth
-		llm_service = _get_llm_service()
-		report_md = llm_service.complete(report_prompt)
+		if pipelined:
+			report_system, report_user = _make_report_prompt(topic, steps, task.depth, _collect_drafts(drafts))
+		else:
+			if settings.rerank_enabled:
+				steps = _rerank(task, steps)
+			report_system, report_user = _make_report_prompt(topic, steps, task.depth)
+		report_prompt = _joined_prompt(report_system, report_user)
+		llm_service = get_llm_service()
+		context = _report_context(task_id, llm_service)
+		_report_log.info("Generating report", extra={"prompt_chars": len(report_prompt), "reused_context": bool(context)})
+		result = _llm_call(llm_service, "complete", report_user, report_system, context)
+		report_md = _record_llm_call(task_id, "report", result)
 
-		with _LOCK:
-			_TASKS[task_id].debug_report_prompt = report_prompt
-			_TASKS[task_id].debug_report_response = report_md
-			_TASKS[task_id].report_markdown = report_md
-			_TASKS[task_id].status = "done"
-			_TASKS[task_id].message = "Completed"
+		debug_store.record(task_id, "report", report_prompt, report_md)
+		with _edit(task_id) as progress:
+			_ensure_not_cancelled(progress)
+			progress.report_markdown = report_md
+			progress.status = "done"
+			progress.message = "Completed"
+			finished = progress.model_copy()
+		_checkpoint(task_id)
+		research_cache.add(finished)
 		
-		# Terminal debug output
-		print(f"\n{'='*80}")
-		print(f"📝 REPORT GENERATION DEBUG - Task: {task_id}")
-		print(f"{'='*80}")
-		print(f"📝 PROMPT SENT TO LLM:")
-		print(f"-" * 40)
-		print(report_prompt)
-		print(f"-" * 40)
-		print(f"🤖 LLM RESPONSE:")
-		print(f"-" * 40)
-		print(report_md)
-		print(f"{'='*80}\n")
+		_report_log.info("Report generated", extra={"response_chars": len(report_md)})
+		if debug_payloads_enabled(_report_log):
+			_report_log.debug("Report LLM exchange", extra={"prompt": report_prompt, "response": report_md})
+	except TaskCancelled as e:
+		_stopped(task_id, e)
 	except Exception as e:
-		with _LOCK:
-			_TASKS[task_id].status = "error"
-			_TASKS[task_id].message = f"Failed: {e}"
+		_report_log.exception("Research failed")
+		_fail(task_id, f"Failed: {e}")
+	finally:
+		scope.pause()
+
+
+def _refresh_research(task_id: str):
+	"""Search again, keep the report when no new sources turned up, else rewrite only the sections they affect."""
+	scope = _enter_task(task_id)
+	try:
+		task = get_progress(task_id)
+		if not task or not task.plan or not task.report_markdown:
+			return
+
+		steps: list[SearchStepResult] = []
+		total = len(task.plan.queries)
+		for i, q in enumerate(task.plan.queries, 1):
+			check_cancelled()
+			hits, source = _search(get_search_service(), q.query, fresh=True)
+			_search_log.info("Search query finished", extra={"index": i, "total": total, "query": q.query, "hits": len(hits), "source": source})
+			steps.append(SearchStepResult(query=q.query, hits=hits))
+
+		added, dropped = diff_steps(task.steps, steps, settings.refresh_compare_hits)
+		new_sources = sum(len(hits) for hits in added.values())
+		refresh = ResearchRefresh(
+			refreshed_at=datetime.utcnow(),
+			new_sources=new_sources,
+			dropped_sources=len(dropped),
+			changed_queries=list(added),
+		)
+		report_md = task.report_markdown
+		if new_sources >= settings.refresh_min_new_sources:
+			with _edit(task_id) as progress:
+				progress.message = f"Updating the report with {new_sources} new source(s)"
+			refresh_system, refresh_user = _make_refresh_prompt(task.plan.topic, report_md, added, dropped)
+			result = _llm_call(get_llm_service(), "complete", refresh_user, refresh_system)
+			updates = _record_llm_call(task_id, "report", result)
+			debug_store.record(task_id, "report", _joined_prompt(refresh_system, refresh_user), updates)
+			report_md, refresh.updated_sections = merge_sections(report_md, updates)
+
+		outcome = "updated" if refresh.updated_sections else "unchanged"
+		metrics.inc("openresearch_report_refreshes_total", help="Report refreshes by whether the report changed", result=outcome)
+		_report_log.info("Report refreshed", extra={"new_sources": new_sources, "dropped_sources": len(dropped), "updated_sections": len(refresh.updated_sections)})
+		with _edit(task_id) as progress:
+			_ensure_not_cancelled(progress)
+			progress.steps = steps
+			progress.report_markdown = report_md
+			progress.last_refresh = refresh
+			progress.status = "done"
+			if refresh.updated_sections:
+				progress.message = "Updated: " + ", ".join(refresh.updated_sections)
+			else:
+				progress.message = "No material changes; report unchanged"
+			finished = progress.model_copy()
+		_checkpoint(task_id)
+		research_cache.add(finished)
+	except Exception as e:
+		# The previous report is still valid: the task stays done
+		if not isinstance(e, TaskCancelled):
+			_report_log.exception("Refresh failed")
+		with _edit(task_id) as progress:
+			progress.status = "done"
+			progress.message = f"Refresh failed: {e}" if not isinstance(e, TaskCancelled) else f"Refresh stopped: {e}"
+		_checkpoint(task_id)
+	finally:
+		scope.pause()
+
+
+def _draft_kind() -> str:
+	return "complete" if settings.report_pipeline_model.lower() == "complete" else "think"
+
+
+def _draft(task_id: str, task: ResearchProgress, step: SearchStepResult) -> str:
+	"""Findings of one query, written while the remaining searches run."""
+	if settings.rerank_enabled:
+		step = _rerank(task, [step])[0]
+	draft_system, draft_user = _make_draft_prompt(task.plan.topic, step)
+	result = _llm_call(get_llm_service(), _draft_kind(), draft_user, draft_system)
+	return _record_llm_call(task_id, "report", result)
+
+
+def _start_draft(task_id: str, task: ResearchProgress, step: SearchStepResult) -> Future:
+	# The draft thread gets a copy of the task's context: logs, cancellation and deadline follow it
+	ctx = contextvars.copy_context()
+	return _DRAFT_EXECUTOR.submit(ctx.run, _draft, task_id, task, step)
+
+
+def _collect_drafts(drafts: list[Future]) -> list[str | None]:
+	"""Wait for the outstanding drafts; a failed draft leaves its query's raw results in the prompt."""
+	started = time.perf_counter()
+	collected: list[str | None] = []
+	for future in drafts:
+		try:
+			collected.append(future.result().strip() or None)
+		except TaskCancelled:
+			raise
+		except Exception as e:
+			_report_log.warning("Draft failed; using the query's results", extra={"error": str(e)})
+			collected.append(None)
+	_report_log.info("Drafts ready", extra={"drafts": sum(d is not None for d in collected), "waited_ms": round((time.perf_counter() - started) * 1000, 1)})
+	return collected
+
+
+def _reuse_plan(task_id: str, topic: str, depth: str, clarifying_answers: list[str] | None) -> bool:
+	"""Offer the plan of a similar completed task instead of asking the LLM for one."""
+	task = get_progress(task_id)
+	if not task or not task.allow_reuse:
+		return False
+	found = research_cache.match(topic, depth, clarifying_answers or [])
+	metrics.inc("openresearch_research_reuse_total", help="New research plans taken from a similar completed task (hit) or generated (miss)", result="hit" if found else "miss")
+	if found is None:
+		return False
+	entry, similarity = found
+	_plan_log.info("Reusing plan of a similar task", extra={"reused_task_id": entry.task_id, "reused_topic": entry.topic, "similarity": round(similarity, 3), "queries": len(entry.plan.queries)})
+	with _edit(task_id) as progress:
+		_ensure_not_cancelled(progress)
+		progress.plan = entry.plan.model_copy(update={"topic": topic})
+		progress.reused_from = ResearchReuse(task_id=entry.task_id, topic=entry.topic, similarity=round(similarity, 3), completed_at=entry.completed_at)
+		progress.status = "awaiting_confirmation"
+		progress.message = f"Reusing the search plan of a similar earlier research (\"{entry.topic}\"); confirm or edit its queries"
+		progress.awaiting_confirmation = True
+	_checkpoint(task_id)
+	return True
+
+
+def _plan(task_id: str, topic: str, depth: str, clarifying_answers: list[str] | None = None) -> None:
+	"""Create the search plan and wait for the user to confirm its queries."""
+	if _reuse_plan(task_id, topic, depth, clarifying_answers):
+		return
+	plan_system, plan_user = _fixed_make_plan_prompt(topic, depth, clarifying_answers)
+	plan_prompt = _joined_prompt(plan_system, plan_user)
+	llm_service = get_llm_service()
+	started = time.perf_counter()
+	parser = PlanStreamParser()
+
+	def on_text(text: str) -> None:
+		# Queries are shown (and searched) as soon as the planner has written them
+		queries = parser.feed(text)
+		if not queries:
+			return
+		if len(parser.queries) == len(queries):
+			metrics.observe("openresearch_plan_first_query_seconds", time.perf_counter() - started, help="Time from the plan request to its first complete query")
+		with _edit(task_id) as progress:
+			_ensure_not_cancelled(progress)
+			progress.plan = SearchPlan(topic=topic, queries=list(parser.queries))
+			progress.message = f"Creating search plan ({len(parser.queries)} queries so far)"
+		if settings.plan_prefetch_searches:
+			for q in queries:
+				_prefetch(task_id, q.query)
+
+	with stream_to(on_text):
+		result = _structured_llm_call(llm_service, "think", plan_user, plan_system, SearchPlan)
+	plan_text = _record_llm_call(task_id, "plan", result)
+	_remember_plan_context(task_id, llm_service, result)
+
+	debug_store.record(task_id, "plan", plan_prompt, plan_text)
+	if debug_payloads_enabled(_plan_log):
+		_plan_log.debug("Planning LLM exchange", extra={"prompt": plan_prompt, "response": plan_text})
+
+	# Parse plan JSON leniently, repairing it once if needed
+	plan = _parse_or_repair(task_id, "plan", plan_text, SearchPlan, lambda text: _load_plan(text, topic)) or _parse_plan(plan_text, topic)
+	_plan_log.info("Search plan ready", extra={"queries": len(plan.queries), "clarifications": len(clarifying_answers or [])})
+
+	with _edit(task_id) as progress:
+		_ensure_not_cancelled(progress)
+		progress.plan = plan
+		progress.status = "awaiting_confirmation"
+		progress.message = "Waiting for search query confirmation"
+		progress.awaiting_confirmation = True
+	_checkpoint(task_id)
+
+
+def _prefetch(task_id: str, query: str) -> None:
+	"""Start searching a planned query before the plan is confirmed."""
+	key = normalize_query(query)
+	with _LOCK:
+		prefetches = _PREFETCHES.setdefault(task_id, {})
+		if key in prefetches:
+			return
+		ctx = contextvars.copy_context()
+		prefetches[key] = _PREFETCH_EXECUTOR.submit(ctx.run, lambda: _search(get_search_service(), query))
+
+
+def _prefetch_ok(future: Future) -> bool:
+	try:
+		future.result()
+		return True
+	except TaskCancelled:
+		raise
+	except Exception as e:
+		_search_log.warning("Prefetched search failed; searching again", extra={"error": str(e)})
+		return False
+
+
+def _take_prefetches(task_id: str) -> dict[str, Future]:
+	with _LOCK:
+		return _PREFETCHES.pop(task_id, {})
 
 
 def _continue_planning(task_id: str, clarifying_answers: list[str]):
 	"""Continue with planning after receiving clarification"""
+	scope = _enter_task(task_id)
 	try:
-		task = None
-		with _LOCK:
-			task = _TASKS.get(task_id)
-		
+		task = get_progress(task_id)
 		if not task or not task.clarifying_questions:
 			return
 		
-		# Get the original topic and depth (we need to store these in the task)
-		topic = task.clarifying_questions.topic
-		
 		# Generate plan with clarifications
-		plan_prompt = _fixed_make_plan_prompt(topic, "standard", clarifying_answers)  # Default depth
-		llm_service = _get_llm_service()
-		plan_text = llm_service.think(plan_prompt)
-
-		# Store debug information
-		with _LOCK:
-			_TASKS[task_id].debug_plan_prompt = plan_prompt
-			_TASKS[task_id].debug_plan_response = plan_text
-
-		# Parse plan JSON leniently
-		plan = _parse_plan(plan_text, topic)
-
-		with _LOCK:
-			_TASKS[task_id].plan = plan
-			_TASKS[task_id].status = "awaiting_confirmation"
-			_TASKS[task_id].message = "Waiting for search query confirmation"
-			_TASKS[task_id].awaiting_confirmation = True
-
+		_plan(task_id, task.topic or task.clarifying_questions.topic, task.depth, clarifying_answers)
+	except TaskCancelled as e:
+		_stopped(task_id, e)
 	except Exception as e:
-		with _LOCK:
-			_TASKS[task_id].status = "error"
-			_TASKS[task_id].message = f"Failed during planning: {e}"
+		_plan_log.exception("Planning failed")
+		_fail(task_id, f"Failed during planning: {e}")
+	finally:
+		scope.pause()
 
 
 def _run_research(task_id: str, req: ResearchRequest):
+	scope = _enter_task(task_id)
 	try:
 		# First step: Ask clarifying questions
-		with _LOCK:
-			_TASKS[task_id].status = "clarifying"
-			_TASKS[task_id].message = "Asking clarifying questions"
+		with _edit(task_id) as progress:
+			progress.status = "clarifying"
+			progress.message = "Asking clarifying questions"
 
-		clarifying_prompt = _make_clarifying_prompt(req.topic, req.depth)
-		llm_service = _get_llm_service()
-		clarifying_text = llm_service.think(clarifying_prompt)
+		clarifying_system, clarifying_user = _make_clarifying_prompt(req.topic, req.depth)
+		clarifying_prompt = _joined_prompt(clarifying_system, clarifying_user)
+		llm_service = get_llm_service()
+		clarifying_text = _record_llm_call(task_id, "clarify", _structured_llm_call(llm_service, "think", clarifying_user, clarifying_system, ClarifyingQuestions))
 
-		# Store debug information
-		with _LOCK:
-			_TASKS[task_id].debug_clarifying_prompt = clarifying_prompt
-			_TASKS[task_id].debug_clarifying_response = clarifying_text
-		
-		# Terminal debug output
-		print(f"\n{'='*80}")
-		print(f"🤔 CLARIFYING QUESTIONS DEBUG - Task: {task_id}")
-		print(f"{'='*80}")
-		print(f"📝 PROMPT SENT TO LLM:")
-		print(f"-" * 40)
-		print(clarifying_prompt)
-		print(f"-" * 40)
-		print(f"🤖 LLM RESPONSE:")
-		print(f"-" * 40)
-		print(clarifying_text)
-		print(f"{'='*80}\n")
+		debug_store.record(task_id, "clarifying", clarifying_prompt, clarifying_text)
+		if debug_payloads_enabled(_clarify_log):
+			_clarify_log.debug("Clarifying LLM exchange", extra={"prompt": clarifying_prompt, "response": clarifying_text})
 
 		# Parse clarifying questions
-		clarifying_questions = _parse_clarifying_questions(clarifying_text, req.topic)
-		
-		# Debug: Show parsed questions
-		print(f"\n🔍 PARSED CLARIFYING QUESTIONS:")
+		clarifying_questions = (
+			_parse_or_repair(task_id, "clarify", clarifying_text, ClarifyingQuestions, lambda text: _load_clarifying_questions(text, req.topic))
+			or _parse_clarifying_questions(clarifying_text, req.topic)
+		)
+		_clarify_log.info("Clarifying questions parsed", extra={"questions": len(clarifying_questions.questions)})
 		for i, q in enumerate(clarifying_questions.questions, 1):
-			print(f"   Question {i}: {q.question[:50]}...")
-			print(f"   Type: {q.type}")
-			print(f"   Options: {q.options}")
-			print(f"   Context: {q.context}")
-			print(f"   ---")
+			_clarify_log.debug("Clarifying question", extra={"index": i, "question": q.question, "type": q.type, "options": q.options})
 
-		with _LOCK:
-			_TASKS[task_id].clarifying_questions = clarifying_questions
+		with _edit(task_id) as progress:
+			_ensure_not_cancelled(progress)
+			progress.clarifying_questions = clarifying_questions
 			
 			# If there are questions, wait for user input
 			if clarifying_questions.questions:
-				_TASKS[task_id].status = "awaiting_clarification"
-				_TASKS[task_id].message = "Waiting for your input on clarifying questions"
-				_TASKS[task_id].awaiting_clarification = True
-				return
+				progress.status = "awaiting_clarification"
+				progress.message = "Waiting for your input on clarifying questions"
+				progress.awaiting_clarification = True
 			else:
 				# No questions needed, proceed directly to planning
-				_TASKS[task_id].status = "planning"
-				_TASKS[task_id].message = "Creating search plan"
+				progress.status = "planning"
+				progress.message = "Creating search plan"
+		_checkpoint(task_id)
+		if clarifying_questions.questions:
+			return
 
-		# Continue with planning if no clarification needed
-		plan_prompt = _fixed_make_plan_prompt(req.topic, req.depth)
-		plan_text = llm_service.think(plan_prompt)
+		# Continue with planning if no clarification needed; the function exits
+		# awaiting confirmation and continues in confirm_queries
+		_plan(task_id, req.topic, req.depth)
+	except TaskCancelled as e:
+		_stopped(task_id, e)
+	except Exception as e:
+		_task_log.exception("Research failed")
+		_fail(task_id, f"Failed: {e}")
+	finally:
+		scope.pause()
 
-		# Store debug information
-		with _LOCK:
-			_TASKS[task_id].debug_plan_prompt = plan_prompt
-			_TASKS[task_id].debug_plan_response = plan_text
-		
-		# Terminal debug output
-		print(f"\n{'='*80}")
-		print(f"📋 PLANNING DEBUG - Task: {task_id}")
-		print(f"{'='*80}")
-		print(f"📝 PROMPT SENT TO LLM:")
-		print(f"-" * 40)
-		print(plan_prompt)
-		print(f"-" * 40)
-		print(f"🤖 LLM RESPONSE:")
-		print(f"-" * 40)
-		print(plan_text)
-		print(f"{'='*80}\n")
-
-		# Parse plan JSON leniently
-		plan = _parse_plan(plan_text, req.topic)
 
-		with _LOCK:
-			_TASKS[task_id].plan = plan
-			_TASKS[task_id].status = "awaiting_confirmation"
-			_TASKS[task_id].message = "Waiting for search query confirmation"
-			_TASKS[task_id].awaiting_confirmation = True
+def resume_tasks() -> int:
+	"""Reload checkpointed tasks and restart those interrupted mid-phase.
 
-		# Wait for confirmation (the function will exit here, continuation happens in confirm_queries)
-		return
-	except Exception as e:
+	Each task continues from its last completed phase: finished searches,
+	plans and clarifying questions are not recomputed.
+	"""
+	resumed = 0
+	for task in checkpoints.load_all():
+		# Debug payloads are not checkpointed; only phases run from now on can be captured
+		finished = task.status in ("done", "error", "cancelled")
+		task.debug_available = False if finished else debug_store.begin(task.task_id)
 		with _LOCK:
-			_TASKS[task_id].status = "error"
-			_TASKS[task_id].message = f"Failed: {e}"
+			if task.task_id in _TASKS:
+				continue
+			_TASKS[task.task_id] = _TaskState(task)
 
+		if task.status in ("done", "error", "cancelled", "awaiting_clarification", "awaiting_confirmation"):
+			continue
+		if task.status in ("searching", "reporting") and task.plan:
+			target, args = _continue_research, (task.task_id,)
+		elif task.status == "refreshing" and task.report_markdown:
+			target, args = _refresh_research, (task.task_id,)
+		elif task.status == "planning" and task.clarifying_questions:
+			target, args = _continue_planning, (task.task_id, task.clarifying_answers or [])
+		elif task.topic:
+			target, args = _run_research, (task.task_id, ResearchRequest(topic=task.topic, depth=task.depth, reuse=task.allow_reuse, deadline_seconds=task.deadline_seconds))
+		else:
+			_fail(task.task_id, "Interrupted by a server restart")
+			continue
 
-def _parse_plan(plan_text: str, topic: str) -> SearchPlan:
-	import json
-	# try to locate JSON block
-	extracted = plan_text
-	start = plan_text.find("{")
-	end = plan_text.rfind("}")
-	if start != -1 and end != -1 and end > start:
-		extracted = plan_text[start : end + 1]
-	try:
-		obj = json.loads(extracted)
-		queries_raw = obj.get("queries", [])
-		queries = []
-		for q in queries_raw:
-			if isinstance(q, dict) and q.get("query"):
-				queries.append(SearchQuery(query=q["query"], rationale=q.get("rationale")))
-			elif isinstance(q, str):
-				queries.append(SearchQuery(query=q))
-		if not queries:
-			# fallback
-			queries = [
-				SearchQuery(query=f"{topic} overview"),
-				SearchQuery(query=f"{topic} latest news"),
-				SearchQuery(query=f"{topic} key sources"),
-			]
-		return SearchPlan(topic=obj.get("topic") or topic, queries=queries[:6])
-	except Exception:
-		return SearchPlan(
-			topic=topic,
-			queries=[
-				SearchQuery(query=f"{topic} overview"),
-				SearchQuery(query=f"{topic} latest developments"),
-				SearchQuery(query=f"{topic} research papers"),
-			],
-		)
+		_task_log.info("Resuming research task", extra={"task_id": task.task_id, "status": task.status, "completed_searches": len(task.steps)})
+		threading.Thread(target=target, args=args, daemon=True).start()
+		resumed += 1
+	return resumed
 
 
-def _parse_clarifying_questions(text: str, topic: str) -> ClarifyingQuestions:
-	import json
-	# try to locate JSON block
-	extracted = text
+def _json_object(text: str) -> dict | None:
+	"""The outermost JSON object in `text` (which may wrap it in prose or code fences)."""
 	start = text.find("{")
 	end = text.rfind("}")
-	if start != -1 and end != -1 and end > start:
-		extracted = text[start : end + 1]
+	if start == -1 or end <= start:
+		return None
 	try:
-		obj = json.loads(extracted)
-		questions_raw = obj.get("questions", [])
-		questions = []
-		for q in questions_raw:
-			if isinstance(q, dict) and q.get("question"):
-				questions.append(ClarifyingQuestion(
-					question=q["question"], 
-					context=q.get("context"),
-					type=q.get("type", "text"),
-					options=q.get("options")
-				))
-			elif isinstance(q, str):
-				questions.append(ClarifyingQuestion(question=q))
-		
-		return ClarifyingQuestions(topic=obj.get("topic") or topic, questions=questions)
-	except Exception:
-		# If parsing fails, return empty questions (will proceed directly to planning)
-		return ClarifyingQuestions(topic=topic, questions=[])
+		obj = json.loads(text[start : end + 1])
+	except ValueError:
+		return None
+	return obj if isinstance(obj, dict) else None
+
+
+def _load_plan(plan_text: str, topic: str) -> SearchPlan | None:
+	"""The plan in the planner's response, or None if it has no usable queries."""
+	obj = _json_object(plan_text)
+	if obj is None or not isinstance(obj.get("queries"), list):
+		return None
+	queries = []
+	for q in obj["queries"]:
+		if isinstance(q, dict) and isinstance(q.get("query"), str) and q["query"].strip():
+			rationale = q.get("rationale")
+			queries.append(SearchQuery(query=q["query"], rationale=rationale if isinstance(rationale, str) else None))
+		elif isinstance(q, str) and q.strip():
+			queries.append(SearchQuery(query=q))
+	if not queries:
+		return None
+	return SearchPlan(topic=obj.get("topic") if isinstance(obj.get("topic"), str) and obj["topic"] else topic, queries=queries[:6])
+
+
+def _parse_plan(plan_text: str, topic: str) -> SearchPlan:
+	"""The plan in the planner's response, falling back to generic queries."""
+	plan = _load_plan(plan_text, topic)
+	if plan is not None:
+		return plan
+	# Malformed or truncated JSON: keep every query object that is complete
+	queries = parse_plan_queries(plan_text)
+	if queries:
+		return SearchPlan(topic=topic, queries=queries)
+	return SearchPlan(
+		topic=topic,
+		queries=[
+			SearchQuery(query=f"{topic} overview"),
+			SearchQuery(query=f"{topic} latest developments"),
+			SearchQuery(query=f"{topic} research papers"),
+		],
+	)
+
 
+def _load_clarifying_questions(text: str, topic: str) -> ClarifyingQuestions | None:
+	"""The questions in the clarifying response (possibly none), or None if it is unreadable."""
+	obj = _json_object(text)
+	if obj is None or not isinstance(obj.get("questions", []), list):
+		return None
+	questions = []
+	for q in obj.get("questions", []):
+		if isinstance(q, dict) and isinstance(q.get("question"), str) and q["question"].strip():
+			options = q.get("options")
+			options = [str(o) for o in options] if isinstance(options, list) else None
+			questions.append(ClarifyingQuestion(
+				question=q["question"],
+				context=q.get("context") if isinstance(q.get("context"), str) else None,
+				type=q.get("type") if q.get("type") in ("text", "multiple_choice") else ("multiple_choice" if options else "text"),
+				options=options,
+			))
+		elif isinstance(q, str) and q.strip():
+			questions.append(ClarifyingQuestion(question=q))
+	return ClarifyingQuestions(topic=obj.get("topic") if isinstance(obj.get("topic"), str) and obj["topic"] else topic, questions=questions)
+
+
+def _parse_clarifying_questions(text: str, topic: str) -> ClarifyingQuestions:
+	"""The clarifying questions, or none (the task goes straight to planning) if unreadable."""
+	return _load_clarifying_questions(text, topic) or ClarifyingQuestions(topic=topic, questions=[])
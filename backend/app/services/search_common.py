@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import re
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from ..models.research import SearchHit
+
+
+# Words too common to say anything about whether a page matches a query
+_STOPWORDS = frozenset(
+	"a an and are as at be by for from how in is it of on or that the this to was what when where which who why with vs".split()
+)
+
+
+def terms_of(text: str) -> list[str]:
+	"""Lowercased words of `text` that carry meaning, in order."""
+	return [t for t in re.findall(r"\w+", text.lower()) if t not in _STOPWORDS]
+
+
+def match_expression(query: str, require_all: bool = True) -> Optional[str]:
+	"""FTS5 query for the meaningful terms of a search query; None if there is none.
+
+	With `require_all` a document must contain every term, otherwise any term
+	matches and BM25 ranking sorts out the rest.
+	"""
+	terms = terms_of(query)
+	if not terms:
+		return None
+	# Quoted, so words like OR/NEAR and punctuation are never FTS5 syntax
+	return (" " if require_all else " OR ").join(f'"{t}"' for t in dict.fromkeys(terms))
+
+
+def url_key(hit: SearchHit) -> str:
+	"""Canonical key of a hit: the same page from different searches shares it.
+
+	Scheme and `www.` are ignored, also for scheme-less display URLs:
+
+	>>> url_key(SearchHit(title="a", url="https://www.example.com/a/b/")) == url_key(SearchHit(title="a", url="www.example.com/a/b"))
+	True
+	"""
+	if not hit.url:
+		return f"title:{hit.title.strip().lower()}"
+	url = hit.url.strip()
+	if "://" not in url and not url.startswith("//"):
+		url = "//" + url
+	parts = urlsplit(url)
+	host = parts.netloc.lower()
+	if host.startswith("www."):
+		host = host[4:]
+	return urlunsplit(("", host, parts.path.rstrip("/") or "/", parts.query, ""))
@@ -1,15 +1,131 @@
 from __future__ import annotations
 
-from typing import List
+import random
+import threading
+import time
+from typing import List, Optional, Set
 import requests
 
 from ..config import settings
-from ..models.research import SearchHit
+from ..logging_config import get_logger
+from ..models.research import SearchHit, parse_search_hits
+from .cancellation import check_cancelled, deadline_in
+from .endpoint_pool import parse_urls
+from .metrics import metrics
+
+
+_log = get_logger("search")
+
+# Weight of the newest sample in the rolling latency / error averages
+_EWMA_ALPHA = 0.3
+# Latency assumed for an instance that hasn't answered yet, so new instances still get traffic
+_DEFAULT_LATENCY_MS = 1000.0
+_MAX_COOLDOWN_SECONDS = 60.0
+
+
+class SearxNGInstance:
+	def __init__(self, url: str):
+		self.url = url
+		self.in_flight = 0
+		self.latency_ms: Optional[float] = None
+		self.error_rate = 0.0
+		self.failures = 0
+		self.cooldown_until = 0.0
+		self.last_error: Optional[str] = None
+
+	@property
+	def healthy(self) -> bool:
+		return time.monotonic() >= self.cooldown_until
+
+	@property
+	def weight(self) -> float:
+		# Faster and more reliable instances get proportionally more queries;
+		# the floor keeps a struggling instance sampled so it can recover
+		latency = max(self.latency_ms or _DEFAULT_LATENCY_MS, 50.0)
+		return max(1000.0 / latency * (1.0 - self.error_rate) ** 2, 0.01)
+
+	def record_success(self, latency_ms: float) -> None:
+		self.latency_ms = latency_ms if self.latency_ms is None else _EWMA_ALPHA * latency_ms + (1 - _EWMA_ALPHA) * self.latency_ms
+		self.error_rate *= 1 - _EWMA_ALPHA
+		self.failures = 0
+		self.cooldown_until = 0.0
+
+	def record_failure(self, error: str) -> None:
+		self.error_rate = _EWMA_ALPHA + (1 - _EWMA_ALPHA) * self.error_rate
+		self.failures += 1
+		self.last_error = error
+		if self.failures >= 2:
+			# Back off exponentially from an instance that keeps failing (rate-limited upstream, down, ...)
+			self.cooldown_until = time.monotonic() + min(2.0 ** self.failures, _MAX_COOLDOWN_SECONDS)
+
+	def status(self) -> dict:
+		return {
+			"url": self.url,
+			"healthy": self.healthy,
+			"in_flight": self.in_flight,
+			"latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+			"error_rate": round(self.error_rate, 3),
+			"consecutive_failures": self.failures,
+			"weight": round(self.weight, 3),
+			"last_error": self.last_error,
+		}
+
+
+class SearxNGPool:
+	"""Spreads queries over SearxNG instances by weighted random choice.
+
+	Each instance accepts at most `max_concurrency` queries at a time; callers
+	wait for a free slot until their deadline. Instances cooling down after
+	repeated failures are only used when nothing else is left.
+	"""
+
+	def __init__(self, urls: List[str], max_concurrency: int):
+		self.instances = [SearxNGInstance(u) for u in urls]
+		self.max_concurrency = max(1, max_concurrency)
+		self._cond = threading.Condition()
+
+	def acquire(self, exclude: Set[str], deadline: float) -> Optional[SearxNGInstance]:
+		"""Reserve an instance not in `exclude`, or None if none is free before the deadline."""
+		with self._cond:
+			while True:
+				remaining = [i for i in self.instances if i.url not in exclude]
+				if not remaining:
+					return None
+				healthy = [i for i in remaining if i.healthy]
+				free = [i for i in (healthy or remaining) if i.in_flight < self.max_concurrency]
+				if free:
+					instance = random.choices(free, weights=[i.weight for i in free])[0]
+					instance.in_flight += 1
+					return instance
+				wait = deadline - time.monotonic()
+				if wait <= 0:
+					return None
+				self._cond.wait(wait)
+
+	def release(self, instance: SearxNGInstance, latency_ms: Optional[float] = None, error: Optional[str] = None) -> None:
+		with self._cond:
+			instance.in_flight -= 1
+			if error is not None:
+				instance.record_failure(error)
+			elif latency_ms is not None:
+				instance.record_success(latency_ms)
+			self._cond.notify()
+
+	def status(self) -> List[dict]:
+		with self._cond:
+			return [i.status() for i in self.instances]
 
 
 class SearxNGService:
 	def __init__(self, base_url: str | None = None):
-		self.base_url = (base_url or settings.searxng_base_url).rstrip("/")
+		urls = [base_url.rstrip("/")] if base_url else parse_urls(settings.searxng_base_urls, settings.searxng_base_url)
+		self.base_url = urls[0]
+		self.pool = SearxNGPool(urls, settings.searxng_max_concurrency)
+
+	def _query(self, base_url: str, params: dict, timeout: float) -> dict:
+		resp = requests.get(f"{base_url}/search", params=params, timeout=timeout)
+		resp.raise_for_status()
+		return resp.json()
 
 	def search(self, query: str, language: str | None = None, num_results: int | None = None) -> List[SearchHit]:
 		params = {
@@ -19,21 +135,49 @@ class SearxNGService:
 			"categories": settings.searxng_engine,
 			"safesearch": 1,
 		}
-		url = f"{self.base_url}/search"
-		resp = requests.get(url, params=params, timeout=45)
-		resp.raise_for_status()
-		data = resp.json()
-		results = []
-		for r in data.get("results", [])[: (num_results or settings.searxng_results)]:
-			results.append(
-				SearchHit(
-					title=r.get("title") or r.get("url") or "Untitled",
-					url=r.get("url", ""),
-					snippet=r.get("content"),
-				)
-			)
-		return results
-
-
-searx = SearxNGService()
-
+		deadline = deadline_in(settings.searxng_timeout_seconds)
+		tried: Set[str] = set()
+		data = None
+		answered_empty = False
+		last_error: Optional[Exception] = None
+		# Fail over to the next instance until one answers or the query's deadline passes
+		while data is None and time.monotonic() < deadline:
+			check_cancelled()
+			instance = self.pool.acquire(tried, deadline)
+			if instance is None:
+				break
+			tried.add(instance.url)
+			started = time.monotonic()
+			timeout = min(settings.searxng_attempt_timeout_seconds, deadline - started)
+			try:
+				result = self._query(instance.url, params, timeout)
+			except Exception as e:
+				last_error = e
+				self.pool.release(instance, error=str(e))
+				metrics.inc("openresearch_searxng_failures_total", help="Failed SearxNG queries", instance=instance.url)
+				_log.warning("SearxNG instance failed", extra={"url": instance.url, "error": str(e)})
+				continue
+			latency_ms = (time.monotonic() - started) * 1000.0
+			metrics.observe("openresearch_searxng_request_seconds", latency_ms / 1000.0, help="SearxNG query latency", instance=instance.url)
+			if not result.get("results") and result.get("unresponsive_engines"):
+				# Upstream engines rate-limited this instance; another one may still have results
+				self.pool.release(instance, error=f"unresponsive engines: {result['unresponsive_engines']}")
+				_log.warning("SearxNG instance returned no results", extra={"url": instance.url, "unresponsive_engines": result["unresponsive_engines"]})
+				answered_empty = True
+				continue
+			self.pool.release(instance, latency_ms=latency_ms)
+			data = result
+		if data is None:
+			if answered_empty:
+				return []
+			if last_error is not None:
+				raise last_error
+			raise TimeoutError(f"No SearxNG instance available within {settings.searxng_timeout_seconds:g}s")
+		return parse_search_hits([
+			{
+				"title": r.get("title") or r.get("url") or "Untitled",
+				"url": r.get("url") or "",
+				"snippet": r.get("content"),
+			}
+			for r in data.get("results", [])[: (num_results or settings.searxng_results)]
+		])
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from ..config import settings
+from .cancellation import TaskCancelled, check_cancelled
+from .metrics import metrics
+
+
+T = TypeVar("T")
+
+# How often a waiting caller checks whether its own task was cancelled
+_WAIT_SLICE_SECONDS = 0.25
+
+
+def request_key(*parts) -> str:
+	"""Stable, compact key for a normalized request."""
+	return hashlib.sha256(json.dumps(parts, default=str, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class _Call(Generic[T]):
+	def __init__(self):
+		self.done = threading.Event()
+		self.result: Optional[T] = None
+		self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+	"""Coalesces identical concurrent calls into one upstream request.
+
+	The first caller for a key runs the call; callers arriving while it is in
+	flight wait and receive the same result (or exception). Nothing is cached
+	once the call completes.
+	"""
+
+	def __init__(self, kind: str):
+		self.kind = kind
+		self._lock = threading.Lock()
+		self._calls: Dict[str, _Call] = {}
+
+	def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+		"""Run `fn` or join an identical call in flight; returns (result, shared)."""
+		if not settings.coalesce_requests:
+			return fn(), False
+		while True:
+			with self._lock:
+				call = self._calls.get(key)
+				leader = call is None
+				if leader:
+					call = self._calls[key] = _Call()
+
+			if leader:
+				metrics.inc("openresearch_singleflight_calls_total", help="Calls by whether they went upstream or joined an identical call in flight", kind=self.kind, role="leader")
+				try:
+					call.result = fn()
+					return call.result, False
+				except BaseException as e:
+					call.error = e
+					raise
+				finally:
+					with self._lock:
+						del self._calls[key]
+					call.done.set()
+
+			metrics.inc("openresearch_singleflight_calls_total", help="Calls by whether they went upstream or joined an identical call in flight", kind=self.kind, role="coalesced")
+			while not call.done.wait(_WAIT_SLICE_SECONDS):
+				check_cancelled()
+			if isinstance(call.error, TaskCancelled):
+				# The leader's task gave up, not the request itself: try again
+				continue
+			if call.error is not None:
+				raise call.error
+			return call.result, True
+
+
+llm_flights = SingleFlight("llm")
+search_flights = SingleFlight("search")
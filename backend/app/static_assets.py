@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .compression import brotli, compress, is_compressible, negotiate
+
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Everything else (HTML, direct links to plain names) is revalidated with its ETag
+REVALIDATE = "no-cache"
+
+# src="..." / href="..." references in HTML that may point at a local asset
+_REFERENCE = re.compile(r'\b(src|href)="(?:/static/)?([^"#?:]+)"')
+
+
+@dataclass
+class _Asset:
+	body: bytes
+	media_type: str
+	etag: str
+	fingerprint: str
+	mtime: float
+	# encoding -> precompressed body, only when smaller than the original
+	encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+class StaticAssets:
+	"""Serves the frontend from memory: fingerprinted, precompressed, cacheable.
+
+	Every file gets a content-hashed alias (`styles.3f2a9c1b0d.css`) served
+	with a long-lived immutable Cache-Control. HTML pages are rewritten to
+	reference those aliases and are themselves served with `no-cache` plus an
+	ETag, so a repeat visit costs one 304. Text assets are gzip/brotli
+	compressed once at load time. Files edited on disk are picked up on the
+	next request (checked at most once per `check_interval` seconds).
+	"""
+
+	def __init__(self, directory: Path, check_interval: float = 1.0):
+		self.directory = Path(directory)
+		self.check_interval = check_interval
+		self._lock = threading.Lock()
+		self._assets: Dict[str, _Asset] = {}
+		# served path -> (asset key, whether the path is the fingerprinted alias)
+		self._routes: Dict[str, tuple] = {}
+		self._checked_at = 0.0
+		self._refresh(force=True)
+
+	def _scan(self) -> Dict[str, float]:
+		return {
+			p.relative_to(self.directory).as_posix(): p.stat().st_mtime
+			for p in self.directory.rglob("*")
+			if p.is_file() and not p.name.startswith(".")
+		}
+
+	def _load(self, key: str, body: bytes, mtime: float) -> _Asset:
+		media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+		if media_type.startswith("text/") or media_type == "application/javascript":
+			media_type += "; charset=utf-8"
+		digest = hashlib.sha256(body).hexdigest()
+		stem, dot, suffix = key.rpartition(".")
+		fingerprint = f"{stem}.{digest[:10]}.{suffix}" if dot else f"{key}.{digest[:10]}"
+		asset = _Asset(body=body, media_type=media_type, etag=f'"{digest[:16]}"', fingerprint=fingerprint, mtime=mtime)
+		if is_compressible(media_type):
+			for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+				encoded = compress(body, encoding)
+				if len(encoded) < len(body):
+					asset.encoded[encoding] = encoded
+		return asset
+
+	def _rewrite_html(self, html: bytes, assets: Dict[str, _Asset]) -> bytes:
+		def replace(match: re.Match) -> str:
+			asset = assets.get(match.group(2))
+			if asset is None or asset.media_type.startswith("text/html"):
+				return match.group(0)
+			return f'{match.group(1)}="/static/{asset.fingerprint}"'
+
+		return _REFERENCE.sub(replace, html.decode("utf-8")).encode("utf-8")
+
+	def _refresh(self, force: bool = False) -> None:
+		now = time.monotonic()
+		if not force and now - self._checked_at < self.check_interval:
+			return
+		with self._lock:
+			if not force and now - self._checked_at < self.check_interval:
+				return
+			self._checked_at = now
+			on_disk = self._scan()
+			current = {key: asset.mtime for key, asset in self._assets.items()}
+			if on_disk == current:
+				return
+			assets = {
+				key: self._assets[key] if current.get(key) == mtime else None
+				for key, mtime in on_disk.items()
+			}
+			for key, asset in assets.items():
+				if asset is None:
+					assets[key] = self._load(key, (self.directory / key).read_bytes(), on_disk[key])
+			# Pages are rebuilt whenever anything changed: they embed the aliases
+			for key, asset in assets.items():
+				if asset.media_type.startswith("text/html"):
+					html = self._rewrite_html((self.directory / key).read_bytes(), assets)
+					assets[key] = self._load(key, html, asset.mtime)
+			routes = {}
+			for key, asset in assets.items():
+				routes[key] = (key, False)
+				routes[asset.fingerprint] = (key, True)
+			self._assets, self._routes = assets, routes
+
+	def _respond(self, scope: Scope) -> Response:
+		path, root = scope["path"], scope.get("root_path", "")
+		if root and path.startswith(root):
+			path = path[len(root):]
+		self._refresh()
+		route = self._routes.get(path.lstrip("/"))
+		if route is None or scope["method"] not in ("GET", "HEAD"):
+			return PlainTextResponse("Not Found", status_code=404)
+		key, immutable = route
+		asset = self._assets[key]
+		request_headers = Headers(scope=scope)
+		headers = {
+			"Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+			"ETag": asset.etag,
+		}
+		if asset.encoded:
+			headers["Vary"] = "Accept-Encoding"
+		if request_headers.get("if-none-match") == asset.etag:
+			return Response(status_code=304, headers=headers)
+		encoding = negotiate(request_headers.get("accept-encoding", ""))
+		body = asset.encoded.get(encoding) if encoding else None
+		if body is not None:
+			headers["Content-Encoding"] = encoding
+		else:
+			body = asset.body
+		if scope["method"] == "HEAD":
+			headers["Content-Length"] = str(len(body))
+			return Response(status_code=200, headers=headers, media_type=asset.media_type)
+		return Response(body, headers=headers, media_type=asset.media_type)
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		await self._respond(scope)(scope, receive, send)
@@ -0,0 +1,94 @@
+"""Indexing and query cost of the local document corpus search provider.
+
+	python scripts/benchmarks/bench_local_corpus.py --files 100000
+
+Generates a synthetic Markdown corpus, indexes it from scratch, re-syncs it
+with a handful of files changed (the incremental path) and times cold and
+warm queries against the memory-mapped index.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.config import settings  # noqa: E402
+from app.services.local_corpus_service import LocalCorpusIndex  # noqa: E402
+
+WORDS = (
+	"battery quantum lithium solid state electrolyte anode cathode charge capacity density cycle thermal "
+	"policy market supply chain cost grid storage renewable solar wind hydrogen fuel cell efficiency "
+	"research report analysis survey review trial result method model data system network protocol"
+).split()
+
+QUERIES = [
+	"solid state battery electrolyte",
+	"grid storage cost renewable",
+	"hydrogen fuel cell efficiency",
+	"quantum battery charge capacity",
+	"supply chain lithium market",
+]
+
+
+def _write_corpus(directory: Path, files: int, words: int, rng: random.Random) -> None:
+	# Mostly filler from a large vocabulary, plus a few topical words per document
+	vocabulary = [f"w{n}" for n in range(50_000)]
+	for i in range(files):
+		sub = directory / f"d{i // 1000:04d}"
+		sub.mkdir(exist_ok=True)
+		tokens = rng.choices(vocabulary, k=words) + rng.choices(WORDS, k=8)
+		rng.shuffle(tokens)
+		body = " ".join(tokens)
+		(sub / f"doc{i}.md").write_text(f"# Document {i} {rng.choice(WORDS)} {rng.choice(WORDS)}\n\n{body}\n", encoding="utf-8")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--files", type=int, default=20_000, help="documents in the synthetic corpus")
+	parser.add_argument("--words", type=int, default=300, help="words per document")
+	parser.add_argument("--changed", type=int, default=50, help="documents modified before the incremental sync")
+	args = parser.parse_args()
+	rng = random.Random(7)
+
+	with tempfile.TemporaryDirectory() as tmp:
+		corpus = Path(tmp) / "corpus"
+		corpus.mkdir()
+		started = time.perf_counter()
+		_write_corpus(corpus, args.files, args.words, rng)
+		print(f"generated {args.files:,} files in {time.perf_counter() - started:.1f}s")
+
+		index = LocalCorpusIndex(str(corpus), str(Path(tmp) / "corpus.sqlite3"))
+		started = time.perf_counter()
+		counts = index.sync()
+		print(f"full index:        {time.perf_counter() - started:.1f}s {counts}  ({os.path.getsize(index.index_path) / 2**20:.0f} MB)")
+
+		for i in rng.sample(range(args.files), min(args.changed, args.files)):
+			path = corpus / f"d{i // 1000:04d}" / f"doc{i}.md"
+			path.write_text(path.read_text(encoding="utf-8") + " thermal runaway\n", encoding="utf-8")
+		started = time.perf_counter()
+		counts = index.sync()
+		print(f"incremental sync:  {time.perf_counter() - started:.2f}s {counts}")
+
+		# A fresh index object opens a new memory map: the first query is "cold" for SQLite
+		fresh = LocalCorpusIndex(str(corpus), str(index.index_path))
+		started = time.perf_counter()
+		fresh.search(QUERIES[0], settings.local_corpus_results)
+		print(f"first query:       {(time.perf_counter() - started) * 1000:.1f} ms")
+		latencies = []
+		for _ in range(20):
+			for q in QUERIES:
+				started = time.perf_counter()
+				fresh.search(q, settings.local_corpus_results)
+				latencies.append(time.perf_counter() - started)
+		latencies.sort()
+		print(f"warm queries:      p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,150 @@
+"""Contention benchmark for research task progress polling.
+
+Hundreds of pollers read and serialize task progress (what GET /research/{id}
+does) while writer threads keep updating the same tasks the way a running
+research task does (search steps, token usage, status messages).
+
+	python scripts/benchmarks/bench_progress_contention.py --pollers 400
+	python scripts/benchmarks/bench_progress_contention.py --pollers 400 --baseline
+
+--baseline emulates the previous design: one global lock shared by every
+reader and writer, with readers serializing the live, still-mutating object.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.models.llm import LLMUsage  # noqa: E402
+from app.models.research import ResearchProgress, SearchHit, SearchStepResult  # noqa: E402
+from app.services import research_service  # noqa: E402
+
+
+def _new_progress(task_id: str) -> ResearchProgress:
+	return ResearchProgress(task_id=task_id, started_at=datetime.utcnow(), status="searching", topic="benchmark")
+
+
+def _step(i: int) -> SearchStepResult:
+	hits = [SearchHit(title=f"Result {i}.{j}", url=f"https://example.com/{i}/{j}", snippet="x" * 200) for j in range(8)]
+	return SearchStepResult(query=f"query {i}", hits=hits)
+
+
+def _mutate(progress: ResearchProgress, i: int) -> None:
+	# Nested values are replaced, never changed in place, as research_service does
+	progress.steps = progress.steps[-5:] + [_step(i)]
+	progress.message = f"Executing search {i}"
+	usage = progress.usage.model_copy(deep=True)
+	usage.add(LLMUsage(provider="bench", model="m", phase="report", input_tokens=100, output_tokens=50))
+	progress.usage = usage
+
+
+class _GlobalLockTasks:
+	"""The old scheme: a single lock, live objects handed to readers."""
+
+	def __init__(self, task_ids):
+		self.lock = threading.Lock()
+		self.tasks = {t: _new_progress(t) for t in task_ids}
+
+	def read(self, task_id: str) -> str:
+		with self.lock:
+			progress = self.tasks[task_id]
+		try:
+			return progress.model_dump_json()
+		except Exception:
+			# Serializing while a writer mutates the object can fail outright
+			return ""
+
+	def write(self, task_id: str, i: int) -> None:
+		with self.lock:
+			_mutate(self.tasks[task_id], i)
+
+
+class _SnapshotTasks:
+	"""The current scheme in research_service: per-task locks, published snapshots."""
+
+	def __init__(self, task_ids):
+		for t in task_ids:
+			research_service._TASKS[t] = research_service._TaskState(_new_progress(t))
+
+	def read(self, task_id: str) -> str:
+		return research_service.get_progress(task_id).model_dump_json()
+
+	def write(self, task_id: str, i: int) -> None:
+		with research_service._edit(task_id) as progress:
+			_mutate(progress, i)
+
+
+def _percentile(values, pct: float) -> float:
+	if not values:
+		return 0.0
+	values = sorted(values)
+	return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--pollers", type=int, default=300, help="concurrent polling threads")
+	parser.add_argument("--tasks", type=int, default=20, help="tasks being updated")
+	parser.add_argument("--writes-per-second", type=float, default=50.0, help="updates per task per second")
+	parser.add_argument("--seconds", type=float, default=5.0, help="benchmark duration")
+	parser.add_argument("--baseline", action="store_true", help="use the single global lock scheme")
+	args = parser.parse_args()
+
+	task_ids = [f"task-{i}" for i in range(args.tasks)]
+	store = _GlobalLockTasks(task_ids) if args.baseline else _SnapshotTasks(task_ids)
+	# Threads stop on their own clock: with hundreds of busy threads the main
+	# thread may not get the GIL back in time to signal them
+	end = time.perf_counter() + args.seconds
+	read_latencies: list[list[float]] = [[] for _ in range(args.pollers)]
+	write_latencies: list[list[float]] = [[] for _ in range(args.tasks)]
+	failed_reads = [0]
+
+	def poller(n: int) -> None:
+		task_id = task_ids[n % len(task_ids)]
+		out = read_latencies[n]
+		while time.perf_counter() < end:
+			started = time.perf_counter()
+			if not store.read(task_id):
+				failed_reads[0] += 1
+			out.append(time.perf_counter() - started)
+
+	def writer(n: int) -> None:
+		task_id = task_ids[n]
+		interval = 1.0 / args.writes_per_second
+		out = write_latencies[n]
+		i = 0
+		while time.perf_counter() < end:
+			started = time.perf_counter()
+			store.write(task_id, i)
+			out.append(time.perf_counter() - started)
+			i += 1
+			time.sleep(interval)
+
+	threads = [threading.Thread(target=writer, args=(n,), daemon=True) for n in range(args.tasks)]
+	threads += [threading.Thread(target=poller, args=(n,), daemon=True) for n in range(args.pollers)]
+	started = time.perf_counter()
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	elapsed = time.perf_counter() - started
+
+	reads = [v for vs in read_latencies for v in vs]
+	writes = [v for vs in write_latencies for v in vs]
+	print(f"scheme:        {'global lock (baseline)' if args.baseline else 'per-task lock + snapshots'}")
+	print(f"pollers:       {args.pollers}  tasks: {args.tasks}  duration: {elapsed:.1f}s")
+	print(f"reads:         {len(reads) / elapsed:,.0f}/s  failed: {failed_reads[0]}")
+	print(f"read latency:  p50 {_percentile(reads, 0.5) * 1000:.3f} ms  p99 {_percentile(reads, 0.99) * 1000:.3f} ms  max {max(reads, default=0) * 1000:.3f} ms")
+	print(f"writes:        {len(writes) / elapsed:,.0f}/s (target {args.tasks * args.writes_per_second:,.0f}/s)")
+	print(f"write latency: p50 {_percentile(writes, 0.5) * 1000:.3f} ms  p99 {_percentile(writes, 0.99) * 1000:.3f} ms  mean {statistics.fmean(writes) * 1000 if writes else 0:.3f} ms")
+
+
+if __name__ == "__main__":
+	main()
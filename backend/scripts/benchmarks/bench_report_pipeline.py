@@ -0,0 +1,106 @@
+"""Wall time of the search + report phases, sequential vs pipelined drafting.
+
+	python scripts/benchmarks/bench_report_pipeline.py
+	python scripts/benchmarks/bench_report_pipeline.py --queries 6 --search-ms 2500 --ms-per-kchar 400
+
+Search and LLM calls are simulated with sleeps: a search takes --search-ms
+(with +/- 50% jitter, so one query is the slowest), an LLM call takes
+--llm-base-ms plus --ms-per-kchar per 1000 prompt characters. Prompt sizes are
+the real ones built by research_service. Pipelined mode spends more LLM time
+in total but overlaps most of it with the searches.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.config import settings  # noqa: E402
+from app.models.llm import LLMResult, LLMUsage  # noqa: E402
+from app.models.research import ResearchProgress, SearchHit, SearchPlan, SearchQuery  # noqa: E402
+from app.services import research_service  # noqa: E402
+
+
+class FakeSearch:
+	def __init__(self, latency_ms: float, seed: int):
+		self.latency_ms = latency_ms
+		self.random = random.Random(seed)
+
+	def search(self, query: str, language=None, num_results=None):
+		time.sleep(self.latency_ms * self.random.uniform(0.5, 1.5) / 1000)
+		return [
+			SearchHit(title=f"{query} result {i}", url=f"https://example.com/{abs(hash(query))}/{i}", snippet=f"Findings about {query}. " * 12)
+			for i in range(8)
+		]
+
+
+class FakeLLM:
+	thinking_model = "think"
+	task_model = "task"
+
+	def __init__(self, base_ms: float, ms_per_kchar: float):
+		self.base_ms = base_ms
+		self.ms_per_kchar = ms_per_kchar
+		self.busy_ms = 0.0
+		self._lock = threading.Lock()
+
+	def _call(self, prompt: str, system: str) -> LLMResult:
+		ms = self.base_ms + self.ms_per_kchar * (len(prompt) + len(system)) / 1000
+		time.sleep(ms / 1000)
+		with self._lock:
+			self.busy_ms += ms
+		return LLMResult(text="- finding [source](https://example.com)\n" * 8, usage=LLMUsage(provider="fake", model="fake"))
+
+	def think(self, prompt: str, system: str = "", **_):
+		return self._call(prompt, system)
+
+	def complete(self, prompt: str, system: str = "", **_):
+		return self._call(prompt, system)
+
+
+def run(pipelined: bool, args) -> tuple[float, float]:
+	settings.report_pipeline_enabled = pipelined
+	settings.hit_index_enabled = False
+	settings.research_reuse_enabled = False
+	settings.checkpoint_enabled = False
+	search = FakeSearch(args.search_ms, args.seed)
+	llm = FakeLLM(args.llm_base_ms, args.ms_per_kchar)
+	research_service.get_search_service = lambda: search
+	research_service.get_llm_service = lambda: llm
+
+	task_id = f"bench-{'pipelined' if pipelined else 'sequential'}"
+	plan = SearchPlan(topic="solid-state batteries", queries=[SearchQuery(query=f"solid-state batteries aspect {i}") for i in range(args.queries)])
+	progress = ResearchProgress(task_id=task_id, started_at=datetime.utcnow(), status="searching", topic=plan.topic, plan=plan)
+	with research_service._LOCK:
+		research_service._TASKS[task_id] = research_service._TaskState(progress)
+	started = time.perf_counter()
+	research_service._continue_research(task_id)
+	elapsed = time.perf_counter() - started
+	status = research_service.get_progress(task_id).status
+	if status != "done":
+		raise SystemExit(f"{task_id} ended as {status}")
+	return elapsed, llm.busy_ms / 1000
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--queries", type=int, default=5)
+	parser.add_argument("--search-ms", type=float, default=1500)
+	parser.add_argument("--llm-base-ms", type=float, default=300)
+	parser.add_argument("--ms-per-kchar", type=float, default=250)
+	parser.add_argument("--seed", type=int, default=7)
+	args = parser.parse_args()
+
+	for pipelined in (False, True):
+		elapsed, busy = run(pipelined, args)
+		print(f"{'pipelined' if pipelined else 'sequential':<11} wall {elapsed:6.2f}s   LLM busy {busy:6.2f}s")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,128 @@
+"""Serialization cost of one progress poll and of building search hits.
+
+	python scripts/benchmarks/bench_serialization.py
+
+"before" mirrors what FastAPI did for GET /research/{task_id} with a
+`response_model`: validate the returned object, dump it to JSON-compatible
+Python and encode it with the stdlib `json` module. The "after" variants skip
+validation for the already-validated task snapshot (`model_construct`) and
+encode with orjson or with pydantic's own JSON serializer.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.models.llm import LLMUsage, TaskUsage  # noqa: E402
+from app.models.research import (  # noqa: E402
+	ClarifyingQuestion,
+	ClarifyingQuestions,
+	ResearchProgress,
+	ResearchResponse,
+	SearchHit,
+	SearchPlan,
+	SearchQuery,
+	SearchStepResult,
+	parse_search_hits,
+)
+
+# (queries, hits per query, report characters) for each task size
+SIZES = {
+	"surface": (3, 8, 3_000),
+	"standard": (5, 8, 8_000),
+	"deep": (6, 20, 20_000),
+}
+
+
+def _raw_results(n: int) -> list[dict]:
+	return [
+		{"title": f"Result {i}: a reasonably long page title", "url": f"https://example.com/articles/{i}", "content": "Snippet text " * 25}
+		for i in range(n)
+	]
+
+
+def _progress(queries: int, hits: int, report_chars: int) -> ResearchProgress:
+	usage = TaskUsage()
+	for phase in ("clarify", "plan", "report"):
+		usage.add(LLMUsage(provider="openrouter", model="some/model", phase=phase, input_tokens=1500, output_tokens=600, total_ms=4000.0))
+	return ResearchProgress(
+		task_id="bench",
+		started_at=datetime.utcnow(),
+		status="done",
+		message="Completed",
+		topic="Benchmark topic",
+		clarifying_questions=ClarifyingQuestions(topic="Benchmark topic", questions=[ClarifyingQuestion(question="Which time frame?", context="Scope")]),
+		plan=SearchPlan(topic="Benchmark topic", queries=[SearchQuery(query=f"query {i}", rationale="why") for i in range(queries)]),
+		steps=[
+			SearchStepResult(query=f"query {q}", hits=[SearchHit(title=r["title"], url=r["url"], snippet=r["content"]) for r in _raw_results(hits)])
+			for q in range(queries)
+		],
+		report_markdown="# Report\n\n" + "Lorem ipsum dolor sit amet. " * (report_chars // 28),
+		usage=usage,
+	)
+
+
+def poll_before(p: ResearchProgress) -> bytes:
+	resp = ResearchResponse(task_id=p.task_id, status=p.status, progress=p)
+	validated = ResearchResponse.model_validate(resp.model_dump())
+	return json.dumps(validated.model_dump(mode="json")).encode("utf-8")
+
+
+def poll_after_orjson(p: ResearchProgress) -> bytes:
+	resp = ResearchResponse.model_construct(task_id=p.task_id, status=p.status, progress=p)
+	return orjson.dumps(resp.model_dump())
+
+
+def poll_after_pydantic_json(p: ResearchProgress) -> bytes:
+	resp = ResearchResponse.model_construct(task_id=p.task_id, status=p.status, progress=p)
+	return resp.model_dump_json().encode("utf-8")
+
+
+def hits_validated(results: list[dict]) -> list[SearchHit]:
+	return [SearchHit(title=r.get("title") or "Untitled", url=r.get("url", ""), snippet=r.get("content")) for r in results]
+
+
+def hits_constructed(results: list[dict]) -> list[SearchHit]:
+	return [SearchHit.model_construct(title=r.get("title") or "Untitled", url=r.get("url", ""), snippet=r.get("content")) for r in results]
+
+
+def hits_batch(results: list[dict]) -> list[SearchHit]:
+	return parse_search_hits([{"title": r.get("title") or "Untitled", "url": r.get("url", ""), "snippet": r.get("content")} for r in results])
+
+
+def _time_us(fn, arg, number: int) -> float:
+	return min(timeit.repeat(lambda: fn(arg), number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--number", type=int, default=200, help="iterations per measurement")
+	args = parser.parse_args()
+
+	print(f"{'task size':<10} {'payload':>9} {'before':>11} {'orjson':>11} {'pydantic':>11}  speedup")
+	for name, (queries, hits, report_chars) in SIZES.items():
+		p = _progress(queries, hits, report_chars)
+		assert orjson.loads(poll_before(p)) == orjson.loads(poll_after_orjson(p)) == orjson.loads(poll_after_pydantic_json(p))
+		before = _time_us(poll_before, p, args.number)
+		after_orjson = _time_us(poll_after_orjson, p, args.number)
+		after_pydantic = _time_us(poll_after_pydantic_json, p, args.number)
+		size = len(poll_after_orjson(p))
+		print(f"{name:<10} {size / 1024:>7.1f}KB {before:>9.0f}us {after_orjson:>9.0f}us {after_pydantic:>9.0f}us  {before / min(after_orjson, after_pydantic):.1f}x")
+
+	results = _raw_results(20)
+	validated = _time_us(hits_validated, results, args.number * 10)
+	constructed = _time_us(hits_constructed, results, args.number * 10)
+	batch = _time_us(hits_batch, results, args.number * 10)
+	print(f"\n20 search hits: one model each {validated:.1f}us, model_construct {constructed:.1f}us, parse_search_hits {batch:.1f}us")
+
+
+if __name__ == "__main__":
+	main()